@@ -5,7 +5,6 @@ import os
 import yaml
 import numpy as np
 import scipy.interpolate as interp
-import scipy.optimize as sciopt
 import matplotlib.pyplot as plt
 # noinspection PyUnresolvedReferences
 from mpl_toolkits.mplot3d import Axes3D
@@ -13,9 +12,12 @@ from matplotlib import cm, rc
 from matplotlib import ticker
 
 from bag.core import BagProject
-from bag.io.sim_data import load_sim_results, save_sim_results, load_sim_file
+from bag.io.sim_data import load_sim_results, save_sim_results
 
 from serdes_ec.layout.analog.amplifier import DiffAmp
+from serdes_ec.simulation.ac import compute_ac_metrics
+from serdes_ec.simulation.pipeline import StagePipeline
+from serdes_ec.simulation.sim_data import LazySimData
 
 
 def gen_lay_sch(prj, specs, fg_load_list):
@@ -49,7 +51,7 @@ def gen_lay_sch(prj, specs, fg_load_list):
     return name_list
 
 
-def simulate(prj, name_list, sim_params):
+def simulate(prj, name_list, sim_params, max_workers=None):
     impl_lib = sim_params['impl_lib']
     save_root = sim_params['save_root']
     tb_lib = sim_params['tb_lib']
@@ -59,27 +61,30 @@ def simulate(prj, name_list, sim_params):
     sim_view = sim_params['sim_view']
     params = sim_params['params']
 
-    for name in name_list:
-        print('DUT: ', name)
-        dut_cell = name
-        impl_cell = name + '_TB'
-        save_fname = os.path.join(save_root, '%s.hdf5' % name)
+    if max_workers is None:
+        max_workers = dict(lvs=2, rcx=2, tb=1, sim=4)
 
-        print('run lvs')
+    def lvs_stage(dut_cell):
+        print('run lvs: ', dut_cell)
         lvs_passed, lvs_log = prj.run_lvs(impl_lib, dut_cell)
         if not lvs_passed:
-            raise ValueError('LVS failed...')
-        print('run rcx')
+            raise ValueError('LVS failed for %s...' % dut_cell)
+        return dut_cell
+
+    def rcx_stage(dut_cell):
+        print('run rcx: ', dut_cell)
         rcx_passed, rcx_log = prj.run_rcx(impl_lib, dut_cell)
         if not rcx_passed:
-            raise ValueError('RCX failed...')
+            raise ValueError('RCX failed for %s...' % dut_cell)
+        return dut_cell
 
-        print('make tb')
+    def tb_stage(dut_cell):
+        print('make tb: ', dut_cell)
+        impl_cell = dut_cell + '_TB'
         dsn = prj.create_design_module(tb_lib, tb_cell)
         dsn.design(dut_lib=impl_lib, dut_cell=dut_cell)
         dsn.implement_design(impl_lib, top_cell_name=impl_cell)
 
-        print('update testbench')
         tb = prj.configure_testbench(impl_lib, impl_cell)
         tb.set_simulation_environments(env_list)
         tb.set_simulation_view(impl_lib, dut_cell, sim_view)
@@ -90,37 +95,28 @@ def simulate(prj, name_list, sim_params):
         tb.add_output('outac', """getData("/outac", ?result 'ac)""")
 
         tb.update_testbench()
-        print('run simulation')
+        return dut_cell, tb
+
+    def sim_stage(info):
+        dut_cell, tb = info
+        print('run simulation: ', dut_cell)
         save_dir = tb.run_simulation()
-        print('load data')
         data = load_sim_results(save_dir)
-        print('save_data')
+        save_fname = os.path.join(save_root, '%s.hdf5' % dut_cell)
         save_sim_results(data, save_fname)
+        return save_fname
 
-
-def compute_gain_and_w3db(f_vec, out_arr):
-    out_arr = np.abs(out_arr)
-    gain = out_arr[0]
-
-    # convert
-    out_log = 20 * np.log10(out_arr)
-    gain_log_3db = 20 * np.log10(gain) - 3
-
-    # find first index at which gain goes below gain_log 3db
-    diff_arr = out_log - gain_log_3db
-    idx_arr = np.argmax(diff_arr < 0)
-    freq_log = np.log10(f_vec)
-    freq_log_max = freq_log[idx_arr]
-
-    fun = interp.interp1d(freq_log, diff_arr, kind='cubic', copy=False,
-                          assume_sorted=True)
-    try:
-        # noinspection PyTypeChecker
-        f3db = 10.0**(sciopt.brentq(fun, freq_log[0], freq_log_max))
-    except ValueError:
-        f3db = f_vec[-1]
-
-    return gain, f3db
+    # LVS and RCX run the layout export and the checker as subprocesses on the event loop of
+    # their worker thread, with a separate run directory per cell, so they do not use the
+    # Virtuoso SKILL connection of prj and can overlap: LVS of one cell runs during RCX of the
+    # previous one.  Testbench creation goes through the SKILL connection, which is not thread
+    # safe, so it holds the virtuoso lock.
+    stages = [('lvs', lvs_stage, max_workers['lvs']),
+              ('rcx', rcx_stage, max_workers['rcx']),
+              ('tb', tb_stage, max_workers['tb'], 'virtuoso'),
+              ('sim', sim_stage, max_workers['sim']),
+              ]
+    return StagePipeline(stages).run(name_list)
 
 
 def plot_mat(fig_idx, zlabel, mat, xvec, yvec):
@@ -157,20 +153,17 @@ def plot_gain_bw(specs, sim_params, fg_load_list, env):
     bw_mat = np.empty((len(fg_load_list), len(vload_list)))
     for fg_idx, fg_load in enumerate(fg_load_list):
         fname = os.path.join(save_root, '%s_fg%d.hdf5' % (base_name, fg_load))
-        results = load_sim_file(fname)
-
-        swp_pars = results['sweep_params'][vname]
-        corners = results['corner']
-        corner_idx = swp_pars.index('corner')
-        env_idx = np.argwhere(corners == env)[0][0]
-        data = np.take(results[vname], env_idx, axis=corner_idx)
+        # only read the given corner from file
+        with LazySimData(fname) as sim_data:
+            results = sim_data.select(corner=env)
+
+        swp_pars = list(results['sweep_params'][vname])
+        data = results[vname]
+        metrics = compute_ac_metrics(results['freq'], data, axis=swp_pars.index('freq'))
+        swp_pars.remove('freq')
         vload_idx = swp_pars.index('vload')
-        vload_vec = results['vload']
-        for idx in range(vload_vec.size):
-            outac = np.take(data, idx, axis=vload_idx)
-            gain, f3db = compute_gain_and_w3db(results['freq'], outac)
-            gain_mat[fg_idx, idx] = gain
-            bw_mat[fg_idx, idx] = f3db
+        gain_mat[fg_idx, :] = np.moveaxis(metrics['gain'], vload_idx, 0)
+        bw_mat[fg_idx, :] = np.moveaxis(metrics['f3db'], vload_idx, 0)
 
     plot_mat(1, '$A_v$ (V/V)', gain_mat, fg_load_list, vload_list)
     plot_mat(2, '$f_{3db}$ (Hz)', bw_mat, fg_load_list, vload_list)
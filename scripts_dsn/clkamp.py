@@ -11,7 +11,8 @@ def characterize_linearity(prj):
     sim = ClkAmpChar(prj, specs_fname)
     sim.setup_linearity()
 
-    sim.create_designs(tb_type='tb_pss_dc', extract=False)
+    num_new = sim.create_designs(tb_type='tb_pss_dc', extract=False)
+    print('%d new sweep points.' % num_new)
 
 
 def load_sim_data(prj, tb_type):
@@ -13,23 +13,19 @@ from matplotlib import cm
 from matplotlib import ticker
 
 from bag.core import BagProject
-from bag.util.search import FloatBinaryIterator
-from bag.io.sim_data import load_sim_results, save_sim_results, load_sim_file
+from bag.io.sim_data import load_sim_results, save_sim_results
+
+from serdes_ec.simulation.gm_char import get_vstar, compute_gm_metrics
+from serdes_ec.simulation.sim_data import LazySimData
 
 
 def plot_vstar(result, tper, vdd, cload, bias_vec, ck_amp, rel_err, dc_params, vstar_params):
-    npts = bias_vec.size
-    vstar_vec = np.empty(npts)
-    gain_vec = np.empty(npts)
-    offset_vec = np.empty(npts)
-    voutcm_vec = np.empty(npts)
-    for idx, ck_bias in enumerate(bias_vec):
-        in_vec, out_vec, cm_vec = get_dc_tf(result, tper, ck_amp, ck_bias, **dc_params)
-        vstar, err, gain, offset = get_vstar(in_vec, out_vec, rel_err, **vstar_params)
-        voutcm_vec[idx] = vdd - (cm_vec[cm_vec.size // 2] / cload)
-        vstar_vec[idx] = vstar
-        gain_vec[idx] = gain / cload
-        offset_vec[idx] = offset / cload
+    metrics = compute_gm_metrics(result, tper, vdd, cload, ck_amp, bias_vec, rel_err,
+                                 dc_params=dc_params, vstar_params=vstar_params)
+    vstar_vec = metrics['vstar']
+    gain_vec = metrics['gain']
+    offset_vec = metrics['offset']
+    voutcm_vec = metrics['voutcm']
 
     bias_vec *= 1e3
     vstar_vec *= 1e3
@@ -53,32 +49,6 @@ def plot_vstar(result, tper, vdd, cload, bias_vec, ck_amp, rel_err, dc_params, v
     plt.show()
 
 
-def get_vstar(in_vec, out_vec, rel_err, tol=1e-3, num=21, method='cubic'):
-    fun = interp.interp1d(in_vec, out_vec, kind=method, copy=False, fill_value='extrapolate',
-                          assume_sorted=True)
-    mid_idx = in_vec.size // 2
-    vmin = in_vec[mid_idx + 1]
-    vmax = in_vec[-1]
-
-    bin_iter = FloatBinaryIterator(vmin, vmax, tol=tol)
-    while bin_iter.has_next():
-        vtest = bin_iter.get_next()
-
-        x_vec = np.linspace(-vtest, vtest, num, endpoint=True)
-        b_vec = fun(x_vec)
-        a_mat = np.column_stack((x_vec, np.ones(num)))
-        x, _, _, _ = np.linalg.lstsq(a_mat, b_vec)
-        rel_err_cur = np.amax(np.abs(np.dot(a_mat, x) - b_vec)) / (x[0] * vtest)
-
-        if rel_err_cur <= rel_err:
-            bin_iter.save_info((vtest, rel_err_cur, x[0], x[1]))
-            bin_iter.up()
-        else:
-            bin_iter.down()
-
-    return bin_iter.get_last_save_info()
-
-
 def get_dc_tf(result, tper, ck_amp, ck_bias, num_k=7, sim_env='tt', method='linear', plot=False):
     indm_vec = result['indm']
 
@@ -279,8 +249,10 @@ def run_main(prj):
 
     # simulate(prj, **sim_params)
 
-    result = load_sim_file(save_fname)
-    # plot_data_2d(result, 'ioutp', sim_env='tt')
+    # only read the simulated corner from file
+    with LazySimData(save_fname) as sim_data:
+        result = sim_data.select(corner=sim_env)
+    # plot_data_2d(result, 'ioutp')
     # get_transient(result, 15, tper, ck_amp, ck_bias, **kwargs)
     # get_dc_tf(result, tper, ck_amp, ck_bias, plot=True, **dc_params)
     plot_vstar(result, tper, vdd, cload, bias_vec, ck_amp, rel_err, dc_params, vstar_params)
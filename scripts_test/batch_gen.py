@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+from bag.core import BagProject
+
+from serdes_ec.layout.batch import generate_batch
+
+# layout classes of specification files without layout_package/layout_class entries.
+cls_table = {
+    'diffamp': 'serdes_ec.layout.analog.amplifier.DiffAmp',
+    'ctle': 'serdes_ec.layout.analog.passives.PassiveCTLE',
+    'term_rx': 'serdes_ec.layout.analog.passives.TermRX',
+    'integ_amp': 'serdes_ec.layout.qdr_hybrid.amp.IntegAmp',
+    'tap1_main': 'serdes_ec.layout.qdr_hybrid.amp.IntegAmp',
+    'sin_clk_divider': 'serdes_ec.layout.laygo.divider.SinClkDivider',
+    'tap1_summer': 'serdes_ec.layout.qdr_hybrid.tap1.Tap1Summer',
+    'tap1_column': 'serdes_ec.layout.qdr_hybrid.tap1.Tap1Column',
+    'tapx_summer': 'serdes_ec.layout.qdr_hybrid.tapx.TapXSummer',
+    'tapx_column': 'serdes_ec.layout.qdr_hybrid.tapx.TapXColumn',
+    'highpass_column': 'serdes_ec.layout.qdr_hybrid.offset.HighPassColumn',
+    'divider_column': 'serdes_ec.layout.qdr_hybrid.sampler.DividerColumn',
+    'retimer_column': 'serdes_ec.layout.qdr_hybrid.sampler.RetimerColumn',
+    'datapath': 'serdes_ec.layout.qdr_hybrid.datapath.RXDatapath',
+    'frontend': 'serdes_ec.layout.qdr_hybrid.top.RXFrontend',
+    'top': 'serdes_ec.layout.qdr_hybrid.top.RXTop',
+    'ser32': 'serdes_ec.layout.tx.ser.Serializer32',
+}
+
+
+if __name__ == '__main__':
+    local_dict = locals()
+    if 'bprj' not in local_dict:
+        print('creating BAG project')
+        bprj = BagProject()
+
+    else:
+        print('loading BAG project')
+        bprj = local_dict['bprj']
+
+    # analog_laygo.yaml and sin_clk_divider.yaml need layout information of other masters,
+    # see analog_laygo.py and qdr_hybrid/sin_clk_divider.py.  tap1_fb.yaml has no generator.
+    spec_list = ['specs_test_sample/qdr/integ_amp.yaml',
+                 'specs_test_sample/qdr/tap1_main.yaml',
+                 'specs_test_sample/qdr/tap1_summer.yaml',
+                 ]
+
+    generate_batch(bprj, spec_list, cls_table=cls_table, debug=True)
+    # generate_batch(bprj, spec_list, cls_table=cls_table, gen_sch=True, debug=True)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import yaml
+
+from bag.core import BagProject
+
+from serdes_ec.layout.analog.amplifier import DiffAmp
+from serdes_ec.layout.analog.passives import PassiveCTLE, TermRX
+from serdes_ec.layout.qdr_hybrid.tapx import TapXColumn
+from serdes_ec.layout.qdr_hybrid.tap1 import Tap1Column, Tap1Summer
+from serdes_ec.layout.qdr_hybrid.sampler import SamplerColumn
+from serdes_ec.layout.qdr_hybrid.datapath import RXDatapath
+from serdes_ec.layout.qdr_hybrid.top import RXTop
+from serdes_ec.layout.tx.ser import Serializer32
+from serdes_ec.layout.tx.datapath import TXDatapath
+from serdes_ec.layout.benchmark import (
+    LayoutBenchmark, read_baseline, write_baseline, format_results
+)
+
+root_dir = 'specs_test/serdes_ec'
+
+
+def get_sampler_specs(prj, specs):
+    info_fname = os.path.join(root_dir, 'qdr_hybrid', 'sampler_column_info.yaml')
+    if os.path.isfile(info_fname):
+        with open(info_fname, 'r') as f:
+            sampler_info = yaml.load(f)
+    else:
+        with open(os.path.join(root_dir, 'qdr_hybrid', 'tap1_summer.yaml'), 'r') as f:
+            sum_specs = yaml.load(f)
+
+        tdb = prj.make_template_db(sum_specs['impl_lib'], sum_specs['routing_grid'])
+        summer = tdb.new_template(params=sum_specs['params'], temp_cls=Tap1Summer)
+        sampler_info = dict(sum_row_info=summer.sum_row_info,
+                            lat_row_info=summer.lat_row_info,
+                            div_tr_info=summer.div_tr_info,
+                            sup_tids=summer.params['sup_tids'])
+
+    specs['params'].update(sampler_info)
+    return specs
+
+
+def run_main(prj, baseline_fname, names=None, threshold=0.2, repeat=1, update=False):
+    bench = LayoutBenchmark(prj, threshold=threshold, repeat=repeat)
+    bench.add('DiffAmp', os.path.join(root_dir, 'analog', 'diffamp.yaml'), DiffAmp)
+    bench.add('PassiveCTLE', os.path.join(root_dir, 'passives', 'ctle.yaml'), PassiveCTLE)
+    bench.add('TermRX', os.path.join(root_dir, 'passives', 'term_rx.yaml'), TermRX)
+    bench.add('TapXColumn', os.path.join(root_dir, 'qdr_hybrid', 'tapx_column.yaml'), TapXColumn)
+    bench.add('Tap1Column', os.path.join(root_dir, 'qdr_hybrid', 'tap1_column.yaml'), Tap1Column)
+    bench.add('SamplerColumn', os.path.join(root_dir, 'qdr_hybrid', 'sampler_column.yaml'),
+              SamplerColumn, specs_fn=get_sampler_specs)
+    bench.add('RXDatapath', os.path.join(root_dir, 'qdr_hybrid', 'datapath.yaml'), RXDatapath)
+    bench.add('RXTop', os.path.join(root_dir, 'qdr_hybrid', 'top.yaml'), RXTop)
+    bench.add('Serializer32', os.path.join(root_dir, 'tx', 'ser32.yaml'), Serializer32)
+    bench.add('TXDatapath', os.path.join(root_dir, 'tx', 'datapath.yaml'), TXDatapath)
+
+    baseline = read_baseline(baseline_fname)
+    results = bench.run(names=names)
+    print(format_results(results, baseline=baseline))
+
+    msg_list = bench.get_regressions(results, baseline)
+    for msg in msg_list:
+        print('REGRESSION: %s' % msg)
+
+    if update or not baseline:
+        print('writing baseline to %s' % baseline_fname)
+        write_baseline(baseline_fname, results, baseline=baseline)
+
+    return results, msg_list
+
+
+if __name__ == '__main__':
+    local_dict = locals()
+    if 'bprj' not in local_dict:
+        print('creating BAG project')
+        bprj = BagProject()
+
+    else:
+        print('loading BAG project')
+        bprj = local_dict['bprj']
+
+    run_main(bprj, 'benchmark_baseline.yaml')
+    # run_main(bprj, 'benchmark_baseline.yaml', names=['DiffAmp', 'TermRX'], repeat=3)
+    # run_main(bprj, 'benchmark_baseline.yaml', update=True)
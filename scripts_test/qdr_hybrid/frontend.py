@@ -5,6 +5,7 @@ import yaml
 from bag.core import BagProject
 
 from serdes_ec.layout.qdr_hybrid.top import RXFrontend
+from serdes_ec.layout.profile import profile_layout
 
 
 if __name__ == '__main__':
@@ -21,4 +22,7 @@ if __name__ == '__main__':
         bprj = local_dict['bprj']
 
     # bprj.generate_cell(block_specs, RXFrontend, debug=True)
-    bprj.generate_cell(block_specs, RXFrontend, gen_lay=False, gen_sch=True, debug=True)
+    # set to a file name to write the layout generation timing tree
+    profile_fname = ''
+    with profile_layout(profile_fname):
+        bprj.generate_cell(block_specs, RXFrontend, gen_lay=False, gen_sch=True, debug=True)
@@ -8,9 +8,10 @@ from bag.core import BagProject
 
 from serdes_ec.layout.qdr_hybrid.tap1 import Tap1Summer
 from serdes_ec.layout.qdr_hybrid.sampler import SamplerColumn
+from serdes_ec.layout.profile import profile_layout
 
 
-def run_main(prj):
+def run_main(prj, profile_fname=''):
     root_name = 'specs_test/serdes_ec/qdr_hybrid'
     test_fname = os.path.join(root_name, 'sampler_column_info.yaml')
     if not os.path.isfile(test_fname):
@@ -38,7 +39,8 @@ def run_main(prj):
 
     samp_specs['params'].update(sampler_info)
 
-    prj.generate_cell(samp_specs, SamplerColumn, debug=True)
+    with profile_layout(profile_fname):
+        prj.generate_cell(samp_specs, SamplerColumn, debug=True)
     # prj.generate_cell(samp_specs, SamplerColumn, gen_sch=True, debug=True)
 
 
@@ -5,6 +5,7 @@ import yaml
 from bag.core import BagProject
 
 from serdes_ec.layout.qdr_hybrid.tapx import TapXColumn
+from serdes_ec.layout.profile import profile_layout
 
 
 if __name__ == '__main__':
@@ -20,5 +21,8 @@ if __name__ == '__main__':
         print('loading BAG project')
         bprj = local_dict['bprj']
 
-    bprj.generate_cell(block_specs, TapXColumn, debug=True)
+    # set to a file name to write the layout generation timing tree
+    profile_fname = ''
+    with profile_layout(profile_fname):
+        bprj.generate_cell(block_specs, TapXColumn, debug=True)
     # bprj.generate_cell(block_specs, TapXColumn, gen_sch=True, debug=True)
@@ -4,7 +4,26 @@ import yaml
 
 from bag.core import BagProject
 
+from serdes_ec.layout.cache import leaf_master_cache
+from serdes_ec.layout.laygo.divider import DividerGroup
+from serdes_ec.layout.qdr_hybrid.amp import IntegAmp
+from serdes_ec.layout.qdr_hybrid.datapath import RXDatapath
+from serdes_ec.layout.qdr_hybrid.tap1 import Tap1Column
+from serdes_ec.layout.qdr_hybrid.tapx import TapXColumn
 from serdes_ec.layout.qdr_hybrid.top import RXTop
+from serdes_ec.layout.profile import profile_layout
+
+
+def get_floorplan(prj, specs):
+    impl_lib = specs['impl_lib']
+    grid_specs = specs['routing_grid']
+    params = specs['params'].copy()
+    params['floorplan_only'] = True
+
+    tdb = prj.make_template_db(impl_lib, grid_specs)
+    master = tdb.new_template(params=params, temp_cls=RXTop)
+    return master.floorplan
+
 
 if __name__ == '__main__':
     with open('specs_test/serdes_ec/qdr_hybrid/top.yaml', 'r') as f:
@@ -19,9 +38,24 @@ if __name__ == '__main__':
         print('loading BAG project')
         bprj = local_dict['bprj']
 
+    # floorplan = get_floorplan(bprj, block_specs)
     # bprj.generate_cell(block_specs, RXTop, debug=True, save_cache=True)
     # bprj.generate_cell(block_specs, RXTop, debug=True, use_cache=True)
-    bprj.generate_cell(block_specs, RXTop, debug=True)
+    # set to a file name to write the layout generation timing tree
+    profile_fname = ''
+    # set to a directory to reuse amplifier and divider layouts between runs.  Missing divider
+    # layouts are then generated in parallel worker processes.
+    cache_dir = ''
+    # True to also reuse datapath columns whose parameter reads are unchanged
+    incremental = False
+    cache_classes = [IntegAmp, DividerGroup]
+    if incremental:
+        cache_classes.extend([TapXColumn, Tap1Column, RXDatapath])
+    with leaf_master_cache(cache_dir, cache_classes, incremental=incremental) as cache, \
+            profile_layout(profile_fname):
+        bprj.generate_cell(block_specs, RXTop, debug=True)
+    if cache is not None:
+        print('master cache: %d hits, %d misses' % (cache.stats['hits'], cache.stats['misses']))
     # bprj.generate_cell(block_specs, RXTop, gen_sch=True, debug=True)
     # bprj.generate_cell(block_specs, RXTop, gen_lay=False, gen_sch=True, debug=True)
     # bprj.generate_cell(block_specs, RXTop, gen_lay=False, gen_sch=True, debug=True, prefix='qdr_')
@@ -3,6 +3,9 @@
 from typing import TYPE_CHECKING, Optional, Dict, Any, Set, Tuple, List, Union
 
 import abc
+from collections import OrderedDict
+
+import numpy as np
 
 from bag.layout.routing import TrackManager
 
@@ -42,10 +45,44 @@ class SerdesRXBaseInfo(AnalogBaseInfo):
         number of fingers in a row.
     """
 
+    # LRU cache of get_diffamp_info() results, shared by all instances.
+    _diffamp_cache = OrderedDict()  # type: OrderedDict
+    _diffamp_cache_size = 4096
+    _diffamp_cache_stats = dict(hits=0, misses=0)
+
     def __init__(self, grid, lch, guard_ring_nf, top_layer=None, end_mode=15, min_fg_sep=0, fg_tot=None):
         # type: (RoutingGrid, float, int, Optional[int], int, int, Optional[int]) -> None
         AnalogBaseInfo.__init__(self, grid, lch, guard_ring_nf, top_layer=top_layer,
                                 end_mode=end_mode, min_fg_sep=min_fg_sep, fg_tot=fg_tot)
+        self._lch = lch
+
+    @classmethod
+    def get_diffamp_cache_info(cls):
+        # type: () -> Dict[str, int]
+        """Returns get_diffamp_info() cache statistics.
+
+        Returns
+        -------
+        cache_info : Dict[str, int]
+            dictionary with hits, misses, size, and max_size entries.
+        """
+        return dict(hits=cls._diffamp_cache_stats['hits'], misses=cls._diffamp_cache_stats['misses'],
+                    size=len(cls._diffamp_cache), max_size=cls._diffamp_cache_size)
+
+    @classmethod
+    def clear_diffamp_cache(cls, max_size=None):
+        # type: (Optional[int]) -> None
+        """Clear get_diffamp_info() cache and statistics.
+
+        Parameters
+        ----------
+        max_size : Optional[int]
+            If not None, the new maximum number of cache entries.
+        """
+        cls._diffamp_cache.clear()
+        cls._diffamp_cache_stats['hits'] = cls._diffamp_cache_stats['misses'] = 0
+        if max_size is not None:
+            cls._diffamp_cache_size = max_size
 
     def _get_diffamp_tran_info(self, seg_dict, fg_center, flip_out_sd):
         # type: (Dict[str, int], int, bool) -> Tuple[Dict[str, Tuple[Union[int, str]]], bool]
@@ -150,7 +187,9 @@ class SerdesRXBaseInfo(AnalogBaseInfo):
         # type: (Dict[str, int], int, int, bool) -> Dict[str, Any]
         """Return DiffAmp layout information dictionary.
 
-        This method computes layout information of a differential amplifier.
+        This method computes layout information of a differential amplifier.  Results are
+        cached, keyed on the input arguments and the technology parameters used in the
+        computation.
 
         Parameters
         ----------
@@ -187,6 +226,59 @@ class SerdesRXBaseInfo(AnalogBaseInfo):
             tran_info : Dict[str, Any]
                 transistor row layout information dictionary.
         """
+        key = (self.__class__, self._lch, self.min_fg_sep, self.abut_analog_mos,
+               frozenset(seg_dict.items()), fg_min, fg_dum, flip_out_sd)
+        cache = self._diffamp_cache
+        stats = self._diffamp_cache_stats
+        info = cache.get(key, None)
+        if info is None:
+            stats['misses'] += 1
+            info = self._compute_diffamp_info(seg_dict, fg_min, fg_dum, flip_out_sd)
+            cache[key] = info
+            if len(cache) > self._diffamp_cache_size:
+                cache.popitem(last=False)
+        else:
+            stats['hits'] += 1
+            cache.move_to_end(key)
+
+        # return a copy so callers cannot modify cached values
+        ans = info.copy()
+        ans['tran_info'] = info['tran_info'].copy()
+        return ans
+
+    def get_diffamp_info_array(self, seg_list, fg_min=0, fg_dum=0, flip_out_sd=False):
+        # type: (List[Dict[str, int]], int, int, bool) -> Tuple[np.ndarray, np.ndarray]
+        """Compute DiffAmp total and single-sided number of fingers for a list of segment dictionaries.
+
+        Parameters
+        ----------
+        seg_list : List[Dict[str, int]]
+            list of segment dictionaries.
+        fg_min : int
+            minimum number of total fingers.
+        fg_dum : int
+            minimum single-sided number of dummy fingers.
+        flip_out_sd : bool
+            True to draw output on source instead of drain.
+
+        Returns
+        -------
+        fg_tot : np.ndarray
+            array of total number of fingers.
+        fg_single : np.ndarray
+            array of single-sided number of fingers.
+        """
+        num = len(seg_list)
+        fg_tot = np.empty(num, dtype=int)
+        fg_single = np.empty(num, dtype=int)
+        for idx, seg_dict in enumerate(seg_list):
+            info = self.get_diffamp_info(seg_dict, fg_min=fg_min, fg_dum=fg_dum, flip_out_sd=flip_out_sd)
+            fg_tot[idx] = info['fg_tot']
+            fg_single[idx] = info['fg_single']
+        return fg_tot, fg_single
+
+    def _compute_diffamp_info(self, seg_dict, fg_min, fg_dum, flip_out_sd):
+        # type: (Dict[str, int], int, int, bool) -> Dict[str, Any]
         # error checking
         for cap_name in ('tail_cap', 'load_cap'):
             seg_cur = seg_dict.get(cap_name, 0)
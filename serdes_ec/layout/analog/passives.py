@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 
-from typing import TYPE_CHECKING, Dict, Set, Any, List, Union
+from typing import TYPE_CHECKING, Dict, Set, Any, List, Union, Tuple
 
 from itertools import chain, repeat
 
@@ -15,10 +15,68 @@ from abs_templates_ec.analog_mos.mos import DummyFillActive
 from analog_ec.layout.passives.capacitor.momcap import MOMCapCore
 from analog_ec.layout.passives.substrate import SubstrateWrapper
 
+from ..cache import get_grid_key, get_params_key
+from ..fill import FillBuilder, get_wire_blockages
+
 if TYPE_CHECKING:
+    from bag.layout.routing import WireArray, RoutingGrid
     from bag.layout.template import TemplateDB
 
 
+class ResPortTable(object):
+    """Lazy resistor port and routing track lookups of a resistor array.
+
+    Resistor ports are looked up with get_res_ports() the first time they are used, and
+    nearest track lookups are memoized.  Same-net wires on the same track can be collected
+    with add_wires() and drawn with one connect_wires() call per key in connect_pending().
+
+    Parameters
+    ----------
+    template : ResArrayBase
+        the resistor array template.
+    """
+
+    def __init__(self, template):
+        # type: (ResArrayBase) -> None
+        self._template = template
+        self._ports = {}  # type: Dict[Tuple[int, int], Tuple[WireArray, WireArray]]
+        self._tracks = {}  # type: Dict[Tuple[int, int, int], Union[float, int]]
+        self._pending = {}  # type: Dict[Any, List[WireArray]]
+
+    def get_ports(self, row, col):
+        # type: (int, int) -> Tuple[WireArray, WireArray]
+        """Returns the (bottom, top) ports of the given resistor."""
+        key = (row, col)
+        ports = self._ports.get(key, None)
+        if ports is None:
+            ports = self._ports[key] = self._template.get_res_ports(row, col)
+        return ports
+
+    def get_next_track_id(self, warr, mode, width=1):
+        # type: (WireArray, int, int) -> TrackID
+        """Returns the track on the next layer up nearest to the middle of the given wire."""
+        next_layer = warr.layer_id + 1
+        coord = warr.middle_unit
+        key = (next_layer, coord, mode)
+        tr_idx = self._tracks.get(key, None)
+        if tr_idx is None:
+            tr_idx = self._tracks[key] = self._template.grid.coord_to_nearest_track(
+                next_layer, coord, half_track=True, mode=mode, unit_mode=True)
+        return TrackID(next_layer, tr_idx, width=width)
+
+    def add_wires(self, key, warr_list):
+        # type: (Any, List[WireArray]) -> None
+        """Collect wires to connect.  Wires with the same key must share the same extent."""
+        self._pending.setdefault(key, []).extend(warr_list)
+
+    def connect_pending(self):
+        # type: () -> None
+        """Connect the collected wires, one connect_wires() call per key."""
+        for warr_list in self._pending.values():
+            self._template.connect_wires(warr_list)
+        self._pending.clear()
+
+
 class PassiveCTLECore(ResArrayBase):
     """Passive CTLE Core.
 
@@ -137,8 +195,10 @@ class PassiveCTLECore(ResArrayBase):
 
         vm_w_io = tr_manager.get_width(vm_layer, 'ctle')
         sup_name = 'VDD' if sub_type == 'ntap' else 'VSS'
-        supt, supb = self._connect_dummies(num_col, num_r1, num_r2, num_dumr, num_dumc)
-        tmp = self._connect_snake(num_col, num_r1, num_r2, num_dumr, num_dumc, vm_w_io, show_pins)
+        ports = ResPortTable(self)
+        supt, supb = self._connect_dummies(ports, num_col, num_r1, num_r2, num_dumr, num_dumc)
+        tmp = self._connect_snake(ports, num_col, num_r1, num_r2, num_dumr, num_dumc, vm_w_io,
+                                  show_pins)
         inp, inn, outp, outn, outcm, outp_yt, outn_yb = tmp
 
         # calculate capacitor bounding box
@@ -206,31 +266,32 @@ class PassiveCTLECore(ResArrayBase):
             sub_name='VSS',
         )
 
-    def _connect_snake(self, ncol, nr1, nr2, ndumr, ndumc, io_width, show_pins):
+    def _connect_snake(self, ports, ncol, nr1, nr2, ndumr, ndumc, io_width, show_pins):
         nrow_half = max(nr1, nr2) + ndumr
         for cidx in range(ncol):
             c1 = ndumc + cidx
             c2 = c1 + ncol
             # connect in same column
             for idx in range(1, nr1):
-                self._connect_mirror(nrow_half, (idx - 1, c1), (idx, c1), 1, 0)
+                self._connect_mirror(ports, nrow_half, (idx - 1, c1), (idx, c1), 1, 0)
             for idx in range(1, nr2):
-                self._connect_mirror(nrow_half, (idx - 1, c2), (idx, c2), 1, 0)
+                self._connect_mirror(ports, nrow_half, (idx - 1, c2), (idx, c2), 1, 0)
             # connect adjacent columns
             if cidx != ncol - 1:
                 if cidx % 2 == 0:
-                    self._connect_mirror(nrow_half, (nr1 - 1, c1), (nr1 - 1, c1 + 1), 1, 1)
-                    self._connect_mirror(nrow_half, (nr2 - 1, c2), (nr2 - 1, c2 + 1), 1, 1)
+                    self._connect_mirror(ports, nrow_half, (nr1 - 1, c1), (nr1 - 1, c1 + 1), 1, 1)
+                    self._connect_mirror(ports, nrow_half, (nr2 - 1, c2), (nr2 - 1, c2 + 1), 1, 1)
                 else:
-                    self._connect_mirror(nrow_half, (0, c1), (0, c1 + 1), 0, 0)
-                    self._connect_mirror(nrow_half, (0, c2), (0, c2 + 1), 0, 0)
+                    self._connect_mirror(ports, nrow_half, (0, c1), (0, c1 + 1), 0, 0)
+                    self._connect_mirror(ports, nrow_half, (0, c2), (0, c2 + 1), 0, 0)
+        ports.connect_pending()
 
         # connect outp/outn
-        outpl = self.get_res_ports(nrow_half, ndumc + ncol - 1)[0]
-        outpr = self.get_res_ports(nrow_half, ndumc + ncol)[0]
+        outpl = ports.get_ports(nrow_half, ndumc + ncol - 1)[0]
+        outpr = ports.get_ports(nrow_half, ndumc + ncol)[0]
         outp = self.connect_wires([outpl, outpr])[0]
-        outnl = self.get_res_ports(nrow_half - 1, ndumc + ncol - 1)[1]
-        outnr = self.get_res_ports(nrow_half - 1, ndumc + ncol)[1]
+        outnl = ports.get_ports(nrow_half - 1, ndumc + ncol - 1)[1]
+        outnr = ports.get_ports(nrow_half - 1, ndumc + ncol)[1]
         outn = self.connect_wires([outnl, outnr])[0]
         outp_yt = outp.track_id.get_bounds(self.grid, unit_mode=True)[1]
         outn_yb = outn.track_id.get_bounds(self.grid, unit_mode=True)[0]
@@ -242,17 +303,17 @@ class PassiveCTLECore(ResArrayBase):
         outn = self.connect_to_tracks(outn, vm_tid, min_len_mode=-1)
 
         # connect inp/inn
-        inp = self.get_res_ports(nrow_half, ndumc)[0]
-        inn = self.get_res_ports(nrow_half - 1, ndumc)[1]
-        mid = (self.get_res_ports(nrow_half, ndumc - 1)[0].middle + inp.middle) / 2
+        inp = ports.get_ports(nrow_half, ndumc)[0]
+        inn = ports.get_ports(nrow_half - 1, ndumc)[1]
+        mid = (ports.get_ports(nrow_half, ndumc - 1)[0].middle + inp.middle) / 2
         vm_tr = self.grid.coord_to_nearest_track(vm_layer, mid, half_track=True)
         vm_tid = TrackID(vm_layer, vm_tr, width=io_width)
         inp = self.connect_to_tracks(inp, vm_tid, min_len_mode=1)
         inn = self.connect_to_tracks(inn, vm_tid, min_len_mode=-1)
 
         # connect outcm
-        cmp = self.get_res_ports(nrow_half, ndumc + 2 * ncol - 1)[0]
-        cmn = self.get_res_ports(nrow_half - 1, ndumc + 2 * ncol - 1)[1]
+        cmp = ports.get_ports(nrow_half, ndumc + 2 * ncol - 1)[0]
+        cmn = ports.get_ports(nrow_half - 1, ndumc + 2 * ncol - 1)[1]
         vm_tr = self.grid.coord_to_nearest_track(vm_layer, cmp.middle, half_track=True)
         vm_tid = TrackID(vm_layer, vm_tr, width=io_width)
         outcm_v = self.connect_to_tracks([cmp, cmn], vm_tid)
@@ -264,7 +325,7 @@ class PassiveCTLECore(ResArrayBase):
 
         return inp, inn, outp, outn, outcm_v, outp_yt, outn_yb
 
-    def _connect_mirror(self, offset, loc1, loc2, port1, port2):
+    def _connect_mirror(self, ports, offset, loc1, loc2, port1, port2):
         r1, c1 = loc1
         r2, c2 = loc2
         for sgn in (-1, 1):
@@ -279,18 +340,20 @@ class PassiveCTLECore(ResArrayBase):
             else:
                 cur_port1 = port1
                 cur_port2 = port2
-            wa1 = self.get_res_ports(cur_r1, c1)[cur_port1]
-            wa2 = self.get_res_ports(cur_r2, c2)[cur_port2]
+            wa1 = ports.get_ports(cur_r1, c1)[cur_port1]
+            wa2 = ports.get_ports(cur_r2, c2)[cur_port2]
             if wa1.track_id.base_index == wa2.track_id.base_index:
-                self.connect_wires([wa1, wa2])
+                if c1 == c2:
+                    # ports in the same column have the same extent, so all same-track
+                    # connections in a column are drawn with a single connect_wires() call.
+                    ports.add_wires(c1, [wa1, wa2])
+                else:
+                    self.connect_wires([wa1, wa2])
             else:
                 mode = -1 if c1 % 2 == 0 else 1
-                vm_layer = wa1.layer_id + 1
-                vm = self.grid.coord_to_nearest_track(vm_layer, wa1.middle_unit, mode=mode,
-                                                      half_track=True, unit_mode=True)
-                self.connect_to_tracks([wa1, wa2], TrackID(vm_layer, vm))
+                self.connect_to_tracks([wa1, wa2], ports.get_next_track_id(wa1, mode))
 
-    def _connect_dummies(self, ncol, nr1, nr2, ndumr, ndumc):
+    def _connect_dummies(self, ports, ncol, nr1, nr2, ndumr, ndumc):
         res_num_iter = chain(repeat(0, ndumc), repeat(nr1, ncol), repeat(nr2, ncol),
                              repeat(0, ndumc))
         nrow_half = max(nr1, nr2) + ndumr
@@ -308,13 +371,9 @@ class PassiveCTLECore(ResArrayBase):
                 top_idx = bot_idx + cur_ndum
                 warr_list = []
                 for ridx in range(bot_idx, top_idx):
-                    bp, tp = self.get_res_ports(ridx, col_idx)
-                    warr_list.append(bp)
-                    warr_list.append(tp)
-                vm_layer = warr_list[0].layer_id + 1
-                vm = self.grid.coord_to_nearest_track(vm_layer, warr_list[0].middle_unit, mode=mode,
-                                                      half_track=True, unit_mode=True)
-                sup_warr = self.connect_to_tracks(warr_list, TrackID(vm_layer, vm))
+                    warr_list.extend(ports.get_ports(ridx, col_idx))
+                sup_warr = self.connect_to_tracks(warr_list,
+                                                  ports.get_next_track_id(warr_list[0], mode))
                 if bot_idx == 0:
                     bot_warrs.append(sup_warr)
                 if bot_idx != 0 or res_num == 0:
@@ -499,10 +558,11 @@ class CMLResLoadCore(ResArrayBase):
                         options=my_options, connect_up=True, half_blk_x=half_blk_x)
 
         # for each resistor, bring it to ym_layer
+        ports = ResPortTable(self)
         for idx in range(nx_tot):
-            bot, top = self.get_res_ports(0, idx)
-            bot = self._export_to_ym(bot, bot_layer)
-            top = self._export_to_ym(top, bot_layer)
+            bot, top = ports.get_ports(0, idx)
+            bot = self._export_to_ym(ports, bot)
+            top = self._export_to_ym(ports, top)
             if ndum <= idx < nx_tot - ndum:
                 self.add_pin('bot<%d>' % (idx - ndum), bot, show=show_pins)
                 self.add_pin('top<%d>' % (idx - ndum), top, show=show_pins)
@@ -518,14 +578,12 @@ class CMLResLoadCore(ResArrayBase):
             sub_name='VSS',
         )
 
-    def _export_to_ym(self, port, bot_layer):
+    def _export_to_ym(self, ports, port):
+        # top and bottom ports of a resistor share the vertical tracks, and all ports share the
+        # horizontal tracks, so the track lookups are memoized in the port table.
         warr = port
         for off in range(1, 4):
-            next_layer = bot_layer + off
-            next_width = self.w_tracks[off]
-            next_tr = self.grid.coord_to_nearest_track(next_layer, warr.middle_unit,
-                                                       half_track=True, mode=0, unit_mode=True)
-            tid = TrackID(next_layer, next_tr, width=next_width)
+            tid = ports.get_next_track_id(warr, 0, width=self.w_tracks[off])
             warr = self.connect_to_tracks(warr, tid, min_len_mode=0)
 
         return warr
@@ -549,6 +607,10 @@ class CMLResLoad(SubstrateWrapper):
         :class:`bag.layout.template.TemplateBase` for details.
     """
 
+    # solved connect_up_layers() via stacks, keyed on the routing grid configuration and the
+    # via stack inputs.
+    _up_plan_table = {}  # type: Dict[Tuple[Any, ...], Tuple[Tuple[int, int], ...]]
+
     def __init__(self, temp_db, lib_name, params, used_names, **kwargs):
         # type: (TemplateDB, str, Dict[str, Any], Set[str], **Any) -> None
         SubstrateWrapper.__init__(self, temp_db, lib_name, params, used_names, **kwargs)
@@ -633,31 +695,83 @@ class CMLResLoad(SubstrateWrapper):
             self.add_pin(sub_port_name, warrs, show=show_pins)
             self.reexport(inst.get_port('bot<%d>' % idx), net_name='out', show=show_pins)
 
+    @classmethod
+    def get_up_layers_plan(cls, grid, cur_layer, cur_tr_w, top_layer, em_specs, nout):
+        # type: (RoutingGrid, int, int, int, Dict[str, Any], int) -> Tuple[Tuple[int, int], ...]
+        """Returns the via stack used by connect_up_layers().
+
+        The track widths satisfying the EM specs only depend on the arguments, the routing
+        grid configuration, and the technology EM rules, so solved plans are recorded in a
+        class-level table keyed on the arguments and get_grid_key(), which covers the grid and
+        the technology class.  Plans are shared by all generators using the same grid.  The
+        plan is a tuple of (layer ID, track width) pairs, which can be passed to
+        connect_up_layers() so that several wire groups use the same via stack.
+
+        Parameters
+        ----------
+        grid : RoutingGrid
+            the routing grid.
+        cur_layer : int
+            the starting layer ID.
+        cur_tr_w : int
+            the starting track width.
+        top_layer : int
+            the top layer ID.
+        em_specs : Dict[str, Any]
+            the EM specifications of a single output.
+        nout : int
+            number of outputs merged on the top layer.
+
+        Returns
+        -------
+        plan : Tuple[Tuple[int, int], ...]
+            the layer ID and track width of each layer above cur_layer.
+        """
+        key = (get_grid_key(grid), cur_layer, cur_tr_w, top_layer, nout,
+               get_params_key(em_specs))
+        table = cls._up_plan_table
+        plan = table.get(key, None)
+        if plan is None:
+            plan = []
+            cur_w = grid.get_track_width(cur_layer, cur_tr_w, unit_mode=True)
+            for next_layer in range(cur_layer + 1, top_layer + 1):
+                if next_layer == top_layer:
+                    next_em_specs = em_specs.copy()
+                    for key_name in ['idc', 'iac_rms', 'iac_peak']:
+                        if key_name in next_em_specs:
+                            next_em_specs[key_name] *= nout
+                    bot_w = top_w = -1
+                else:
+                    next_em_specs = em_specs
+                    top_tr_w = grid.get_min_track_width(next_layer + 1, **next_em_specs)
+                    top_w = grid.get_track_width(next_layer + 1, top_tr_w, unit_mode=True)
+                    bot_w = cur_w
+
+                next_tr_w = grid.get_min_track_width(next_layer, bot_w=bot_w, top_w=top_w,
+                                                     unit_mode=True, **next_em_specs)
+                plan.append((next_layer, next_tr_w))
+                cur_w = grid.get_track_width(next_layer, next_tr_w, unit_mode=True)
+            plan = table[key] = tuple(plan)
+
+        return plan
+
     @classmethod
     def connect_up_layers(cls, template, cur_layer, cur_warrs, xc_list, top_layer, em_specs,
-                          v_mode=1):
-        """Connect up layers while satisfying EM specs"""
+                          v_mode=1, plan=None, warr_list=None):
+        """Connect up layers while satisfying EM specs.
+
+        If plan is given, it is used as the via stack instead of the result of
+        get_up_layers_plan().  If warr_list is given, the wires drawn on every layer are
+        appended to it.
+        """
         grid = template.grid
 
-        cur_tr_w = cur_warrs[0].width
-        cur_w = grid.get_track_width(cur_layer, cur_tr_w, unit_mode=True)
         nout = len(xc_list)
         mid_idx = nout // 2
-        for next_layer in range(cur_layer + 1, top_layer + 1):
-            if next_layer == top_layer:
-                next_em_specs = em_specs.copy()
-                for key in ['idc', 'iac_rms', 'iac_peak']:
-                    if key in next_em_specs:
-                        next_em_specs[key] *= nout
-                bot_w = top_w = -1
-            else:
-                next_em_specs = em_specs
-                top_tr_w = grid.get_min_track_width(next_layer + 1, **next_em_specs)
-                top_w = grid.get_track_width(next_layer + 1, top_tr_w, unit_mode=True)
-                bot_w = cur_w
-
-            next_tr_w = grid.get_min_track_width(next_layer, bot_w=bot_w, top_w=top_w,
-                                                 unit_mode=True, **next_em_specs)
+        if plan is None:
+            plan = cls.get_up_layers_plan(grid, cur_layer, cur_warrs[0].width, top_layer,
+                                          em_specs, nout)
+        for next_layer, next_tr_w in plan:
             next_warrs = []
             if len(cur_warrs) == 1:
                 for idx, xc in enumerate(xc_list):
@@ -674,7 +788,8 @@ class CMLResLoad(SubstrateWrapper):
                 next_warrs.append(template.connect_to_tracks(cur_warrs, tid, min_len_mode=0))
 
             cur_warrs = next_warrs
-            cur_w = grid.get_track_width(next_layer, next_tr_w, unit_mode=True)
+            if warr_list is not None:
+                warr_list.extend(cur_warrs)
 
         return cur_warrs
 
@@ -719,6 +834,7 @@ class TermRXSingle(TemplateBase):
             top_layer='top level layer',
             fill_config='fill configuration dictionary.',
             show_pins='True to draw pins.',
+            floorplan_only='True to only place instances, without routing or fill.',
         )
 
     @classmethod
@@ -728,6 +844,7 @@ class TermRXSingle(TemplateBase):
             cap_out_tid=None,
             em_specs=None,
             show_pins=True,
+            floorplan_only=False,
         )
 
     def draw_layout(self):
@@ -736,10 +853,16 @@ class TermRXSingle(TemplateBase):
         top_layer = self.params['top_layer']
         fill_config = self.params['fill_config']
         show_pins = self.params['show_pins']
+        floorplan_only = self.params['floorplan_only']
 
         res = self.grid.resolution
 
         master_res, master_esd, master_cap, dum_params = self._make_masters()
+        self._sch_params = dict(
+            esd_params=master_esd.sch_params,
+            res_params=master_res.sch_params,
+            cap_params=master_cap.sch_params,
+        )
 
         # compute placement
         box_res = master_res.bound_box
@@ -771,42 +894,57 @@ class TermRXSingle(TemplateBase):
         self.set_size_from_bound_box(top_layer, tot_box, round_up=True)
         self.add_cell_boundary(tot_box)
 
+        if floorplan_only:
+            return
+
         # connect input
         xc_list = [xc + x_res for xc in master_res.out_xc_list]
-        self._connect_input(top_layer, xc_list, inst_esd, inst_res, inst_cap, em_specs, show_pins)
+        warr_list = self._connect_input(top_layer, xc_list, inst_esd, inst_res, inst_cap,
+                                        em_specs, show_pins)
 
         # get supplies
         vss_res = inst_res.get_all_port_pins('VSS')
-        self.extend_wires(vss_res, lower=0, unit_mode=True)
+        warr_list.extend(self.extend_wires(vss_res, lower=0, unit_mode=True))
         vss = inst_esd.get_all_port_pins('VSS')
         vss.append(self.connect_to_track_wires(vss_res, inst_esd.get_pin('VSS_out')))
         vdd = inst_esd.get_all_port_pins('VDD')
+        warr_list.extend(vss)
+        warr_list.extend(vdd)
 
         self.add_pin('VSS', vss, show=show_pins)
         self.add_pin('VDD', vdd, show=show_pins)
 
-        # draw dummy fill
+        # draw dummy fill.  Fill tiles must avoid every wire drawn in this template.
         fill_top_layer = vdd[0].layer_id
-        self._fill_dummy(top_layer, fill_top_layer, tot_box, inst_res, inst_cap, dum_params)
+        blockages = [inst_esd.bound_box, inst_res.bound_box, inst_cap.bound_box]
+        blockages.extend(get_wire_blockages(self.grid, warr_list, 2, fill_top_layer))
+        self._fill_dummy(top_layer, fill_top_layer, tot_box, inst_res, inst_cap, dum_params,
+                         blockages)
 
-        self._sch_params = dict(
-            esd_params=master_esd.sch_params,
-            res_params=master_res.sch_params,
-            cap_params=master_cap.sch_params,
-        )
-
-    def _fill_dummy(self, top_layer, fill_top_layer, tot_box, inst_res, inst_cap, dum_params):
+    def _fill_dummy(self, top_layer, fill_top_layer, tot_box, inst_res, inst_cap, dum_params,
+                    blockages):
         res = self.grid.resolution
 
         box_res = inst_res.bound_box
         box_cap = inst_cap.bound_box
 
-        # fill empty space
+        # fill empty space.  Both regions share the same space fill tile master.
         yt = tot_box.top_unit
+        builder = FillBuilder(self)
         for box in (box_res, box_cap):
             if box.top_unit < yt:
                 cur_box = BBox(box.left_unit, box.top_unit, box.right_unit, yt, res, unit_mode=True)
-                self._fill_space(cur_box, dum_params, fill_top_layer)
+                dum_params['width'] = cur_box.width_unit
+                dum_params['height'] = cur_box.height_unit
+                master_dum = self.new_template(params=dum_params, temp_cls=DummyFillActive)
+                self.add_instance(master_dum, loc=(cur_box.left_unit, cur_box.bottom_unit),
+                                  unit_mode=True)
+                # layer 1 is filled in place to avoid the dummy transistor connections
+                self.do_max_space_fill(1, cur_box, fill_pitch=2)
+                if fill_top_layer > 1:
+                    builder.add_space_fill(2, fill_top_layer, cur_box, fill_pitch=2,
+                                           blockages=blockages)
+        builder.draw_track_fill()
 
         # fill resistor
         for lay in range(inst_res.master.top_layer, fill_top_layer + 1):
@@ -816,31 +954,23 @@ class TermRXSingle(TemplateBase):
         for lay in range(inst_cap.master.top_layer, top_layer):
             self.do_max_space_fill(lay, box_cap, fill_pitch=2)
 
-    def _fill_space(self, fill_box, dum_params, fill_top_layer):
-        dum_params['width'] = fill_box.width_unit
-        dum_params['height'] = fill_box.height_unit
-
-        master_dum = self.new_template(params=dum_params, temp_cls=DummyFillActive)
-        self.add_instance(master_dum, loc=(fill_box.left_unit, fill_box.bottom_unit),
-                          unit_mode=True)
-        for lay_id in range(1, fill_top_layer + 1):
-            self.do_max_space_fill(lay_id, fill_box, fill_pitch=2)
-
     def _connect_input(self, top_layer, xc_list, inst_esd, inst_res, inst_cap, em_specs, show_pins):
         cur_warrs = self.connect_wires([inst_esd.get_pin('in'), inst_cap.get_pin('plus')])
         in_warr = cur_warrs[0]
         res_pins = inst_res.get_all_port_pins('out')
-        self.connect_to_track_wires(res_pins, in_warr)
+        warr_list = [self.connect_to_track_wires(res_pins, in_warr)]
 
         cur_layer = in_warr.layer_id
         if in_warr.layer_id < top_layer:
             # connect up layers.
             cur_warrs = CMLResLoad.connect_up_layers(self, cur_layer, cur_warrs, xc_list,
-                                                     top_layer, em_specs)
+                                                     top_layer, em_specs, warr_list=warr_list)
 
         self.add_pin('in', cur_warrs[0], show=show_pins)
         self.add_pin('out', inst_cap.get_pin('minus'), show=show_pins)
 
+        return warr_list
+
     def _make_masters(self):
         res_params = self.params['res_params']
         esd_params = self.params['esd_params']
@@ -917,6 +1047,7 @@ class TermRX(TemplateBase):
             top_layer='top level layer',
             fill_config='fill configuration dictionary.',
             show_pins='True to draw pins.',
+            floorplan_only='True to only place instances, without routing or fill.',
         )
 
     @classmethod
@@ -926,6 +1057,7 @@ class TermRX(TemplateBase):
             cap_out_tid=None,
             em_specs=None,
             show_pins=True,
+            floorplan_only=False,
         )
 
     def draw_layout(self):
@@ -943,6 +1075,9 @@ class TermRX(TemplateBase):
 
         self.array_box = tot_box = bnd_box.merge(instp.bound_box)
         self.set_size_from_bound_box(master.top_layer, tot_box)
+        self._sch_params = master.sch_params
+        if self.params['floorplan_only']:
+            return
 
         self.reexport(instp.get_port('in'), net_name='inp', show=show_pins)
         self.reexport(instn.get_port('in'), net_name='inn', show=show_pins)
@@ -952,5 +1087,3 @@ class TermRX(TemplateBase):
             label = name + ':'
             self.reexport(instp.get_port(name), label=label, show=show_pins)
             self.reexport(instn.get_port(name), label=label, show=show_pins)
-
-        self._sch_params = master.sch_params
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+"""This module defines a batch generator that builds the cells of each library in one TemplateDB."""
+
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Iterable, Type, Union, Tuple
+
+import os
+import json
+import importlib
+from collections import OrderedDict
+
+import yaml
+
+from bag.io import open_file
+
+try:
+    from yaml import CLoader as _YamlLoader
+except ImportError:
+    from yaml import Loader as _YamlLoader
+
+if TYPE_CHECKING:
+    from bag.core import BagProject
+    from bag.layout.template import TemplateBase
+
+    ClsTableType = Dict[str, Union[str, Type[TemplateBase]]]
+    # (specification file, specification, layout class) of a cell
+    CellInfo = Tuple[str, Dict[str, Any], Type[TemplateBase]]
+
+
+def get_spec_files(spec_list):
+    # type: (Iterable[str]) -> List[str]
+    """Returns the specification files in the given list of files or directories.
+
+    Directories are expanded to the YAML files they contain, sorted by name.
+    """
+    ans = []
+    for path in spec_list:
+        if os.path.isdir(path):
+            ans.extend(os.path.join(path, fname) for fname in sorted(os.listdir(path))
+                       if fname.endswith('.yaml') or fname.endswith('.yml'))
+        elif os.path.isfile(path):
+            ans.append(path)
+        else:
+            raise ValueError('Specification file or directory not found: %s' % path)
+    return ans
+
+
+def get_layout_class(spec_fname, specs, cls_table=None):
+    # type: (str, Dict[str, Any], Optional[ClsTableType]) -> Type[TemplateBase]
+    """Returns the layout generator class of the given specification.
+
+    The class is given by the layout_package and layout_class entries of the specification.
+    Otherwise, it is looked up in cls_table by the specification file name without extension,
+    then by the impl_cell entry.  Table values are either classes or 'module.ClassName' strings.
+    """
+    if 'layout_class' in specs:
+        mod_name = specs['layout_package']
+        cls_name = specs['layout_class']
+    else:
+        cls_table = {} if cls_table is None else cls_table
+        base_name = os.path.splitext(os.path.basename(spec_fname))[0]
+        temp_cls = cls_table.get(base_name, None)
+        if temp_cls is None:
+            temp_cls = cls_table.get(specs.get('impl_cell', None), None)
+            if temp_cls is None:
+                raise ValueError('Cannot determine layout class of %s.  Add layout_package '
+                                 'and layout_class entries to the specification.' % spec_fname)
+        if not isinstance(temp_cls, str):
+            return temp_cls
+        mod_name, cls_name = temp_cls.rsplit('.', 1)
+
+    return getattr(importlib.import_module(mod_name), cls_name)
+
+
+def get_batch_groups(spec_list, cls_table=None, debug=False):
+    # type: (Iterable[str], Optional[ClsTableType], bool) -> Dict[str, List[CellInfo]]
+    """Read the given specification files and group them by implementation library.
+
+    Every cell of a library is generated in one TemplateDB, so all specifications of a library
+    must use the same routing grid, and every cell name must be unique in its library.  Masters
+    of different TemplateDBs could otherwise get the same cell name in one library.  All
+    specifications are checked before anything is generated.  YAML files that are not
+    generator specifications, such as cached layout information, are skipped.
+
+    Parameters
+    ----------
+    spec_list : Iterable[str]
+        list of specification files, or directories of specification files.
+    cls_table : Optional[ClsTableType]
+        layout class lookup table for specifications without a layout_class entry.
+        See get_layout_class().
+    debug : bool
+        True to print the skipped files.
+
+    Returns
+    -------
+    groups : Dict[str, List[CellInfo]]
+        dictionary from library name to list of (specification file, specification, layout
+        class) tuples, in specification file order.
+    """
+    groups = OrderedDict()
+    grid_table = {}
+    cell_table = {}
+    for spec_fname in get_spec_files(spec_list):
+        with open_file(spec_fname, 'r') as f:
+            specs = yaml.load(f, Loader=_YamlLoader)
+        if not isinstance(specs, dict) or 'params' not in specs:
+            # not a generator specification, such as a cached sampler_column_info.yaml
+            if debug:
+                print('skipping %s' % spec_fname)
+            continue
+        temp_cls = get_layout_class(spec_fname, specs, cls_table=cls_table)
+        impl_lib = specs['impl_lib']
+        cell_name = specs.get('impl_cell', None)
+        if cell_name is None:
+            raise ValueError('Specification %s has no impl_cell entry.' % spec_fname)
+
+        grid_key = json.dumps(specs['routing_grid'], sort_keys=True)
+        prev_fname, prev_key = grid_table.setdefault(impl_lib, (spec_fname, grid_key))
+        if grid_key != prev_key:
+            raise ValueError('Specifications %s and %s use different routing grids in library '
+                             '%s.  Use a separate library for each routing grid.'
+                             % (prev_fname, spec_fname, impl_lib))
+        prev_fname = cell_table.setdefault((impl_lib, cell_name), spec_fname)
+        if prev_fname != spec_fname:
+            raise ValueError('Specifications %s and %s both generate cell %s in library %s.'
+                             % (prev_fname, spec_fname, cell_name, impl_lib))
+
+        groups.setdefault(impl_lib, []).append((spec_fname, specs, temp_cls))
+
+    return groups
+
+
+def generate_batch(prj, spec_list, cls_table=None, gen_lay=True, gen_sch=False, debug=False):
+    # type: (BagProject, Iterable[str], Optional[ClsTableType], bool, bool, bool) -> List[str]
+    """Generate the cells of many specification files in a single batch.
+
+    All cells of the same implementation library are generated in one TemplateDB, so
+    sub-masters shared between cells are only generated once.  The layouts of each library
+    are then written with a single batch_layout() call, and the schematics with a single
+    batch_schematic() call.  See get_batch_groups() for the requirements on the
+    specifications.
+
+    Parameters
+    ----------
+    prj : BagProject
+        the BAG project.
+    spec_list : Iterable[str]
+        list of specification files, or directories of specification files.
+    cls_table : Optional[ClsTableType]
+        layout class lookup table for specifications without a layout_class entry.
+        See get_layout_class().
+    gen_lay : bool
+        True to write layouts.
+    gen_sch : bool
+        True to write schematics.
+    debug : bool
+        True to print progress and debug messages.
+
+    Returns
+    -------
+    cell_list : List[str]
+        list of generated cell names.
+    """
+    groups = get_batch_groups(spec_list, cls_table=cls_table, debug=debug)
+
+    cell_list = []
+    for impl_lib, info_list in groups.items():
+        tdb = prj.make_template_db(impl_lib, info_list[0][1]['routing_grid'], use_cybagoa=True)
+        name_list = []
+        lay_list = []
+        sch_list = []
+        for spec_fname, specs, temp_cls in info_list:
+            cell_name = specs['impl_cell']
+            cell_list.append(cell_name)
+
+            if debug:
+                print('computing layout for %s' % cell_name)
+            temp = tdb.new_template(params=specs['params'], temp_cls=temp_cls)
+            name_list.append(cell_name)
+            lay_list.append(temp)
+            if gen_sch:
+                if debug:
+                    print('computing schematic for %s' % cell_name)
+                dsn = prj.create_design_module(lib_name=specs['sch_lib'],
+                                               cell_name=specs['sch_cell'])
+                dsn.design(**temp.sch_params)
+                sch_list.append(dsn)
+
+        if gen_lay:
+            if debug:
+                print('creating layouts in %s' % impl_lib)
+            tdb.batch_layout(prj, lay_list, name_list, debug=debug)
+        if gen_sch:
+            if debug:
+                print('creating schematics in %s' % impl_lib)
+            prj.batch_schematic(impl_lib, sch_list, name_list, debug=debug)
+
+    return cell_list
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+"""This module defines a layout generation benchmark harness."""
+
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Callable, Type, Iterable
+
+import os
+import gc
+import time
+import resource
+import tracemalloc
+from collections import OrderedDict
+
+import yaml
+
+from bag.io import open_file
+
+if TYPE_CHECKING:
+    from bag.core import BagProject
+    from bag.layout.template import TemplateBase
+
+    SpecsFnType = Callable[[BagProject, Dict[str, Any]], Dict[str, Any]]
+
+
+class LayoutBenchmark(object):
+    """Times layout generation of a list of blocks, and compares the results with a baseline.
+
+    Each block is generated in a fresh TemplateDB with prj.make_template_db(), without writing
+    the layout, so no CAD backend is required.  The routing grid and technology are the ones
+    given in the block specification file and the BAG project configuration.
+
+    For every block the following numbers are recorded:
+
+    time
+        minimum wall time over all repeats, in seconds.
+    time_first
+        wall time of the first repeat, in seconds.  Class-level lookup tables are populated
+        during the first repeat, so this is the cold start time.
+    mem_peak
+        peak traced Python memory of the first repeat, in megabytes.  Only recorded if
+        trace_memory is True, as tracing slows down generation.
+    rss_peak
+        process peak resident set size after the block, in megabytes.
+
+    Parameters
+    ----------
+    prj : BagProject
+        the BAG project.
+    threshold : float
+        relative regression threshold.  A number larger than baseline * (1 + threshold) is
+        a regression.
+    repeat : int
+        number of times each block is generated.
+    trace_memory : bool
+        True to record peak Python memory with tracemalloc.
+    """
+
+    def __init__(self, prj, threshold=0.2, repeat=1, trace_memory=True):
+        # type: (BagProject, float, int, bool) -> None
+        if repeat < 1:
+            raise ValueError('repeat must be positive.')
+        self._prj = prj
+        self._threshold = threshold
+        self._repeat = repeat
+        self._trace_memory = trace_memory
+        self._blocks = OrderedDict()
+
+    @property
+    def block_names(self):
+        # type: () -> List[str]
+        return list(self._blocks.keys())
+
+    def add(self, name, spec_fname, temp_cls, specs_fn=None):
+        # type: (str, str, Type[TemplateBase], Optional[SpecsFnType]) -> None
+        """Register a block.
+
+        Parameters
+        ----------
+        name : str
+            the block name.
+        spec_fname : str
+            the block specification file name.
+        temp_cls : Type[TemplateBase]
+            the layout generator class.
+        specs_fn : Optional[SpecsFnType]
+            if given, a function that takes the BAG project and the specification dictionary,
+            and returns the specification dictionary to use.
+        """
+        if name in self._blocks:
+            raise ValueError('Block %s already added.' % name)
+        self._blocks[name] = (spec_fname, temp_cls, specs_fn)
+
+    def run(self, names=None):
+        # type: (Optional[Iterable[str]]) -> Dict[str, Dict[str, float]]
+        """Run the benchmark.
+
+        Parameters
+        ----------
+        names : Optional[Iterable[str]]
+            names of the blocks to run.  Defaults to all blocks.
+
+        Returns
+        -------
+        results : Dict[str, Dict[str, float]]
+            dictionary from block name to its benchmark numbers.
+        """
+        if names is None:
+            names = self._blocks.keys()
+
+        results = OrderedDict()
+        for name in names:
+            if name not in self._blocks:
+                raise ValueError('Unknown block: %s' % name)
+            results[name] = self._run_block(*self._blocks[name])
+        return results
+
+    def _run_block(self, spec_fname, temp_cls, specs_fn):
+        # type: (str, Type[TemplateBase], Optional[SpecsFnType]) -> Dict[str, float]
+        with open_file(spec_fname, 'r') as f:
+            specs = yaml.load(f)
+        if specs_fn is not None:
+            specs = specs_fn(self._prj, specs)
+
+        impl_lib = specs['impl_lib']
+        grid_specs = specs['routing_grid']
+        params = specs['params']
+
+        ans = {}
+        time_list = []
+        for idx in range(self._repeat):
+            trace = self._trace_memory and idx == 0
+            gc.collect()
+            if trace:
+                tracemalloc.start()
+            try:
+                t0 = time.perf_counter()
+                tdb = self._prj.make_template_db(impl_lib, grid_specs)
+                tdb.new_template(params=params, temp_cls=temp_cls)
+                time_list.append(time.perf_counter() - t0)
+                if trace:
+                    ans['mem_peak'] = tracemalloc.get_traced_memory()[1] / 2**20
+            finally:
+                if trace:
+                    tracemalloc.stop()
+
+        ans['time'] = min(time_list)
+        ans['time_first'] = time_list[0]
+        ans['rss_peak'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+        return ans
+
+    def get_regressions(self, results, baseline):
+        # type: (Dict[str, Dict[str, float]], Dict[str, Dict[str, float]]) -> List[str]
+        """Compare benchmark results with the baseline.
+
+        Only time and mem_peak are compared, as rss_peak accumulates over blocks.
+
+        Parameters
+        ----------
+        results : Dict[str, Dict[str, float]]
+            the benchmark results.
+        baseline : Dict[str, Dict[str, float]]
+            the baseline results.
+
+        Returns
+        -------
+        msg_list : List[str]
+            a message for each regression.  Empty if there are no regressions.
+        """
+        msg_list = []
+        for name, cur_res in results.items():
+            base_res = baseline.get(name, None)
+            if base_res is None:
+                continue
+            for key in ('time', 'mem_peak'):
+                if key in cur_res and key in base_res:
+                    cur_val = cur_res[key]
+                    base_val = base_res[key]
+                    if cur_val > base_val * (1 + self._threshold):
+                        msg_list.append('%s %s regressed: %.4g -> %.4g (%+.1f%%)' %
+                                        (name, key, base_val, cur_val,
+                                         (cur_val / base_val - 1) * 100))
+        return msg_list
+
+
+def read_baseline(fname):
+    # type: (str) -> Dict[str, Dict[str, float]]
+    """Read benchmark baseline from the given file.  Returns an empty baseline if not found."""
+    if not os.path.isfile(fname):
+        return {}
+    with open_file(fname, 'r') as f:
+        return yaml.safe_load(f) or {}
+
+
+def write_baseline(fname, results, baseline=None):
+    # type: (str, Dict[str, Dict[str, float]], Optional[Dict[str, Dict[str, float]]]) -> None
+    """Write benchmark results to the given baseline file.
+
+    Parameters
+    ----------
+    fname : str
+        the baseline file name.
+    results : Dict[str, Dict[str, float]]
+        the benchmark results.
+    baseline : Optional[Dict[str, Dict[str, float]]]
+        if given, entries of blocks not in results are kept.
+    """
+    content = {} if baseline is None else dict(baseline)
+    content.update((name, dict(val)) for name, val in results.items())
+    with open_file(fname, 'w') as f:
+        yaml.safe_dump(content, f, default_flow_style=False)
+
+
+def format_results(results, baseline=None):
+    # type: (Dict[str, Dict[str, float]], Optional[Dict[str, Dict[str, float]]]) -> str
+    """Returns benchmark results as a table, with the relative time change from the baseline."""
+    baseline = {} if baseline is None else baseline
+    lines = ['%-16s %10s %10s %10s %10s %8s' % ('block', 'time (s)', 'first (s)', 'mem (MB)',
+                                                'rss (MB)', 'delta')]
+    for name, res in results.items():
+        base_time = baseline.get(name, {}).get('time', None)
+        delta = '' if base_time is None else '%+.1f%%' % ((res['time'] / base_time - 1) * 100)
+        lines.append('%-16s %10.3f %10.3f %10.1f %10.1f %8s' %
+                     (name, res['time'], res['time_first'], res.get('mem_peak', float('nan')),
+                      res['rss_peak'], delta))
+    return '\n'.join(lines)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+"""This module defines a cached loader of BlackBoxTemplate parameter files."""
+
+from typing import Dict, Any, Tuple
+
+import os
+import pickle
+import hashlib
+import threading
+
+import yaml
+
+try:
+    from yaml import CLoader as _YamlLoader
+except ImportError:
+    from yaml import Loader as _YamlLoader
+
+# absolute file name to ((file modification time, file size), parameters)
+_params_table = {}  # type: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]]
+_table_lock = threading.Lock()
+
+
+def load_black_box_params(fname):
+    # type: (str) -> Dict[str, Any]
+    """Returns the BlackBoxTemplate parameters stored in the given YAML file.
+
+    Black box geometry dumps are large, so each file is parsed at most once with the libyaml
+    loader.  The parsed parameters are kept in memory and pickled to the user cache directory
+    ($XDG_CACHE_HOME/bag_serdes_ec/blackbox, by default under ~/.cache), both keyed on the
+    modification time and size of the YAML file, so later runs skip YAML parsing entirely.
+    Nothing is written next to the YAML file.  If the cache directory is not writable, only
+    the in-memory cache is used.
+
+    Parameters
+    ----------
+    fname : str
+        the black box parameter YAML file.
+
+    Returns
+    -------
+    params : Dict[str, Any]
+        the BlackBoxTemplate parameters.  This is a shallow copy, so top level entries such as
+        show_pins can be set by the caller.  Nested values are shared and must not be modified.
+    """
+    fname = os.path.abspath(fname)
+    stat = os.stat(fname)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _table_lock:
+        entry = _params_table.get(fname, None)
+        if entry is None or entry[0] != key:
+            entry = _params_table[fname] = (key, _load_params(fname, key))
+    return entry[1].copy()
+
+
+def _get_pickle_fname(fname):
+    # type: (str) -> str
+    cache_root = os.environ.get('XDG_CACHE_HOME', '') or os.path.join(os.path.expanduser('~'),
+                                                                       '.cache')
+    path_hash = hashlib.sha1(fname.encode('utf-8')).hexdigest()
+    return os.path.join(cache_root, 'bag_serdes_ec', 'blackbox', '%s.pickle' % path_hash)
+
+
+def _load_params(fname, key):
+    # type: (str, Tuple[int, int]) -> Dict[str, Any]
+    pickle_fname = _get_pickle_fname(fname)
+    try:
+        with open(pickle_fname, 'rb') as f:
+            pickle_key, params = pickle.load(f)
+        if pickle_key == key:
+            return params
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+
+    with open(fname, 'r') as f:
+        params = yaml.load(f, Loader=_YamlLoader)
+
+    tmp_fname = '%s.%d.%d.tmp' % (pickle_fname, os.getpid(), threading.get_ident())
+    try:
+        os.makedirs(os.path.dirname(pickle_fname), exist_ok=True)
+        with open(tmp_fname, 'wb') as f:
+            pickle.dump((key, params), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_fname, pickle_fname)
+    except OSError:
+        pass
+    return params
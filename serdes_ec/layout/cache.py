@@ -0,0 +1,841 @@
+# -*- coding: utf-8 -*-
+
+"""This module defines a persistent on-disk cache of leaf layout masters."""
+
+from typing import TYPE_CHECKING, Dict, Any, Optional, Callable, Type, List, Iterable, Iterator, \
+    Tuple, Sequence
+
+import os
+import json
+import fcntl
+import numbers
+import shutil
+import inspect
+import hashlib
+import tempfile
+import importlib
+import weakref
+import functools
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+from bag.io import open_file
+from bag.layout.template import CachedTemplate
+
+if TYPE_CHECKING:
+    from bag.layout.routing import RoutingGrid
+    from bag.layout.template import TemplateBase
+
+# RoutingGrid attributes that define the track configuration of each layer.
+_grid_attr_list = ('layers', 'sp_tracks', 'w_tracks', 'offset_tracks', 'dir_tracks',
+                   'block_pitch', 'w_override', 'max_num_tr_tracks')
+
+# routing grid to its key.  Keys are computed once per grid object.
+_grid_key_table = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+
+# the cache used by new_leaf_template().
+_leaf_cache = None  # type: Optional[LeafMasterCache]
+
+# (cache, parent template, job list) of a prefetch worker process.
+_prefetch_state = None  # type: Optional[Tuple[LeafMasterCache, TemplateBase, List[Any]]]
+
+
+def set_leaf_cache(cache):
+    # type: (Optional[LeafMasterCache]) -> None
+    """Set the leaf master cache used by new_leaf_template().  None disables caching."""
+    global _leaf_cache
+    _leaf_cache = cache
+
+
+def get_leaf_cache():
+    # type: () -> Optional[LeafMasterCache]
+    """Returns the leaf master cache used by new_leaf_template()."""
+    return _leaf_cache
+
+
+@contextmanager
+def leaf_master_cache(root_dir, leaf_classes, config=None, max_size=2**32, incremental=False):
+    # type: (str, Iterable[type], Optional[Dict[str, Any]], int, bool) -> Iterator[Any]
+    """Use a persistent master cache for new_leaf_template() inside this context.
+
+    The previous cache is restored on exit, and the draw_layout() and TemplateDB methods
+    instrumented by an IncrementalMasterCache are restored.  If root_dir is empty, caching is
+    disabled.  The hit and miss counts are available from the stats property of the yielded
+    cache.
+
+    Parameters
+    ----------
+    root_dir : str
+        the cache root directory.  Empty to disable caching.
+    leaf_classes : Iterable[Type[TemplateBase]]
+        masters of these classes (or their subclasses) are cached.
+    config : Optional[Dict[str, Any]]
+        grid and technology configuration, such as the routing grid specification.
+    max_size : int
+        maximum total size of the cache files, in bytes.
+    incremental : bool
+        True to use an IncrementalMasterCache, which may also store hierarchical masters.
+
+    Yields
+    ------
+    cache : Optional[LeafMasterCache]
+        the cache, or None if caching is disabled.
+    """
+    if not root_dir:
+        yield None
+        return
+
+    cache_cls = IncrementalMasterCache if incremental else LeafMasterCache
+    cache = cache_cls(root_dir, leaf_classes, config=config, max_size=max_size)
+    prev_cache = get_leaf_cache()
+    set_leaf_cache(cache)
+    try:
+        yield cache
+    finally:
+        set_leaf_cache(prev_cache)
+        cache.disable()
+
+
+def save_master_cache(master, fname):
+    # type: (TemplateBase, str) -> None
+    """Write the given master to a file readable by CachedTemplate.
+
+    The file is written by the TemplateDB of the master, in a scratch directory next to fname,
+    and then moved to fname.
+    """
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(fname)))
+    try:
+        master.template_db.save_to_cache([master], tmp_dir)
+        fname_list = [os.path.join(root, name) for root, _, names in os.walk(tmp_dir)
+                      for name in names]
+        if len(fname_list) != 1:
+            raise ValueError('Expect one cache file for %s, got %d.' % (master.cell_name,
+                                                                      len(fname_list)))
+        os.replace(fname_list[0], fname)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def new_leaf_template(template, params, temp_cls):
+    # type: (TemplateBase, Dict[str, Any], Type[TemplateBase]) -> TemplateBase
+    """Create a sub-master of the given template, using the leaf master cache if set.
+
+    Only use this for masters whose caller accesses nothing but the layout, the ports, and the
+    properties listed in get_cache_properties(), as a cache hit returns a CachedTemplate.  The
+    cache may be an IncrementalMasterCache, which also stores hierarchical masters.
+    """
+    if _leaf_cache is None:
+        return template.new_template(params=params, temp_cls=temp_cls)
+    return _leaf_cache.new_template(template, params, temp_cls)
+
+
+def prefetch_leaf_templates(template, job_list, max_workers=None):
+    # type: (TemplateBase, Sequence[Tuple[Dict[str, Any], type]], Optional[int]) -> int
+    """Generate independent sub-masters in worker processes to fill the leaf master cache.
+
+    Call this before creating the given sub-masters with new_leaf_template(), in their usual
+    order.  Nothing is done if no cache is set.  See LeafMasterCache.prefetch().
+
+    Parameters
+    ----------
+    template : TemplateBase
+        the parent template.
+    job_list : Sequence[Tuple[Dict[str, Any], Type[TemplateBase]]]
+        the (parameters, class) of each sub-master.  The parameters must not depend on any
+        master that is not created yet.
+    max_workers : Optional[int]
+        maximum number of worker processes.  Defaults to the number of CPUs.
+
+    Returns
+    -------
+    num_masters : int
+        the number of masters generated by worker processes.
+    """
+    if _leaf_cache is None:
+        return 0
+    return _leaf_cache.prefetch(template, job_list, max_workers=max_workers)
+
+
+def _init_prefetch(cache, template, jobs):
+    # type: (LeafMasterCache, TemplateBase, List[Tuple[Any, ...]]) -> None
+    global _prefetch_state
+    _prefetch_state = (cache, template, jobs)
+
+
+def _run_prefetch(idx):
+    # type: (int) -> None
+    """Generate and store the given job in a worker process.
+
+    The worker owns a forked copy of the TemplateDB, so it never shares it with another thread
+    or process.  Only the cache file is kept, the master is discarded with the process.
+    """
+    cache, template, jobs = _prefetch_state
+    params, temp_cls = jobs[idx]
+    cache.new_template(template, params, temp_cls)
+
+
+class LeafMasterCache(object):
+    """A persistent, size-bounded cache of leaf layout masters.
+
+    Each entry is a cache file readable by :class:`bag.layout.template.CachedTemplate`, keyed
+    on the generator class, its parameters, the grid/technology configuration, and a hash of the
+    source files of the generator class hierarchy.  Editing a generator therefore invalidates
+    all of its entries.  Within one run, a repeated request returns the master created by the
+    first request, so a library never contains two cells with the same layout.
+
+    The cache directory is shared between processes.  Cache files and the JSON index are
+    written to a temporary file first and then moved in place, so concurrent readers never see
+    a partially written entry, and index updates happen under an exclusive file lock.  A cache
+    hit only touches the modification time of the cache file, which is used as the last access
+    time.  When the total size of the cache files exceeds max_size, least recently used entries
+    are evicted.  An entry evicted by another process while it is being read is regenerated.
+
+    Parameters
+    ----------
+    root_dir : str
+        the cache root directory.
+    leaf_classes : Iterable[Type[TemplateBase]]
+        masters of these classes (or their subclasses) are cached.  Their callers should only
+        access the layout, the ports, and the properties listed in get_cache_properties().
+    config : Optional[Dict[str, Any]]
+        grid and technology configuration, such as the routing grid specification.  Included
+        in every key.
+    max_size : int
+        maximum total size of the cache files, in bytes.
+    save_fn : Optional[Callable[[TemplateBase, str], None]]
+        function that writes the given master to the given file in the format read by
+        CachedTemplate.  Defaults to save_master_cache().
+    """
+
+    _src_hash_table = {}  # type: Dict[type, str]
+
+    def __init__(self, root_dir, leaf_classes, config=None, max_size=2**32, save_fn=None):
+        # type: (str, Iterable[type], Optional[Dict[str, Any]], int, Optional[Callable]) -> None
+        self._root_dir = os.path.abspath(root_dir)
+        self._index_fname = os.path.join(self._root_dir, 'index.json')
+        self._lock_fname = os.path.join(self._root_dir, 'index.lock')
+        self._save_fn = save_master_cache if save_fn is None else save_fn
+        self._config = {} if config is None else config
+        self._leaf_classes = tuple(leaf_classes)
+        self._max_size = max_size
+        self._stats = dict(hits=0, misses=0)
+        # masters returned in this run, keyed by TemplateDB ID and request key.  Each master
+        # refers to its TemplateDB, so the ID is not reused while the entry exists.
+        self._masters = {}  # type: Dict[Tuple[int, str], TemplateBase]
+        os.makedirs(self._root_dir, exist_ok=True)
+
+    @property
+    def stats(self):
+        # type: () -> Dict[str, int]
+        """Returns the number of cache hits and misses of this object."""
+        return self._stats.copy()
+
+    @classmethod
+    def get_source_hash(cls, temp_cls):
+        # type: (type) -> str
+        """Returns a hash of the source files defining the given class and its base classes."""
+        src_hash = cls._src_hash_table.get(temp_cls, None)
+        if src_hash is None:
+            sha = hashlib.sha1()
+            fname_list = set()
+            for base_cls in temp_cls.__mro__:
+                try:
+                    fname_list.add(inspect.getsourcefile(base_cls))
+                except TypeError:
+                    # built-in class
+                    pass
+            for fname in sorted(fname for fname in fname_list if fname is not None):
+                with open(fname, 'rb') as f:
+                    sha.update(f.read())
+            src_hash = cls._src_hash_table[temp_cls] = sha.hexdigest()
+        return src_hash
+
+    def get_key(self, temp_cls, params, grid):
+        # type: (type, Dict[str, Any], RoutingGrid) -> str
+        """Returns the cache key of the given master."""
+        content = dict(
+            cls=_get_class_name(temp_cls),
+            params=_to_json(params),
+            config=_to_json(self._config),
+            grid=get_grid_key(grid),
+            src=self.get_source_hash(temp_cls),
+        )
+        content = json.dumps(content, sort_keys=True)
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def get_cache_fname(self, key):
+        # type: (str) -> str
+        """Returns the cache file name of the given entry."""
+        return os.path.join(self._root_dir, '%s.cache' % key)
+
+    def is_leaf(self, temp_cls):
+        # type: (type) -> bool
+        """Returns True if masters of the given class are cached."""
+        return issubclass(temp_cls, self._leaf_classes)
+
+    def new_template(self, template, params, temp_cls):
+        # type: (TemplateBase, Dict[str, Any], Type[TemplateBase]) -> TemplateBase
+        """Create a sub-master of the given template, reusing the cached layout if possible.
+
+        Parameters
+        ----------
+        template : TemplateBase
+            the parent template.
+        params : Dict[str, Any]
+            the sub-master parameters.
+        temp_cls : Type[TemplateBase]
+            the sub-master class.
+
+        Returns
+        -------
+        master : TemplateBase
+            the sub-master.  On a cache hit from a previous run this is a CachedTemplate.
+        """
+        if not self.is_leaf(temp_cls):
+            return template.new_template(params=params, temp_cls=temp_cls)
+
+        key = self.get_key(temp_cls, params, template.grid)
+        run_key = (id(template.template_db), key)
+        master = self._masters.get(run_key, None)
+        if master is not None:
+            return master
+
+        master = self._load(template, key)
+        if master is None:
+            self._stats['misses'] += 1
+            master = template.new_template(params=params, temp_cls=temp_cls)
+            self._store(key, master, dict(cls=_get_class_name(temp_cls)))
+        else:
+            self._stats['hits'] += 1
+
+        self._masters[run_key] = master
+        return master
+
+    def has_entry(self, template, params, temp_cls):
+        # type: (TemplateBase, Dict[str, Any], type) -> bool
+        """Returns True if the given sub-master is available without generating it."""
+        key = self.get_key(temp_cls, params, template.grid)
+        return ((id(template.template_db), key) in self._masters or
+                os.path.isfile(self.get_cache_fname(key)))
+
+    def prefetch(self, template, job_list, max_workers=None):
+        # type: (TemplateBase, Sequence[Tuple[Dict[str, Any], type]], Optional[int]) -> int
+        """Generate independent sub-masters in worker processes to fill this cache.
+
+        TemplateDB is not thread safe, and masters cannot be moved between processes.  Instead,
+        each missing sub-master is generated in a forked worker process, which owns a copy of
+        the parent TemplateDB, and is written to the cache files.  The parent then creates the
+        sub-masters with new_template() in its usual order, reading them from the cache, so
+        cell names do not depend on the number of workers or on completion order.
+
+        Sub-masters that are not cached, already available, or repeated are skipped, and
+        nothing is done unless at least two sub-masters are left and max_workers > 1.  The
+        prefetched sub-masters count as cache hits.
+
+        Parameters
+        ----------
+        template : TemplateBase
+            the parent template.
+        job_list : Sequence[Tuple[Dict[str, Any], Type[TemplateBase]]]
+            the (parameters, class) of each sub-master.  The parameters must not depend on any
+            master that is not created yet.
+        max_workers : Optional[int]
+            maximum number of worker processes.  Defaults to the number of CPUs.
+
+        Returns
+        -------
+        num_masters : int
+            the number of masters generated by worker processes.
+        """
+        jobs = []
+        key_set = set()
+        for params, temp_cls in job_list:
+            if self.is_leaf(temp_cls) and not self.has_entry(template, params, temp_cls):
+                key = self.get_key(temp_cls, params, template.grid)
+                if key not in key_set:
+                    key_set.add(key)
+                    jobs.append((params, temp_cls))
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = min(max_workers, len(jobs))
+        if max_workers < 2:
+            return 0
+
+        # fork, so that workers get a copy of the TemplateDB without pickling it
+        mp_context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context,
+                                 initializer=_init_prefetch,
+                                 initargs=(self, template, jobs)) as executor:
+            for _ in executor.map(_run_prefetch, range(len(jobs))):
+                pass
+        return len(jobs)
+
+    def disable(self):
+        # type: () -> None
+        """Restore any methods instrumented by this cache.  Leaf caches instrument nothing."""
+        pass
+
+    def clear(self):
+        # type: () -> None
+        """Remove all entries."""
+        with self._lock() as index:
+            for key in list(index.keys()):
+                self._remove(index, key)
+            self._write_index(index)
+        self._masters.clear()
+
+    def _load(self, template, key):
+        # type: (TemplateBase, str) -> Optional[TemplateBase]
+        """Returns the CachedTemplate of the given entry, or None if the entry does not exist."""
+        cache_fname = self.get_cache_fname(key)
+        try:
+            # the modification time is the last access time used for eviction
+            os.utime(cache_fname)
+            return template.new_template(params=dict(cache_fname=cache_fname),
+                                         temp_cls=CachedTemplate)
+        except FileNotFoundError:
+            # not cached, or evicted by another process
+            return None
+
+    def _store(self, key, master, info):
+        # type: (str, TemplateBase, Dict[str, Any]) -> None
+        """Write the given master to the cache, and add the given entry info to the index."""
+        cache_fname = self.get_cache_fname(key)
+        tmp_fname = '%s.%d.%d.tmp' % (cache_fname, os.getpid(), threading.get_ident())
+        self._save_fn(master, tmp_fname)
+        os.replace(tmp_fname, cache_fname)
+        info['size'] = os.path.getsize(cache_fname)
+        with self._lock() as index:
+            index[key] = info
+            self._evict(index)
+            self._write_index(index)
+
+    def _evict(self, index):
+        # type: (Dict[str, Dict[str, Any]]) -> None
+        atime_table = {}
+        for key in list(index.keys()):
+            try:
+                atime_table[key] = os.path.getmtime(self.get_cache_fname(key))
+            except FileNotFoundError:
+                del index[key]
+
+        tot_size = sum(info['size'] for info in index.values())
+        if tot_size > self._max_size:
+            key_list = sorted(index.keys(), key=atime_table.__getitem__)  # type: List[str]
+            for key in key_list:
+                if tot_size <= self._max_size:
+                    break
+                tot_size -= index[key]['size']
+                self._remove(index, key)
+
+    def _remove(self, index, key):
+        # type: (Dict[str, Dict[str, Any]], str) -> None
+        del index[key]
+        try:
+            os.remove(self.get_cache_fname(key))
+        except FileNotFoundError:
+            pass
+
+    def _read_index(self):
+        # type: () -> Dict[str, Dict[str, Any]]
+        # the index is replaced atomically, so reading it needs no lock
+        try:
+            with open_file(self._index_fname, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_index(self, index):
+        # type: (Dict[str, Dict[str, Any]]) -> None
+        tmp_fname = '%s.%d.tmp' % (self._index_fname, os.getpid())
+        with open_file(tmp_fname, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_fname, self._index_fname)
+
+    @contextmanager
+    def _lock(self):
+        with open(self._lock_fname, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield self._read_index()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class ParamsRecorder(dict):
+    """A parameter dictionary that records which keys are read.
+
+    Iterating over the dictionary or copying it counts as reading every key.
+    """
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self.reads = set()
+
+    def __getitem__(self, key):
+        self.reads.add(key)
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        self.reads.add(key)
+        return dict.__contains__(self, key)
+
+    def __iter__(self):
+        self.reads.update(dict.keys(self))
+        return dict.__iter__(self)
+
+    def get(self, key, default=None):
+        self.reads.add(key)
+        return dict.get(self, key, default)
+
+    def keys(self):
+        self.reads.update(dict.keys(self))
+        return dict.keys(self)
+
+    def values(self):
+        self.reads.update(dict.keys(self))
+        return dict.values(self)
+
+    def items(self):
+        self.reads.update(dict.keys(self))
+        return dict.items(self)
+
+    def copy(self):
+        self.reads.update(dict.keys(self))
+        return dict(self)
+
+
+class _RecordFrame(object):
+    """Dependency information of a master being generated."""
+
+    def __init__(self, temp_cls):
+        # type: (type) -> None
+        self.temp_cls = temp_cls
+        self.reads = None  # type: Optional[List[str]]
+        self.deps = {}  # type: Dict[str, str]
+
+
+class IncrementalMasterCache(LeafMasterCache):
+    """A persistent master cache that records the parameters each master depends on.
+
+    Unlike LeafMasterCache, this cache may also store hierarchical masters.  When a master is
+    generated, the parameter keys read by its draw_layout() method and the source hashes of
+    all its descendant classes are recorded in the index.  Descendants are found by watching
+    the new_template() method of the TemplateDB while the master is drawn, so they include
+    masters that are not cached themselves.  A later request hits the cache if the values of
+    the recorded keys are unchanged, the generator sources are unchanged, and no descendant
+    generator source was edited.  Therefore, after a spec change only the
+    masters that read a changed parameter, and their ancestors, are regenerated.  Everything
+    else is read from the previous run.
+
+    Keys are recorded at the top level, so reading one entry of a nested parameter dictionary
+    makes the master depend on the whole dictionary.  Parameters read outside of draw_layout()
+    are not recorded, so they should not affect the layout or the cached properties.  Masters
+    the TemplateDB already generated earlier in the same run are not stored, as their
+    parameter reads are unknown.
+
+    Parameters
+    ----------
+    root_dir : str
+        the cache root directory.
+    cache_classes : Iterable[Type[TemplateBase]]
+        masters of these classes (or their subclasses) are cached.  Their callers should only
+        access the layout, the ports, and the properties listed in get_cache_properties().
+    config : Optional[Dict[str, Any]]
+        grid and technology configuration, such as the routing grid specification.  Included
+        in every key.
+    max_size : int
+        maximum total size of the cache files, in bytes.
+    save_fn : Optional[Callable[[TemplateBase, str], None]]
+        function that writes the given master to the given file in the format read by
+        CachedTemplate.  Defaults to save_master_cache().
+    """
+
+    _missing = '__missing__'
+
+    def __init__(self, root_dir, cache_classes, config=None, max_size=2**32, save_fn=None):
+        # type: (str, Iterable[type], Optional[Dict[str, Any]], int, Optional[Callable]) -> None
+        LeafMasterCache.__init__(self, root_dir, cache_classes, config=config, max_size=max_size,
+                                 save_fn=save_fn)
+        self._local = threading.local()
+        self._frame_lock = threading.Lock()
+        self._patched = []  # type: List[Tuple[type, Any]]
+        self._watched = []  # type: List[Any]
+        self._run_deps = {}  # type: Dict[Tuple[int, str], Dict[str, str]]
+
+    def get_dependency_info(self):
+        # type: () -> Dict[str, Dict[str, Any]]
+        """Returns the recorded dependencies, as a dictionary from entry key to entry info.
+
+        Each entry info contains the generator class (cls), the parameter keys it reads
+        (reads), and the source hashes of its descendant classes (deps).
+        """
+        return self._read_index()
+
+    def new_template(self, template, params, temp_cls):
+        # type: (TemplateBase, Dict[str, Any], Type[TemplateBase]) -> TemplateBase
+        """Create a sub-master of the given template, reusing the cached layout if possible.
+
+        Parameters
+        ----------
+        template : TemplateBase
+            the parent template.
+        params : Dict[str, Any]
+            the sub-master parameters.
+        temp_cls : Type[TemplateBase]
+            the sub-master class.
+
+        Returns
+        -------
+        master : TemplateBase
+            the sub-master.  On a cache hit from a previous run this is a CachedTemplate.
+        """
+        if not self.is_leaf(temp_cls):
+            return template.new_template(params=params, temp_cls=temp_cls)
+
+        cls_name = _get_class_name(temp_cls)
+        full_params = temp_cls.get_default_param_values().copy()
+        full_params.update(params)
+        db_id = id(template.template_db)
+        run_key = (db_id, self.get_key(temp_cls, full_params, template.grid))
+        master = self._masters.get(run_key, None)
+        if master is not None:
+            self._add_deps(cls_name, temp_cls, self._run_deps[run_key])
+            return master
+
+        index = self._read_index()
+        key = self._find_entry(index, temp_cls, cls_name, full_params, template.grid)
+        if key is not None:
+            deps = index[key]['deps']
+            # the entry may have been generated or read earlier in this run with different
+            # values of parameters it does not read
+            master = self._masters.get((db_id, key), None)
+            if master is None:
+                master = self._load(template, key)
+                if master is not None:
+                    self._stats['hits'] += 1
+                    self._masters[(db_id, key)] = master
+        if master is None:
+            self._stats['misses'] += 1
+            self._instrument(temp_cls)
+            self._watch(template.template_db)
+            frame = _RecordFrame(temp_cls)
+            self._local.pending = frame
+            try:
+                master = template.new_template(params=params, temp_cls=temp_cls)
+            finally:
+                self._local.pending = None
+
+            deps = frame.deps
+            # if the master was generated earlier, its parameter reads are unknown.
+            if frame.reads is not None:
+                key = self._get_entry_key(temp_cls, full_params, frame.reads, template.grid)
+                self._store(key, master, dict(cls=cls_name, reads=frame.reads, deps=deps))
+                self._masters[(db_id, key)] = master
+
+        self._masters[run_key] = master
+        self._run_deps[run_key] = deps
+        self._add_deps(cls_name, temp_cls, deps)
+        return master
+
+    def has_entry(self, template, params, temp_cls):
+        # type: (TemplateBase, Dict[str, Any], type) -> bool
+        """Returns True if the given sub-master is available without generating it."""
+        full_params = temp_cls.get_default_param_values().copy()
+        full_params.update(params)
+        run_key = (id(template.template_db), self.get_key(temp_cls, full_params, template.grid))
+        if run_key in self._masters:
+            return True
+        key = self._find_entry(self._read_index(), temp_cls, _get_class_name(temp_cls),
+                               full_params, template.grid)
+        return key is not None
+
+    def disable(self):
+        # type: () -> None
+        """Restore the draw_layout() and TemplateDB methods instrumented by this cache."""
+        with self._frame_lock:
+            for temp_cls, fun in reversed(self._patched):
+                if fun is None:
+                    del temp_cls.draw_layout
+                else:
+                    temp_cls.draw_layout = fun
+            for temp_db in self._watched:
+                del temp_db.new_template
+            del self._patched[:]
+            del self._watched[:]
+
+    def _get_entry_key(self, temp_cls, full_params, reads, grid):
+        # type: (type, Dict[str, Any], List[str], Any) -> str
+        read_params = {k: full_params.get(k, self._missing) for k in reads}
+        return self.get_key(temp_cls, read_params, grid)
+
+    def _find_entry(self, index, temp_cls, cls_name, full_params, grid):
+        # type: (Dict[str, Dict[str, Any]], type, str, Dict[str, Any], Any) -> Optional[str]
+        reads_set = set(tuple(info['reads']) for info in index.values()
+                        if info.get('cls', None) == cls_name)
+        for reads in reads_set:
+            key = self._get_entry_key(temp_cls, full_params, list(reads), grid)
+            info = index.get(key, None)
+            if (info is not None and os.path.isfile(self.get_cache_fname(key)) and
+                    self._deps_valid(info['deps'])):
+                return key
+        return None
+
+    def _deps_valid(self, deps):
+        # type: (Dict[str, str]) -> bool
+        for cls_name, src_hash in deps.items():
+            mod_name, attr_name = cls_name.rsplit('.', 1)
+            try:
+                dep_cls = getattr(importlib.import_module(mod_name), attr_name)
+            except (ImportError, AttributeError):
+                return False
+            if self.get_source_hash(dep_cls) != src_hash:
+                return False
+        return True
+
+    def _get_stack(self):
+        # type: () -> List[_RecordFrame]
+        """Returns the frames of the masters being recorded in this thread."""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _add_deps(self, cls_name, temp_cls, deps):
+        # type: (str, type, Dict[str, str]) -> None
+        """Add the given class and dependencies to every master being recorded."""
+        stack = self._get_stack()
+        if stack:
+            src_hash = self.get_source_hash(temp_cls)
+            for frame in stack:
+                frame.deps[cls_name] = src_hash
+                frame.deps.update(deps)
+
+    def _watch(self, temp_db):
+        # type: (Any) -> None
+        """Record the class of every master the given TemplateDB creates while recording.
+
+        This covers descendants that are not cached, and masters the TemplateDB reuses.
+        """
+        with self._frame_lock:
+            if any(temp_db is db for db in self._watched):
+                return
+            self._watched.append(temp_db)
+            fun = temp_db.new_template
+            sig = inspect.signature(fun)
+            cache = self
+
+            @functools.wraps(fun)
+            def new_template(*args, **kwargs):
+                temp_cls = sig.bind_partial(*args, **kwargs).arguments.get('temp_cls', None)
+                if temp_cls is not None and temp_cls is not CachedTemplate:
+                    cache._add_deps(_get_class_name(temp_cls), temp_cls, {})
+                return fun(*args, **kwargs)
+
+            temp_db.new_template = new_template
+
+    def _instrument(self, temp_cls):
+        # type: (type) -> None
+        with self._frame_lock:
+            if any(temp_cls is cls for cls, _ in self._patched):
+                return
+            self._patched.append((temp_cls, temp_cls.__dict__.get('draw_layout', None)))
+            fun = temp_cls.draw_layout
+            cache = self
+
+            @functools.wraps(fun)
+            def draw_layout(temp_self):
+                frame = getattr(cache._local, 'pending', None)
+                if frame is None or type(temp_self) is not frame.temp_cls:
+                    return fun(temp_self)
+
+                # draw_layout() of the master being recorded
+                cache._local.pending = None
+                params = temp_self.params
+                recorder = ParamsRecorder(params)
+                temp_self.params = recorder
+                stack = cache._get_stack()
+                stack.append(frame)
+                try:
+                    return fun(temp_self)
+                finally:
+                    temp_self.params = params
+                    stack.pop()
+                    frame.reads = sorted(str(k) for k in recorder.reads)
+
+            temp_cls.draw_layout = draw_layout
+
+
+def get_params_key(params):
+    # type: (Dict[str, Any]) -> str
+    """Returns a hashable key of the given parameter dictionary that ignores dictionary order."""
+    return json.dumps(_to_json(params))
+
+
+def get_grid_key(grid):
+    # type: (RoutingGrid) -> str
+    """Returns a hashable key of the given routing grid configuration.
+
+    The key covers the technology class, the resolution, the layout unit, the flip parity, and
+    the direction, pitch, width, offset, and block pitch of every routing layer.  Two grids
+    with the same key give the same track coordinates and design rules, so it can be used to
+    share geometry between templates and TemplateDBs.
+
+    The key is computed once per grid object and then looked up by identity, so a grid must
+    not be modified after its key is used.  Templates that modify their grid do so at the
+    start of draw_layout(), before any geometry is looked up.
+    """
+    try:
+        return _grid_key_table[grid]
+    except KeyError:
+        pass
+    except TypeError:
+        # grid cannot be weakly referenced or hashed
+        return _compute_grid_key(grid)
+
+    key = _grid_key_table[grid] = _compute_grid_key(grid)
+    return key
+
+
+def _compute_grid_key(grid):
+    # type: (RoutingGrid) -> str
+    tech_info = getattr(grid, 'tech_info', None)
+    content = dict(
+        tech=None if tech_info is None else _get_class_name(type(tech_info)),
+        resolution=grid.resolution,
+        layout_unit=grid.layout_unit,
+        flip_parity=grid.get_flip_parity(),
+    )
+    for name in _grid_attr_list:
+        content[name] = getattr(grid, name, None)
+    return json.dumps(_to_json(content))
+
+
+def _get_class_name(temp_cls):
+    # type: (type) -> str
+    """Returns the full name of the given class."""
+    return '%s.%s' % (temp_cls.__module__, temp_cls.__name__)
+
+
+def _to_json(obj):
+    # type: (Any) -> Any
+    """Convert the given parameter object to a JSON-compatible object with a stable ordering.
+
+    Raises ValueError on objects without a stable value representation, as their repr() may
+    contain memory addresses or truncated data.
+    """
+    if hasattr(obj, 'items'):
+        items = sorted(obj.items(), key=lambda x: str(x[0]))
+        return [[str(key), _to_json(val)] for key, val in items]
+    if isinstance(obj, (list, tuple)):
+        return [_to_json(val) for val in obj]
+    if obj is None or isinstance(obj, (bool, str)):
+        return obj
+    if isinstance(obj, numbers.Integral):
+        return int(obj)
+    if isinstance(obj, numbers.Real):
+        return float(obj)
+    raise ValueError('Cannot build a key from object of type %s: %r' % (type(obj).__name__, obj))
@@ -2,13 +2,15 @@
 
 """This module defines digital buffer templates."""
 
-from typing import TYPE_CHECKING, Dict, Any, Set, List
+from typing import TYPE_CHECKING, Dict, Any, Set, List, Union, Tuple
 
 from bag.layout.routing.base import TrackID, WireArray, TrackManager
 
 from digital_ec.layout.stdcells.core import StdDigitalTemplate
 from digital_ec.layout.stdcells.inv import InvChain
 
+from ..cache import get_grid_key, get_params_key
+
 if TYPE_CHECKING:
     from bag.layout.template import TemplateDB
 
@@ -33,6 +35,10 @@ class BufferRow(StdDigitalTemplate):
 
     _blk_sp = 2
 
+    # InvChain middle vm track index, keyed on the routing grid and the InvChain parameters
+    # that affect it.
+    _mid_tidx_table = {}  # type: Dict[Tuple[str, str], Union[float, int]]
+
     def __init__(self, temp_db, lib_name, params, used_names, **kwargs):
         # type: (TemplateDB, str, Dict[str, Any], Set[str], **kwargs) -> None
         StdDigitalTemplate.__init__(self, temp_db, lib_name, params, used_names, **kwargs)
@@ -47,7 +53,7 @@ class BufferRow(StdDigitalTemplate):
     def get_cache_properties(cls):
         # type: () -> List[str]
         """Returns a list of properties to cache."""
-        return ['sch_params']
+        return ['sch_params', 'row_layout_info']
 
     @classmethod
     def get_params_info(cls):
@@ -92,8 +98,7 @@ class BufferRow(StdDigitalTemplate):
 
         base_params = self.params.copy()
         base_params['show_pins'] = False
-        master = self.new_template(params=base_params, temp_cls=InvChain)
-        mid_tidx = master.mid_tidx
+        mid_tidx = self.get_inv_mid_tidx(base_params)
         base_params['sig_locs'] = dict(out=mid_tidx + out_delta)
         master = self.new_template(params=base_params, temp_cls=InvChain)
         vm_layer = master.get_port('out').get_pins()[0].layer_id
@@ -146,6 +151,23 @@ class BufferRow(StdDigitalTemplate):
             buf_params=master.sch_params
         )
 
+    def get_inv_mid_tidx(self, inv_params):
+        # type: (Dict[str, Any]) -> Union[float, int]
+        """Returns the middle vm track index of the InvChain with the given parameters.
+
+        The track index does not depend on sig_locs, so it is recorded in a class-level table,
+        and a probe InvChain master is only created the first time a parameter set is queried.
+        """
+        params_info = InvChain.get_params_info()
+        key_params = {key: val for key, val in inv_params.items()
+                      if key in params_info and key != 'sig_locs' and key != 'show_pins'}
+        key = (get_grid_key(self.grid), get_params_key(key_params))
+        mid_tidx = self._mid_tidx_table.get(key, None)
+        if mid_tidx is None:
+            master = self.new_template(params=inv_params, temp_cls=InvChain)
+            mid_tidx = self._mid_tidx_table[key] = master.mid_tidx
+        return mid_tidx
+
     @classmethod
     def compute_num_cols(cls, tech_info, lch_unit, nbuf, seg_list):
         tap_ncol = cls.get_sub_columns(tech_info, lch_unit)
@@ -0,0 +1,486 @@
+# -*- coding: utf-8 -*-
+
+"""This module defines a tile based maximum space fill engine.
+
+A fill region is partitioned into tiles on a global grid.  Tiles that do not touch any blockage
+are drawn as instance arrays of a single fill tile master, so their fill shapes are only
+generated once per layer range.  Boundary strips and tiles touching a blockage are filled with
+track fill: the free intervals of every fill track are computed from the blockage boxes as
+plain data, in a process pool for large jobs, and the resulting wires are inserted in sorted
+order.
+
+This only pays off for large empty regions, such as the space above the termination resistor
+and capacitor.  Power fill is not tiled: abs_templates_ec's PowerFill already covers regions
+that are free of blockages, and in-place fill has to connect to the existing supply wires.
+The dummy fill between RXDatapath columns stays in place as well: those gaps are narrower than
+a tile, and the column to column routing that crosses them is not available as blockages for
+track fill.
+"""
+
+from typing import TYPE_CHECKING, Dict, Set, Any, List, Tuple, Optional, Sequence
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from bag.layout.util import BBox
+from bag.layout.template import TemplateBase
+
+from .cache import get_params_key
+
+if TYPE_CHECKING:
+    from bag.layout.routing import RoutingGrid, WireArray
+    from bag.layout.template import TemplateDB
+
+    # (column index, row index, number of columns, number of rows) of a tile array
+    TileArray = Tuple[int, int, int, int]
+    # (first track, last track, lower, upper) of a blockage on a layer
+    TrackBlockage = Tuple[int, int, int, int]
+    # (layer ID, first track, last track, track step, lower, upper, blockages, minimum length)
+    TrackFillJob = Tuple[int, int, int, int, int, int, Tuple[TrackBlockage, ...], int]
+    # (layer ID, lower, upper, track pitch, first track, number of tracks) of a fill wire array
+    TrackFillArray = Tuple[int, int, int, int, int, int]
+
+
+def get_fill_tiles(bnd_box, blk_w, blk_h, blockages=None):
+    # type: (BBox, int, int, Optional[Sequence[BBox]]) -> Tuple[List[TileArray], List[BBox]]
+    """Partition the given region into fill tiles.
+
+    Tiles lie on a grid with pitch (blk_w, blk_h) anchored at the origin.  Tiles that touch a
+    blockage box are not drawn as instances.  Free tiles in consecutive columns form row runs,
+    and identical row runs in consecutive rows are merged into a single array.
+
+    Parameters
+    ----------
+    bnd_box : BBox
+        the fill region.
+    blk_w : int
+        the tile width, in resolution units.
+    blk_h : int
+        the tile height, in resolution units.
+    blockages : Optional[Sequence[BBox]]
+        list of blockage boxes.
+
+    Returns
+    -------
+    arr_list : List[TileArray]
+        list of tile arrays, sorted by row then column.
+    box_list : List[BBox]
+        list of boxes to fill in place.  These are the boundary strips of the region and the
+        blocked tiles.
+    """
+    res = bnd_box.resolution
+    xl = bnd_box.left_unit
+    yb = bnd_box.bottom_unit
+    xr = bnd_box.right_unit
+    yt = bnd_box.top_unit
+    ix0 = -(-xl // blk_w)
+    ix1 = xr // blk_w
+    iy0 = -(-yb // blk_h)
+    iy1 = yt // blk_h
+    if ix1 <= ix0 or iy1 <= iy0:
+        return [], [bnd_box] if xl < xr and yb < yt else []
+
+    x0, x1 = ix0 * blk_w, ix1 * blk_w
+    y0, y1 = iy0 * blk_h, iy1 * blk_h
+    box_list = []
+    for bl, bb, br, bt in ((xl, yb, xr, y0), (xl, y1, xr, yt), (xl, y0, x0, y1),
+                           (x1, y0, xr, y1)):
+        if bl < br and bb < bt:
+            box_list.append(BBox(bl, bb, br, bt, res, unit_mode=True))
+
+    blk_list = [] if blockages is None else [(box.left_unit, box.bottom_unit, box.right_unit,
+                                              box.top_unit) for box in blockages]
+
+    # runs of the previous row, (column index, number of columns, is free) -> start row index
+    arr_list = []
+    blk_runs = []
+    prev_runs = {}  # type: Dict[Tuple[int, int, bool], int]
+    for iy in range(iy0, iy1):
+        cb = iy * blk_h
+        ct = cb + blk_h
+        row_blk = [(bl, br) for bl, bb, br, bt in blk_list if bb <= ct and bt >= cb]
+        cur_runs = {}
+        run_start = ix0
+        run_free = None
+        for ix in range(ix0, ix1 + 1):
+            if ix < ix1:
+                cl = ix * blk_w
+                cr = cl + blk_w
+                free = not any(bl <= cr and br >= cl for bl, br in row_blk)
+            else:
+                free = None
+            if free != run_free:
+                if run_free is not None:
+                    key = (run_start, ix - run_start, run_free)
+                    cur_runs[key] = prev_runs.get(key, iy)
+                run_start = ix
+                run_free = free
+        _add_runs(prev_runs, cur_runs, iy, arr_list, blk_runs)
+        prev_runs = cur_runs
+    _add_runs(prev_runs, {}, iy1, arr_list, blk_runs)
+
+    arr_list.sort(key=lambda v: (v[1], v[0]))
+    blk_runs.sort(key=lambda v: (v[1], v[0]))
+    for ix, iy, nx, ny in blk_runs:
+        box_list.append(BBox(ix * blk_w, iy * blk_h, (ix + nx) * blk_w, (iy + ny) * blk_h, res,
+                             unit_mode=True))
+    return arr_list, box_list
+
+
+def get_wire_blockages(grid, warr_list, bot_layer, top_layer):
+    # type: (RoutingGrid, Sequence[Optional[WireArray]], int, int) -> List[BBox]
+    """Returns the fill blockages of the given wires on layers bot_layer to top_layer.
+
+    Each wire bounding box is expanded by one track pitch of its layer, so fill tiles within
+    spacing distance of a wire are filled in place.  None entries are ignored.
+
+    Parameters
+    ----------
+    grid : RoutingGrid
+        the routing grid.
+    warr_list : Sequence[Optional[WireArray]]
+        the wires drawn in the fill region.
+    bot_layer : int
+        the bottom fill layer.
+    top_layer : int
+        the top fill layer.
+
+    Returns
+    -------
+    blockages : List[BBox]
+        the blockage boxes.
+    """
+    blockages = []
+    for warr in warr_list:
+        if warr is not None and bot_layer <= warr.layer_id <= top_layer:
+            pitch = grid.get_track_pitch(warr.layer_id, unit_mode=True)
+            for box in warr.get_bbox_array(grid):
+                blockages.append(box.expand(dx=pitch, dy=pitch, unit_mode=True))
+    return blockages
+
+
+def get_track_fill(job):
+    # type: (TrackFillJob) -> List[TrackFillArray]
+    """Returns the fill wires of a track fill job.
+
+    Every track from the first to the last track, in steps of the track step, is filled from
+    lower to upper, except for the intervals of the blockages covering that track.  Free
+    intervals shorter than the minimum length are skipped.  Wires with the same extent on
+    consecutive fill tracks are merged into one wire array.  This function only works on plain
+    data, so it can run in a worker process.
+
+    Parameters
+    ----------
+    job : TrackFillJob
+        the track fill job, as returned by get_track_fill_job().
+
+    Returns
+    -------
+    arr_list : List[TrackFillArray]
+        the fill wire arrays.
+    """
+    layer_id, tr0, tr1, step, lower, upper, blk_list, min_len = job
+    # sweep over the tracks, keeping the blockages that cover the current track
+    blk_list = sorted(blk_list)
+    num_blk = len(blk_list)
+    blk_idx = 0
+    active = []  # type: List[TrackBlockage]
+    # wire arrays that continue on the current track, (lower, upper) -> (first track, count)
+    runs = {}  # type: Dict[Tuple[int, int], Tuple[int, int]]
+    arr_list = []
+    for tr_idx in range(tr0, tr1 + 1, step):
+        while blk_idx < num_blk and blk_list[blk_idx][0] <= tr_idx:
+            active.append(blk_list[blk_idx])
+            blk_idx += 1
+        active = [blk for blk in active if blk[1] >= tr_idx]
+        intv_list = []
+        cur = lower
+        for lo, hi in sorted((blk[2], blk[3]) for blk in active):
+            if lo - cur >= min_len:
+                intv_list.append((cur, min(lo, upper)))
+            cur = max(cur, hi)
+            if cur >= upper:
+                break
+        if upper - cur >= min_len:
+            intv_list.append((cur, upper))
+
+        next_runs = {}
+        for intv in intv_list:
+            run_tr, run_num = runs.pop(intv, (tr_idx, 0))
+            next_runs[intv] = (run_tr, run_num + 1)
+        for (lo, hi), (run_tr, run_num) in runs.items():
+            arr_list.append((layer_id, lo, hi, step, run_tr, run_num))
+        runs = next_runs
+    for (lo, hi), (run_tr, run_num) in runs.items():
+        arr_list.append((layer_id, lo, hi, step, run_tr, run_num))
+    return arr_list
+
+
+def get_track_fill_job(grid, layer_id, bnd_box, fill_pitch=1, blockages=None):
+    # type: (RoutingGrid, int, BBox, int, Optional[Sequence[BBox]]) -> Optional[TrackFillJob]
+    """Returns the track fill job of the given layer and region.
+
+    Fill tracks are the tracks with index divisible by fill_pitch, so neighbouring regions use
+    the same tracks.  Fill wires stay half a track pitch across and half a line-end space along
+    from the region boundary, so fill wires of neighbouring regions are far enough apart.  A
+    track is blocked by a blockage box if its wire would overlap the box, and the blocked
+    interval is the box extended by the line-end space.  Free intervals shorter than twice the
+    line-end space are not filled.
+
+    Parameters
+    ----------
+    grid : RoutingGrid
+        the routing grid.
+    layer_id : int
+        the fill layer.
+    bnd_box : BBox
+        the fill region.
+    fill_pitch : int
+        the fill pitch, in number of tracks.
+    blockages : Optional[Sequence[BBox]]
+        list of blockage boxes.
+
+    Returns
+    -------
+    job : Optional[TrackFillJob]
+        the track fill job, or None if no track fits in the region.
+    """
+    is_horiz = grid.get_direction(layer_id) == 'x'
+    pitch = grid.get_track_pitch(layer_id, unit_mode=True)
+    sp_le = grid.get_line_end_space(layer_id, 1, unit_mode=True)
+    if is_horiz:
+        p0, p1, lower, upper = (bnd_box.bottom_unit, bnd_box.top_unit, bnd_box.left_unit,
+                                bnd_box.right_unit)
+    else:
+        p0, p1, lower, upper = (bnd_box.left_unit, bnd_box.right_unit, bnd_box.bottom_unit,
+                                bnd_box.top_unit)
+    lower += -(-sp_le // 2)
+    upper -= -(-sp_le // 2)
+    tr0 = int(grid.find_next_track(layer_id, p0 + pitch // 2, mode=1, unit_mode=True))
+    tr1 = int(grid.find_next_track(layer_id, p1 - pitch // 2, mode=-1, unit_mode=True))
+    tr0 = -(-tr0 // fill_pitch) * fill_pitch
+    if tr1 < tr0 or upper <= lower:
+        return None
+
+    blk_list = []
+    for box in ([] if blockages is None else blockages):
+        if is_horiz:
+            q0, q1, b0, b1 = box.bottom_unit, box.top_unit, box.left_unit, box.right_unit
+        else:
+            q0, q1, b0, b1 = box.left_unit, box.right_unit, box.bottom_unit, box.top_unit
+        b0 -= sp_le
+        b1 += sp_le
+        if b1 > lower and b0 < upper:
+            t0 = int(grid.find_next_track(layer_id, q0, mode=-1, unit_mode=True)) + 1
+            t1 = int(grid.find_next_track(layer_id, q1, mode=1, unit_mode=True)) - 1
+            if t0 <= tr1 and t1 >= tr0 and t0 <= t1:
+                blk_list.append((t0, t1, b0, b1))
+
+    blk_list.sort()
+    return layer_id, tr0, tr1, fill_pitch, lower, upper, tuple(blk_list), 2 * sp_le
+
+
+def run_track_fill(job_list, max_workers=1, chunk_size=1024):
+    # type: (Sequence[TrackFillJob], int, int) -> List[TrackFillArray]
+    """Compute the fill wire arrays of the given track fill jobs.
+
+    Jobs are split into chunks of at most chunk_size fill tracks.  With more than one worker,
+    the chunks are solved in a process pool.  The chunks do not depend on the number of
+    workers, and the wire arrays are sorted, so the result does not depend on the number of
+    workers or on the order the chunks finish in.
+
+    Parameters
+    ----------
+    job_list : Sequence[TrackFillJob]
+        the track fill jobs.
+    max_workers : int
+        the maximum number of worker processes.
+    chunk_size : int
+        the maximum number of fill tracks in a chunk.
+
+    Returns
+    -------
+    arr_list : List[TrackFillArray]
+        the sorted fill wire arrays of all jobs.
+    """
+    chunk_list = []
+    for layer_id, tr0, tr1, step, lower, upper, blk_list, min_len in job_list:
+        for start in range(tr0, tr1 + 1, step * chunk_size):
+            stop = min(tr1, start + step * (chunk_size - 1))
+            cur_blk = tuple(blk for blk in blk_list if blk[0] <= stop and blk[1] >= start)
+            chunk_list.append((layer_id, start, stop, step, lower, upper, cur_blk, min_len))
+
+    if max_workers > 1 and len(chunk_list) > 1:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(chunk_list))) as executor:
+            results = list(executor.map(get_track_fill, chunk_list))
+    else:
+        results = [get_track_fill(chunk) for chunk in chunk_list]
+
+    arr_list = [arr for result in results for arr in result]
+    arr_list.sort()
+    return arr_list
+
+
+def _add_runs(prev_runs,  # type: Dict[Tuple[int, int, bool], int]
+              cur_runs,  # type: Dict[Tuple[int, int, bool], int]
+              iy,  # type: int
+              arr_list,  # type: List[TileArray]
+              blk_runs,  # type: List[TileArray]
+              ):
+    # type: (...) -> None
+    """Close the row runs of the previous row that do not continue in the current row."""
+    for (ix, nx, free), iy_start in prev_runs.items():
+        if (ix, nx, free) not in cur_runs:
+            if free:
+                arr_list.append((ix, iy_start, nx, iy - iy_start))
+            else:
+                blk_runs.append((ix, iy_start, nx, iy - iy_start))
+
+
+class FillBuilder(object):
+    """Draws the tiled maximum space fill of many regions of a template.
+
+    Each call to add_space_fill() partitions a region into tiles and places the tile arrays
+    right away.  Tile masters with the same parameters are generated once and shared between
+    regions.  The track fill jobs of the boundary strips and blocked tiles of every region are
+    collected, and draw_track_fill() solves them, in worker processes if there are enough
+    tracks, and inserts the fill wires in sorted order.  Only draw_track_fill() runs in worker
+    processes; generating masters and inserting shapes modify the template database, so they
+    stay on the calling thread.
+
+    Parameters
+    ----------
+    template : TemplateBase
+        the template to draw fill in.
+    max_workers : Optional[int]
+        the maximum number of worker processes.  Defaults to the number of CPUs.
+    """
+
+    # minimum number of fill tracks to use worker processes.  Below this, starting the process
+    # pool takes longer than solving the jobs serially.
+    parallel_threshold = 20000
+
+    def __init__(self, template, max_workers=None):
+        # type: (TemplateBase, Optional[int]) -> None
+        self._template = template
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        self._max_workers = max_workers
+        self._tile_masters = {}  # type: Dict[str, TemplateBase]
+        self._jobs = []  # type: List[TrackFillJob]
+
+    def add_space_fill(self, bot_layer, top_layer, bnd_box, fill_pitch=1, num_blk=4,
+                       blockages=None):
+        # type: (int, int, BBox, int, int, Optional[Sequence[BBox]]) -> None
+        """Draw maximum space fill on the given layers with tiled instance arrays.
+
+        Tiles are SpaceFillTile masters of num_blk blocks of top_layer in each direction.
+        Blocked tiles and the boundary strips are filled with track fill that avoids the
+        blockages, drawn by draw_track_fill().
+
+        Parameters
+        ----------
+        bot_layer : int
+            the bottom fill layer.
+        top_layer : int
+            the top fill layer.
+        bnd_box : BBox
+            the fill region.
+        fill_pitch : int
+            the fill pitch, in number of tracks.
+        num_blk : int
+            the tile size, in number of blocks of top_layer.
+        blockages : Optional[Sequence[BBox]]
+            list of blockage boxes.  These must cover every shape in the region on the fill
+            layers.  Tiles touching these are filled with track fill.
+        """
+        template = self._template
+        blk_w, blk_h = template.grid.get_block_size(top_layer, unit_mode=True)
+        blk_w *= num_blk
+        blk_h *= num_blk
+        arr_list, box_list = get_fill_tiles(bnd_box, blk_w, blk_h, blockages=blockages)
+        if arr_list:
+            params = dict(
+                bot_layer=bot_layer,
+                top_layer=top_layer,
+                width=blk_w,
+                height=blk_h,
+                fill_pitch=fill_pitch,
+            )
+            key = get_params_key(params)
+            master = self._tile_masters.get(key, None)
+            if master is None:
+                master = template.new_template(params=params, temp_cls=SpaceFillTile)
+                self._tile_masters[key] = master
+            for ix, iy, nx, ny in arr_list:
+                template.add_instance(master, loc=(ix * blk_w, iy * blk_h), nx=nx, ny=ny,
+                                      spx=blk_w, spy=blk_h, unit_mode=True)
+
+        for box in box_list:
+            for lay in range(bot_layer, top_layer + 1):
+                job = get_track_fill_job(template.grid, lay, box, fill_pitch=fill_pitch,
+                                         blockages=blockages)
+                if job is not None:
+                    self._jobs.append(job)
+
+    def draw_track_fill(self):
+        # type: () -> None
+        """Solve the collected track fill jobs and draw the fill wires."""
+        num_tracks = sum((job[2] - job[1]) // job[3] + 1 for job in self._jobs)
+        max_workers = self._max_workers if num_tracks >= self.parallel_threshold else 1
+        arr_list = run_track_fill(self._jobs, max_workers=max_workers)
+        del self._jobs[:]
+
+        template = self._template
+        for layer_id, lower, upper, step, tr_idx, num in arr_list:
+            template.add_wires(layer_id, tr_idx, lower, upper, num=num, pitch=step,
+                               unit_mode=True)
+
+
+class SpaceFillTile(TemplateBase):
+    """A maximum space fill tile.
+
+    Parameters
+    ----------
+    temp_db : :class:`bag.layout.template.TemplateDB`
+        the template database.
+    lib_name : str
+        the layout library name.
+    params : Dict[str, Any]
+        the parameter values.
+    used_names : Set[str]
+        a set of already used cell names.
+    **kwargs :
+        dictionary of optional parameters.  See documentation of
+        :class:`bag.layout.template.TemplateBase` for details.
+    """
+
+    def __init__(self, temp_db, lib_name, params, used_names, **kwargs):
+        # type: (TemplateDB, str, Dict[str, Any], Set[str], **kwargs) -> None
+        TemplateBase.__init__(self, temp_db, lib_name, params, used_names, **kwargs)
+
+    @classmethod
+    def get_params_info(cls):
+        # type: () -> Dict[str, str]
+        return dict(
+            bot_layer='bottom fill layer.',
+            top_layer='top fill layer.',
+            width='tile width, in resolution units.',
+            height='tile height, in resolution units.',
+            fill_pitch='fill pitch, in number of tracks.',
+        )
+
+    def draw_layout(self):
+        # type: () -> None
+        bot_layer = self.params['bot_layer']
+        top_layer = self.params['top_layer']
+        width = self.params['width']
+        height = self.params['height']
+        fill_pitch = self.params['fill_pitch']
+
+        self.array_box = bnd_box = BBox(0, 0, width, height, self.grid.resolution,
+                                        unit_mode=True)
+        self.set_size_from_bound_box(top_layer, bnd_box)
+
+        for lay in range(bot_layer, top_layer + 1):
+            self.do_max_space_fill(lay, bnd_box, fill_pitch=fill_pitch)
@@ -2,7 +2,7 @@
 
 """This module contains LaygoBase templates used in Hybrid-QDR receiver."""
 
-from typing import TYPE_CHECKING, Dict, Any, Set, Union
+from typing import TYPE_CHECKING, Dict, Any, Set, Union, List
 
 from itertools import chain
 
@@ -891,6 +891,12 @@ class EnableRetimer(LaygoBase):
         return (num_col, ncol_ff0, ncol_ff1, ncol_lat0,
                 seg_in, seg_fb, seg_out, seg_buf, blk_sp, inc_coll, inc_colr)
 
+    @classmethod
+    def get_cache_properties(cls):
+        # type: () -> List[str]
+        """Returns a list of properties to cache."""
+        return ['sch_params', 'fg_tot', 'en3_htr_tidx']
+
     @classmethod
     def get_params_info(cls):
         # type: () -> Dict[str, str]
@@ -1211,6 +1217,12 @@ class DividerGroup(TemplateBase):
         seg_re = EnableRetimer.get_col_info(seg_dict, abut_mode)[0]
         return max(seg_div, seg_re)
 
+    @classmethod
+    def get_cache_properties(cls):
+        # type: () -> List[str]
+        """Returns a list of properties to cache."""
+        return ['sch_params', 'fg_tot', 'sa_clk_tidx']
+
     @classmethod
     def get_params_info(cls):
         # type: () -> Dict[str, str]
@@ -1438,6 +1450,12 @@ class SinClkDivider(LaygoBase):
         seg_tot = seg_inv + seg_int + seg_sr + seg_nor + 3 * blk_sp + inc_coll + inc_colr
         return seg_tot, blk_sp, seg_inv, seg_int, seg_sr, seg_nor, inc_coll, inc_colr
 
+    @classmethod
+    def get_cache_properties(cls):
+        # type: () -> List[str]
+        """Returns a list of properties to cache."""
+        return ['sch_params', 'fg_tot', 'sa_clk_tidx']
+
     @classmethod
     def get_params_info(cls):
         # type: () -> Dict[str, str]
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 
-from typing import TYPE_CHECKING, Dict, Any, Set
+from typing import TYPE_CHECKING, Dict, Any, Set, List
 
 from bag.layout.routing import TrackID, TrackManager
 
@@ -48,6 +48,12 @@ class SenseAmpStrongArm(LaygoBase):
         # type: () -> int
         return self._fg_tot
 
+    @classmethod
+    def get_cache_properties(cls):
+        # type: () -> List[str]
+        """Returns a list of properties to cache."""
+        return ['sch_params', 'fg_tot']
+
     @classmethod
     def get_params_info(cls):
         # type: () -> Dict[str, str]
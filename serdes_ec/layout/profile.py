@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+"""This module defines a hierarchical profiler for layout generation."""
+
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+import os
+import json
+import time
+import inspect
+import pkgutil
+import resource
+import importlib
+import functools
+from contextlib import contextmanager
+
+from bag.layout.template import TemplateBase
+
+
+class ProfileNode(object):
+    """A node in the layout generation timing tree.
+
+    Parameters
+    ----------
+    name : str
+        the node name.
+    """
+
+    def __init__(self, name):
+        # type: (str) -> None
+        self.name = name
+        self.calls = 0
+        self.wall_time = 0.0
+        self.child_time = 0.0
+        self.num_masters = 0
+        self.num_hits = 0
+        self.peak_rss_delta = 0
+        self.children = {}  # type: Dict[str, ProfileNode]
+
+    @property
+    def self_time(self):
+        # type: () -> float
+        return self.wall_time - self.child_time
+
+    def get_child(self, name):
+        # type: (str) -> ProfileNode
+        node = self.children.get(name, None)
+        if node is None:
+            node = self.children[name] = ProfileNode(name)
+        return node
+
+    def to_dict(self):
+        # type: () -> Dict[str, Any]
+        """Returns a JSON-compatible dictionary representation of this tree."""
+        return dict(
+            name=self.name,
+            calls=self.calls,
+            wall_time=self.wall_time,
+            self_time=self.self_time,
+            num_masters=self.num_masters,
+            num_hits=self.num_hits,
+            peak_rss_delta_kb=self.peak_rss_delta,
+            children=[child.to_dict() for child in self.children.values()],
+        )
+
+    def folded_iter(self, prefix=''):
+        # type: (str) -> Iterator[Tuple[str, int]]
+        """Iterates over (stack, self time in microseconds) in flamegraph folded format."""
+        stack = self.name if not prefix else prefix + ';' + self.name
+        yield stack, int(round(self.self_time * 1e6))
+        for child in self.children.values():
+            yield from child.folded_iter(stack)
+
+
+class LayoutProfiler(object):
+    """Records a timing tree of layout generation.
+
+    When enabled, TemplateBase.new_template() and the draw_layout() methods of every template
+    in the given packages are instrumented.  Each new_template() call adds a node named after
+    the template class.  If draw_layout() is run inside it, a new master was created;
+    otherwise the TemplateDB reused an existing master, which counts as a cache hit.  Masters
+    and hits are only counted for instrumented templates.  Sibling nodes with the same name are
+    merged.
+
+    The peak RSS delta of a node is the largest increase of the process peak resident set size
+    over one call, in kilobytes.  As the process peak never decreases, this is the memory a
+    call added on top of everything allocated before it; a call that stays below the previous
+    peak counts as zero.  The profiler keeps a single call stack, so sub-masters must be
+    generated sequentially while profiling.  Masters prefetched in worker processes by
+    prefetch_leaf_templates() are not timed, and count as cache hits.
+
+    Parameters
+    ----------
+    packages : Optional[List[str]]
+        packages whose templates are instrumented.  Defaults to serdes_ec.layout.
+    """
+
+    def __init__(self, packages=None):
+        # type: (Optional[List[str]]) -> None
+        self._packages = ['serdes_ec.layout'] if packages is None else packages
+        self._root = ProfileNode('root')
+        self._stack = [self._root]  # type: List[ProfileNode]
+        self._patched = []  # type: List[Tuple[type, str, Any]]
+        self._drawing = set()
+        self._classes = set()
+
+    @property
+    def root(self):
+        # type: () -> ProfileNode
+        return self._root
+
+    def enable(self):
+        # type: () -> None
+        """Instrument new_template() and draw_layout() methods."""
+        if self._patched:
+            raise ValueError('Profiler is already enabled.')
+
+        self._patch(TemplateBase, 'new_template', self._wrap_new_template)
+        for temp_cls in self._get_template_classes():
+            self._classes.add(temp_cls)
+            self._patch(temp_cls, 'draw_layout', self._wrap_draw_layout)
+
+    def disable(self):
+        # type: () -> None
+        """Restore the original methods."""
+        for cls, attr, fun in reversed(self._patched):
+            setattr(cls, attr, fun)
+        del self._patched[:]
+        self._classes.clear()
+
+    def write_json(self, fname):
+        # type: (str) -> None
+        """Write the timing tree to the given JSON file."""
+        self._root.wall_time = sum(child.wall_time for child in self._root.children.values())
+        self._root.child_time = self._root.wall_time
+        with open(fname, 'w') as f:
+            json.dump(self._root.to_dict(), f, indent=2)
+
+    def write_folded(self, fname):
+        # type: (str) -> None
+        """Write the timing tree in flamegraph folded stack format."""
+        with open(fname, 'w') as f:
+            for child in self._root.children.values():
+                for stack, val in child.folded_iter():
+                    if val > 0:
+                        f.write('%s %d\n' % (stack, val))
+
+    def _get_template_classes(self):
+        # type: () -> List[type]
+        cls_list = []
+        for pkg_name in self._packages:
+            pkg = importlib.import_module(pkg_name)
+            mod_list = [pkg]
+            for info in pkgutil.walk_packages(pkg.__path__, prefix=pkg_name + '.'):
+                mod_list.append(importlib.import_module(info[1]))
+            for mod in mod_list:
+                for val in vars(mod).values():
+                    if (isinstance(val, type) and val.__module__ == mod.__name__ and
+                            issubclass(val, TemplateBase) and 'draw_layout' in val.__dict__):
+                        cls_list.append(val)
+        return cls_list
+
+    def _patch(self, cls, attr, wrapper):
+        fun = cls.__dict__[attr]
+        self._patched.append((cls, attr, fun))
+        setattr(cls, attr, wrapper(fun))
+
+    def _enter(self, name):
+        # type: (str) -> Tuple[ProfileNode, Tuple[float, int]]
+        node = self._stack[-1].get_child(name)
+        node.calls += 1
+        self._stack.append(node)
+        return node, (time.perf_counter(), _get_peak_rss())
+
+    def _exit(self, node, start):
+        # type: (ProfileNode, Tuple[float, int]) -> float
+        t0, rss0 = start
+        dt = time.perf_counter() - t0
+        self._stack.pop()
+        node.wall_time += dt
+        self._stack[-1].child_time += dt
+        node.peak_rss_delta = max(node.peak_rss_delta, _get_peak_rss() - rss0)
+        return dt
+
+    def _wrap_new_template(self, fun):
+        profiler = self
+        sig = inspect.signature(fun)
+
+        @functools.wraps(fun)
+        def new_template(temp_self, *args, **kwargs):
+            temp_cls = sig.bind_partial(temp_self, *args, **kwargs).arguments.get('temp_cls',
+                                                                                 None)
+            name = 'new_template' if temp_cls is None else temp_cls.__name__
+            node, start = profiler._enter(name)
+            num_masters = node.num_masters
+            try:
+                return fun(temp_self, *args, **kwargs)
+            finally:
+                if temp_cls in profiler._classes and node.num_masters == num_masters:
+                    node.num_hits += 1
+                profiler._exit(node, start)
+
+        return new_template
+
+    def _wrap_draw_layout(self, fun):
+        profiler = self
+
+        @functools.wraps(fun)
+        def draw_layout(temp_self):
+            temp_id = id(temp_self)
+            if temp_id in profiler._drawing:
+                # draw_layout() of a base class, called from the subclass
+                return fun(temp_self)
+
+            name = temp_self.__class__.__name__
+            parent = profiler._stack[-1]
+            profiler._drawing.add(temp_id)
+            try:
+                if parent.name == name:
+                    # draw_layout() of a new master created by new_template()
+                    parent.num_masters += 1
+                    return fun(temp_self)
+
+                # top level template
+                node, start = profiler._enter(name)
+                node.num_masters += 1
+                try:
+                    return fun(temp_self)
+                finally:
+                    profiler._exit(node, start)
+            finally:
+                profiler._drawing.discard(temp_id)
+
+        return draw_layout
+
+
+def _get_peak_rss():
+    # type: () -> int
+    """Returns the process peak resident set size, in kilobytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@contextmanager
+def profile_layout(fname, packages=None):
+    # type: (str, Optional[List[str]]) -> Iterator[Optional[LayoutProfiler]]
+    """Profile layout generation inside this context.
+
+    The timing tree is written to fname as JSON, and to fname with the extension replaced by
+    .folded in flamegraph folded stack format.  If fname is empty, profiling is disabled.
+
+    Parameters
+    ----------
+    fname : str
+        the output JSON file name.  Empty to disable profiling.
+    packages : Optional[List[str]]
+        packages whose templates are instrumented.  Defaults to serdes_ec.layout.
+
+    Yields
+    ------
+    profiler : Optional[LayoutProfiler]
+        the profiler, or None if profiling is disabled.
+    """
+    if not fname:
+        yield None
+        return
+
+    profiler = LayoutProfiler(packages=packages)
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.write_json(fname)
+        profiler.write_folded(os.path.splitext(fname)[0] + '.folded')
@@ -2,7 +2,7 @@
 
 """This module defines amplifier generators based on HybridQDRBase."""
 
-from typing import TYPE_CHECKING, Dict, Any, Set, Tuple, Union
+from typing import TYPE_CHECKING, Dict, Any, Set, Tuple, Union, List
 
 from bag.layout.routing import TrackManager
 
@@ -95,6 +95,12 @@ class IntegAmp(HybridQDRBase):
 
         return amp_info['fg_tot'], fg_sep_hm
 
+    @classmethod
+    def get_cache_properties(cls):
+        # type: () -> List[str]
+        """Returns a list of properties to cache."""
+        return ['sch_params', 'fg_tot', 'track_info', 'row_layout_info', 'lr_edge_info']
+
     @classmethod
     def get_params_info(cls):
         # type: () -> Dict[str, str]
@@ -6,6 +6,8 @@ from typing import TYPE_CHECKING, Optional, Dict, Any, Set, Tuple, List, Union
 
 import abc
 
+import numpy as np
+
 from abs_templates_ec.analog_core.base import AnalogBase, AnalogBaseInfo
 
 if TYPE_CHECKING:
@@ -270,6 +272,133 @@ class HybridQDRBaseInfo(AnalogBaseInfo):
             sd_dir_dict=sd_dir_dict,
         )
 
+    def get_integ_amp_info_array(self, seg_dict, fg_min=0, fg_dum=0, fg_sep_hm=0):
+        # type: (Dict[str, Union[int, np.ndarray]], int, int, int) -> Dict[str, Any]
+        """Vectorized version of get_integ_amp_info() that only computes sizes and column indices.
+
+        This method evaluates many integrating amplifier candidates at once, and is used to
+        quickly estimate footprint before creating any template.  get_integ_amp_info() is the
+        reference implementation; both methods must give the same sizes and column indices.
+
+        Parameters
+        ----------
+        seg_dict : Dict[str, Union[int, np.ndarray]]
+            a dictionary from transistor type to number of segments.  Values are integers or
+            integer arrays, which are broadcast against each other.
+        fg_min : int
+            minimum number of fingers.
+        fg_dum : int
+            number of dummy fingers on each side.
+        fg_sep_hm : int
+            number of fingers separating the load reset switches.
+
+        Returns
+        -------
+        info_dict : Dict[str, Any]
+            the amplifier information dictionary.  All arrays have the broadcast shape of
+            the segment arrays.  Has the following entries:
+
+            valid : np.ndarray
+                boolean array.  False if get_integ_amp_info() would raise an error.
+            seg_tot : np.ndarray
+                total number of segments without dummies.
+            fg_tot : np.ndarray
+                total number of fingers.
+            fg_dum : np.ndarray
+                number of dummy fingers on each side.
+            fg_sep : np.ndarray
+                number of separation fingers in the middle.
+            col_dict : Dict[str, np.ndarray]
+                left side column indices of each transistor.  -1 if the transistor is not
+                drawn.
+        """
+        fg_sep_min = self.min_fg_sep
+        abut_mos = self.abut_analog_mos
+        shape = np.broadcast(*(np.asarray(val) for val in seg_dict.values())).shape
+
+        def get_seg(name, default=None):
+            # like get_integ_amp_info(), raise KeyError if a required entry is missing
+            val = seg_dict[name] if default is None else seg_dict.get(name, default)
+            return np.broadcast_to(np.asarray(val, dtype=int), shape)
+
+        fg_sep_pmos = get_seg('psep', fg_sep_min)
+        fg_sep_nmos = get_seg('nsep', fg_sep_min)
+        seg_casc = get_seg('casc', 0)
+        seg_but = get_seg('but', 0)
+        seg_cap = get_seg('cap', 0)
+        stack_in = get_seg('stack_in', 1)
+        seg_load = get_seg('load', 0)
+        seg_pen = get_seg('pen', 0)
+        seg_tsw = get_seg('tsw', 0)
+        seg_in = get_seg('in')
+        seg_nen = get_seg('nen')
+        seg_tail = get_seg('tail')
+
+        fg_in = seg_in * stack_in
+        has_casc_but = (seg_casc > 0) | (seg_but > 0)
+        fg_sep_load = np.where((stack_in % 2 == 0) & has_casc_but, max(0, fg_sep_hm),
+                               max(0, fg_sep_hm - 2))
+
+        valid = ~((seg_casc > 0) & (seg_but > 0))
+        valid &= ~((seg_load > 0) & (seg_but > 0))
+        valid &= ~((seg_load > 0) & (seg_pen > 0) & (seg_pen != seg_load))
+
+        # calculate PMOS center transistor number of fingers
+        need_sep = (fg_sep_load > 0) | (seg_load > seg_pen) | (not abut_mos)
+        fg_sep_load = np.where(need_sep, np.maximum(fg_sep_load, fg_sep_pmos), 0)
+        seg_pmos = np.where(seg_pen == 0, 0, seg_pen * 2 + fg_sep_load)
+
+        fg_sep_nmos = np.where(has_casc_but, np.maximum(fg_sep_nmos, fg_sep_hm), fg_sep_nmos)
+
+        # calculate NMOS center transistor number of fingers
+        seg_but_tot = 2 * seg_but if abut_mos else 2 * seg_but + fg_sep_nmos
+        seg_but_tot = np.where(seg_but > 0, seg_but_tot, 0)
+
+        # calculate number of center fingers and total size
+        fg_sep_amp = np.where(seg_tsw == 0, np.maximum(fg_sep_pmos, fg_sep_nmos),
+                              2 * fg_sep_nmos + seg_tsw)
+        seg_single = np.maximum.reduce([seg_pmos, seg_casc, fg_in, seg_but_tot, seg_nen, seg_tail])
+        seg_tot = 2 * seg_single + fg_sep_amp
+        fg_dum = np.maximum(fg_dum, -(-(fg_min - seg_tot) // 2))
+        fg_tot = seg_tot + 2 * fg_dum
+
+        # calculate number of fingers if cap option is enabled
+        fg_cap = -(-seg_cap // 2) * 2
+        fg_single_cap = np.maximum(fg_in, seg_nen) + fg_sep_nmos + fg_cap
+        fg_tot_cap = 2 * fg_single_cap + fg_sep_amp + 2 * fg_sep_min
+        delta = np.where((seg_cap > 0) & (fg_tot_cap > fg_tot), -(-(fg_tot_cap - fg_tot) // 2), 0)
+        fg_tot = fg_tot + 2 * delta
+        fg_dum = fg_dum + delta
+
+        # compute column index of each transistor
+        col_lc = fg_dum + seg_single
+        has_pen = seg_pen > 0
+        has_but = (seg_casc == 0) & (seg_but > 0)
+        pen_col0 = np.where(has_pen, col_lc - seg_pmos, -1)
+        pen_col1 = np.where(has_pen, col_lc - seg_pen, -1)
+        col_dict = {
+            'load0': pen_col0,
+            'load1': pen_col1,
+            'pen0': pen_col0,
+            'pen1': pen_col1,
+            'casc': np.where(seg_casc > 0, col_lc - seg_casc, -1),
+            'but0': np.where(has_but, col_lc - seg_but_tot, -1),
+            'but1': np.where(has_but, col_lc - seg_but, -1),
+            'in': col_lc - fg_in,
+            'nen': col_lc - seg_nen,
+            'tsw': col_lc + (fg_sep_amp - seg_tsw) // 2,
+            'tail': col_lc - seg_tail,
+        }
+
+        return dict(
+            valid=valid,
+            seg_tot=seg_tot,
+            fg_tot=fg_tot,
+            fg_dum=fg_dum,
+            fg_sep=fg_sep_amp,
+            col_dict=col_dict,
+        )
+
 
 class HybridQDRBase(AnalogBase, metaclass=abc.ABCMeta):
     """Subclass of AnalogBase that draws QDR serdes blocks.
@@ -9,6 +9,7 @@ from bag.layout.template import TemplateBase
 
 from abs_templates_ec.analog_mos.mos import DummyFillActive
 
+from ..cache import new_leaf_template
 from .tapx import TapXColumn
 from .offset import HighPassColumn
 from .tap1 import Tap1Column
@@ -110,6 +111,14 @@ class RXDatapath(TemplateBase):
         # type: () -> Union[float, int]
         return self._en_div_tidx
 
+    @classmethod
+    def get_cache_properties(cls):
+        # type: () -> List[str]
+        """Returns a list of properties to cache."""
+        return ['sch_params', 'x_tapx', 'x_tap1', 'num_dfe', 'num_ffe', 'num_hp_tapx',
+                'num_hp_tap1', 'blockage_intvs', 'sup_y_list', 'buf_locs', 'retime_ncol',
+                'en_div_tidx']
+
     @classmethod
     def get_params_info(cls):
         # type: () -> Dict[str, str]
@@ -133,6 +142,7 @@ class RXDatapath(TemplateBase):
             ana_options='other AnalogBase options',
             show_pins='True to create pin labels.',
             export_probe='True to export probe ports.',
+            floorplan_only='True to only place instances, without routing or fill.',
         )
 
     @classmethod
@@ -146,11 +156,13 @@ class RXDatapath(TemplateBase):
             ana_options=None,
             show_pins=True,
             export_probe=False,
+            floorplan_only=False,
         )
 
     def draw_layout(self):
         show_pins = self.params['show_pins']
         export_probe = self.params['export_probe']
+        floorplan_only = self.params['floorplan_only']
 
         tmp = self._create_masters(export_probe)
         master_tapx, master_tap1, master_offset, master_loff, master_samp = tmp
@@ -192,13 +204,14 @@ class RXDatapath(TemplateBase):
         self._en_div_tidx = ym_tidx
         self.reserve_tracks(top_layer, ym_tidx)
 
-        self._connect_signals(tapx, tap1, offset, offlev, samp, show_pins, export_probe)
+        if not floorplan_only:
+            self._connect_signals(tapx, tap1, offset, offlev, samp, show_pins, export_probe)
 
-        self._export_pins(tapx, tap1, offset, offlev, samp, show_pins)
+            self._export_pins(tapx, tap1, offset, offlev, samp, show_pins)
 
-        self._connect_supplies(tapx, tap1, offset, offlev, samp, show_pins)
+            self._connect_supplies(tapx, tap1, offset, offlev, samp, show_pins)
 
-        self._do_dummy_fill(top_layer, tapx, tap1, offset, offlev, samp)
+            self._do_dummy_fill(top_layer, tapx, tap1, offset, offlev, samp)
 
         self._sch_params = dict(
             tapx_params=master_tapx.sch_params,
@@ -459,7 +472,7 @@ class RXDatapath(TemplateBase):
         tapx_params['options'] = ana_options
         tapx_params['show_pins'] = False
         tapx_params['export_probe'] = export_probe
-        master_tapx = self.new_template(params=tapx_params, temp_cls=TapXColumn)
+        master_tapx = new_leaf_template(self, tapx_params, TapXColumn)
         row_heights = master_tapx.row_heights
         sup_tids = master_tapx.sup_tids
         vss_tids = master_tapx.vss_tids
@@ -484,7 +497,7 @@ class RXDatapath(TemplateBase):
         tap1_params['sup_tids'] = sup_tids
         tap1_params['show_pins'] = False
         tap1_params['export_probe'] = export_probe
-        master_tap1 = self.new_template(params=tap1_params, temp_cls=Tap1Column)
+        master_tap1 = new_leaf_template(self, tap1_params, Tap1Column)
         tap1_in_tr_info = master_tap1.in_tr_info
         tap1_out_tr_info = master_tap1.out_tr_info
 
@@ -503,7 +516,7 @@ class RXDatapath(TemplateBase):
         offset_params['ana_options'] = ana_options
         offset_params['sub_tids'] = vss_tids
         offset_params['show_pins'] = False
-        master_offset = self.new_template(params=offset_params, temp_cls=HighPassColumn)
+        master_offset = new_leaf_template(self, offset_params, HighPassColumn)
 
         loff_params = hp_params.copy()
         loff_params['h_unit'] = h_tot
@@ -519,7 +532,7 @@ class RXDatapath(TemplateBase):
         loff_params['ana_options'] = ana_options
         loff_params['sub_tids'] = vss_tids
         loff_params['show_pins'] = False
-        master_loff = self.new_template(params=loff_params, temp_cls=HighPassColumn)
+        master_loff = new_leaf_template(self, loff_params, HighPassColumn)
 
         samp_params = samp_params.copy()
         samp_params['config'] = config
@@ -536,7 +549,7 @@ class RXDatapath(TemplateBase):
         samp_params['options'] = ana_options
         samp_params['show_pins'] = False
         samp_params['export_probe'] = export_probe
-        master_samp = self.new_template(params=samp_params, temp_cls=SamplerColumn)
+        master_samp = new_leaf_template(self, samp_params, SamplerColumn)
         self._retime_ncol = master_samp.retime_ncol
 
         return master_tapx, master_tap1, master_offset, master_loff, master_samp
@@ -2,7 +2,7 @@
 
 """This module defines classes for Hybrid-QDR offset cancellation/dlev."""
 
-from typing import TYPE_CHECKING, Dict, Any, Set
+from typing import TYPE_CHECKING, Dict, Any, Set, List
 
 from bag.layout.routing import TrackManager
 from bag.layout.template import TemplateBase
@@ -43,6 +43,12 @@ class HighPassColumn(TemplateBase):
         # type: () -> Dict[str, Any]
         return self._sch_params
 
+    @classmethod
+    def get_cache_properties(cls):
+        # type: () -> List[str]
+        """Returns a list of properties to cache."""
+        return ['sch_params']
+
     @classmethod
     def get_params_info(cls):
         # type: () -> Dict[str, str]
@@ -2,7 +2,7 @@
 
 """This module defines classes for Hybrid-QDR sampler/retimer."""
 
-from typing import TYPE_CHECKING, Dict, Any, Set, Tuple, Union
+from typing import TYPE_CHECKING, Dict, Any, Set, Tuple, Union, List
 
 from itertools import chain
 
@@ -225,6 +225,12 @@ class DividerColumn(TemplateBase):
     def sa_clk_tidx(self):
         return self._sa_clk_tidx
 
+    @classmethod
+    def get_cache_properties(cls):
+        # type: () -> List[str]
+        """Returns a list of properties to cache."""
+        return ['sch_params', 'fg_tot', 'sa_clk_tidx']
+
     @classmethod
     def get_params_info(cls):
         # type: () -> Dict[str, str]
@@ -1059,6 +1065,12 @@ class SamplerColumn(TemplateBase):
         # type: () -> int
         return self._retime_ncol
 
+    @classmethod
+    def get_cache_properties(cls):
+        # type: () -> List[str]
+        """Returns a list of properties to cache."""
+        return ['sch_params', 'buf_locs', 'retime_ncol']
+
     @classmethod
     def get_params_info(cls):
         # type: () -> Dict[str, str]
@@ -12,6 +12,7 @@ from bag.layout.template import TemplateBase
 
 from abs_templates_ec.analog_core.base import AnalogBaseEnd
 
+from ..cache import new_leaf_template, prefetch_leaf_templates
 from .base import HybridQDRBaseInfo, HybridQDRBase
 from .amp import IntegAmp
 from ..laygo.divider import DividerGroup
@@ -285,6 +286,13 @@ class Tap1Summer(TemplateBase):
         # type: () -> Tuple[int, int]
         return self._div_grp_loc
 
+    @classmethod
+    def get_cache_properties(cls):
+        # type: () -> List[str]
+        """Returns a list of properties to cache."""
+        return ['sch_params', 'fg_tot', 'fg_core', 'en_locs', 'data_tr_info', 'div_tr_info',
+                'sum_row_info', 'lat_row_info', 'left_edge_info', 'div_grp_loc']
+
     @classmethod
     def get_params_info(cls):
         # type: () -> Dict[str, str]
@@ -458,12 +466,12 @@ class Tap1Summer(TemplateBase):
         lat_params['top_layer'] = None
         lat_params['end_mode'] = 8
         lat_params['sch_hp_params'] = None
-        l_master = self.new_template(params=lat_params, temp_cls=IntegAmp)
+        l_master = new_leaf_template(self, lat_params, IntegAmp)
 
         fg_tot_lat = fg_dig + l_master.fg_tot
         if m_master.fg_tot > fg_tot_lat:
             lat_params['fg_duml'] = fg_dum + (m_master.fg_tot - fg_tot_lat)
-            l_master = self.new_template(params=lat_params, temp_cls=IntegAmp)
+            l_master = new_leaf_template(self, lat_params, IntegAmp)
         elif fg_tot_lat > m_master.fg_tot:
             sum_params['fg_min'] = fg_tot_lat
             m_master = self.new_template(params=sum_params, temp_cls=Tap1SummerRow)
@@ -540,6 +548,13 @@ class Tap1Column(TemplateBase):
     def blockage_intvs(self):
         return self._blockage_intvs
 
+    @classmethod
+    def get_cache_properties(cls):
+        # type: () -> List[str]
+        """Returns a list of properties to cache."""
+        return ['sch_params', 'in_tr_info', 'out_tr_info', 'data_tr_info', 'div_tr_info',
+                'sum_row_info', 'lat_row_info', 'blockage_intvs']
+
     @classmethod
     def get_params_info(cls):
         # type: () -> Dict[str, str]
@@ -837,7 +852,7 @@ class Tap1Column(TemplateBase):
         sum_params['seg_pul'] = None
         sum_params['div_pos_edge'] = False
         sum_params['show_pins'] = False
-        sum_master = self.new_template(params=sum_params, temp_cls=Tap1Summer)
+        sum_master = new_leaf_template(self, sum_params, Tap1Summer)
 
         end_row_params = dict(
             lch=lch,
@@ -849,7 +864,7 @@ class Tap1Column(TemplateBase):
             guard_ring_nf=0,
             options=options,
         )
-        end_row_master = self.new_template(params=end_row_params, temp_cls=AnalogBaseEnd)
+        end_row_master = new_leaf_template(self, end_row_params, AnalogBaseEnd)
 
         div_params = dict(
             config=config,
@@ -864,9 +879,12 @@ class Tap1Column(TemplateBase):
             re_dummy=False,
             show_pins=False,
         )
-        div3_master = self.new_template(params=div_params, temp_cls=DividerGroup)
-        div_params['re_dummy'] = True
-        div_params['clk_inverted'] = True
-        div2_master = self.new_template(params=div_params, temp_cls=DividerGroup)
+        div2_params = div_params.copy()
+        div2_params['re_dummy'] = True
+        div2_params['clk_inverted'] = True
+        # the divider groups only depend on the summer
+        prefetch_leaf_templates(self, [(div_params, DividerGroup), (div2_params, DividerGroup)])
+        div3_master = new_leaf_template(self, div_params, DividerGroup)
+        div2_master = new_leaf_template(self, div2_params, DividerGroup)
 
         return sum_master, end_row_master, div2_master, div3_master
@@ -12,6 +12,7 @@ from bag.layout.routing.base import TrackManager, TrackID
 
 from abs_templates_ec.analog_core.base import AnalogBaseEnd
 
+from ..cache import new_leaf_template, prefetch_leaf_templates
 from ..laygo.divider import DividerGroup
 from .amp import IntegAmp
 from .sampler import DividerColumn
@@ -432,6 +433,14 @@ class TapXSummer(TemplateBase):
         # type: () -> Tuple[int, int]
         return self._div_grp_loc
 
+    @classmethod
+    def get_cache_properties(cls):
+        # type: () -> List[str]
+        """Returns a list of properties to cache."""
+        return ['sch_params', 'ffe_track_info', 'dfe_track_info', 'fg_tot', 'fg_tot_dfe2',
+                'blockage_intvs', 'lr_edge_info', 'sum_row_info', 'lat_row_info', 'div_tr_info',
+                'vss_tids', 'vdd_tids', 'sup_tids', 'sup_y_mid', 'row_heights', 'div_grp_loc']
+
     @classmethod
     def get_params_info(cls):
         # type: () -> Dict[str, str]
@@ -563,13 +572,12 @@ class TapXSummer(TemplateBase):
                                tr_widths=tr_widths, tr_spaces=tr_spaces, flip_sign=fs_last,
                                end_mode=8, options=options, sch_hp_params=sch_hp_params,
                                but_sw=True, show_pins=False)
-            gm_master = self.new_template(params=base_params, temp_cls=IntegAmp)
             # NOTE: we reuse _place_master() command to place tap2 gm cell.
             # blk_idx just cannot be zero.
-            tmp = self._place_master(tr_manager, ym_layer, gm_master, self._dfe_track_info,
-                                     blk_intvs, fg_dum, route_locs, sig_types, sig_names, sig_right,
-                                     vm_w_out, blk_idx_intv, place_info, True, 'd', 2, 0, vdd_list,
-                                     vss_list, -2)
+            tmp = self._place_master(tr_manager, ym_layer, IntegAmp, base_params,
+                                     self._dfe_track_info, blk_intvs, fg_dum, route_locs,
+                                     sig_types, sig_names, sig_right, vm_w_out, blk_idx_intv,
+                                     place_info, True, 'd', 2, 0, vdd_list, vss_list, -2)
             gm_master, gm_inst, place_info = tmp
             gm_arr_box = gm_inst.array_box
             gm_bnd_box = gm_inst.bound_box
@@ -834,12 +842,11 @@ class TapXSummer(TemplateBase):
             cur_params['flip_sign'] = flip_sign
             if is_end and (idx == num_inst - 1):
                 cur_params['end_mode'] = 0b0100
-            cur_master = self.new_template(params=cur_params, temp_cls=TapXSummerCell)
 
-            tmp = self._place_master(tr_manager, vm_layer, cur_master, track_info, block_intvs,
-                                     fg_dum, route_locs, sig_types, sig_names, sig_right, vm_w_out,
-                                     blk_idx_intv, place_info, left_out, blk_type, sig_idx, inc,
-                                     vdd_list, vss_list, idx)
+            tmp = self._place_master(tr_manager, vm_layer, TapXSummerCell, cur_params, track_info,
+                                     block_intvs, fg_dum, route_locs, sig_types, sig_names,
+                                     sig_right, vm_w_out, blk_idx_intv, place_info, left_out,
+                                     blk_type, sig_idx, inc, vdd_list, vss_list, idx)
 
             cur_master, inst, place_info = tmp
             masters.append(cur_master)
@@ -852,30 +859,21 @@ class TapXSummer(TemplateBase):
         sch_params.reverse()
         return masters, track_info, sch_params, insts, place_info, block_intvs
 
-    def _place_master(self, tr_manager, vm_layer, cur_master, track_info, block_intvs, fg_dum,
-                      route_locs, sig_types, sig_names, sig_right, vm_w_out, blk_idx_intv,
+    def _place_master(self, tr_manager, vm_layer, temp_cls, cur_params, track_info, block_intvs,
+                      fg_dum, route_locs, sig_types, sig_names, sig_right, vm_w_out, blk_idx_intv,
                       place_info, left_out, blk_type, sig_idx, sig_inc, vdd_list, vss_list,
                       blk_idx):
 
-        if isinstance(cur_master, IntegAmp):
+        if issubclass(temp_cls, IntegAmp):
             left_out_b = left_out = 0
         else:
             left_out_b = not left_out
 
         prev_data_w, prev_data_tr, prev_type, prev_tr, xarr = place_info
-        is_first = (xarr is None)
 
-        # check we can place current master without horizontal line-end spacing issues
-        xcur = 0 if is_first else xarr - cur_master.array_box.left_unit
-        if prev_data_tr is not None:
-            data_xr = self.grid.get_wire_bounds(vm_layer, prev_data_tr, width=prev_data_w,
-                                                unit_mode=True)[1]
-            xcur_min = data_xr - cur_master.get_vm_coord(prev_data_w, True, left_out_b)
-            if xcur_min > xcur:
-                # need to increment left dummy fingers to avoid line-end spacing issues
-                sd_pitch = cur_master.sd_pitch_unit
-                num_fg_inc = -(-(xcur_min - xcur) // (2 * sd_pitch)) * 2
-                cur_master = cur_master.new_template_with(fg_duml=fg_dum + num_fg_inc)
+        # create master without horizontal line-end spacing issues
+        cur_master, xcur = self._new_placed_master(vm_layer, temp_cls, cur_params, fg_dum,
+                                                   prev_data_w, prev_data_tr, xarr, left_out_b)
 
         # get minimum left routing track index
         data_xl = xcur + cur_master.get_vm_coord(vm_w_out, False, left_out)
@@ -941,6 +939,30 @@ class TapXSummer(TemplateBase):
 
         return cur_master, inst, (prev_data_w, prev_data_tr, prev_type, prev_tr, xarr)
 
+    def _new_placed_master(self, vm_layer, temp_cls, params, fg_dum, prev_data_w, prev_data_tr,
+                           xarr, left_out_b):
+        """Create a summer cell master with enough left dummies to avoid line-end spacing issues.
+
+        The left vm coordinate depends on the routed wire extents of the cell, so it is read
+        from the master with the given parameters.  If more left dummy fingers are needed, a
+        second master is created.
+        """
+        master = self.new_template(params=params, temp_cls=temp_cls)
+        xcur = 0 if xarr is None else xarr - master.array_box.left_unit
+        if prev_data_tr is not None:
+            data_xr = self.grid.get_wire_bounds(vm_layer, prev_data_tr, width=prev_data_w,
+                                                unit_mode=True)[1]
+            xcur_min = data_xr - master.get_vm_coord(prev_data_w, True, left_out_b)
+            if xcur_min > xcur:
+                # need to increment left dummy fingers to avoid line-end spacing issues
+                sd_pitch = master.sd_pitch_unit
+                num_fg_inc = -(-(xcur_min - xcur) // (2 * sd_pitch)) * 2
+                params = params.copy()
+                params['fg_duml'] = fg_dum + num_fg_inc
+                master = self.new_template(params=params, temp_cls=temp_cls)
+
+        return master, xcur
+
 
 class TapXColumn(TemplateBase):
     """The column of FFE/DFE summers.
@@ -1033,6 +1055,13 @@ class TapXColumn(TemplateBase):
             if num_dfe > 2:
                 yield from range(12, 4 * (num_dfe + 1))
 
+    @classmethod
+    def get_cache_properties(cls):
+        # type: () -> List[str]
+        """Returns a list of properties to cache."""
+        return ['sch_params', 'row_heights', 'sup_tids', 'vss_tids', 'vdd_tids', 'out_tr_info',
+                'num_dfe', 'num_ffe', 'blockage_intvs', 'sup_y_list']
+
     @classmethod
     def get_params_info(cls):
         # type: () -> Dict[str, str]
@@ -1575,7 +1604,7 @@ class TapXColumn(TemplateBase):
         sum_params = self.params.copy()
         sum_params['fg_dig'] = fg_dig
         sum_params['show_pins'] = False
-        sum_master = self.new_template(params=sum_params, temp_cls=TapXSummer)
+        sum_master = new_leaf_template(self, sum_params, TapXSummer)
         fg_tot_dfe2 = sum_master.fg_tot_dfe2
         ledge_info, redge_info = sum_master.lr_edge_info
 
@@ -1594,10 +1623,13 @@ class TapXColumn(TemplateBase):
             fg_min=fg_tot_dfe2,
             show_pins=False,
         )
-        div3_master = self.new_template(params=div_params, temp_cls=DividerGroup)
-        div_params['re_dummy'] = True
-        div_params['clk_inverted'] = False
-        div2_master = self.new_template(params=div_params, temp_cls=DividerGroup)
+        div2_params = div_params.copy()
+        div2_params['re_dummy'] = True
+        div2_params['clk_inverted'] = False
+        # the divider groups only depend on the summer
+        prefetch_leaf_templates(self, [(div_params, DividerGroup), (div2_params, DividerGroup)])
+        div3_master = new_leaf_template(self, div_params, DividerGroup)
+        div2_master = new_leaf_template(self, div2_params, DividerGroup)
 
         div_col_params = dict(config=config, sum_row_info=sum_master.sum_row_info,
                               lat_row_info=sum_master.lat_row_info, seg_dict=seg_div,
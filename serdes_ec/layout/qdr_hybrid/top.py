@@ -2,7 +2,7 @@
 
 """This module defines classes needed to build the Hybrid-QDR FFE/DFE summer."""
 
-from typing import TYPE_CHECKING, Dict, Any, Set, List, Tuple
+from typing import TYPE_CHECKING, Dict, Any, Set, List, Tuple, Union
 
 from itertools import repeat, chain, islice
 
@@ -19,6 +19,7 @@ from analog_ec.layout.dac.rladder.top import RDACArray
 from analog_ec.layout.passives.filter.highpass import HighPassArrayClk
 
 from ..analog.passives import PassiveCTLE, TermRX
+from ..cache import new_leaf_template
 from ..digital.buffer import BufferArray
 from .datapath import RXDatapath
 
@@ -54,6 +55,7 @@ class RXFrontend(TemplateBase):
         self._top_scan_names = None
         self._bias_info_list = None
         self._xm_layer = None
+        self._floorplan = None
 
     @property
     def sch_params(self):
@@ -90,12 +92,23 @@ class RXFrontend(TemplateBase):
         # type: () -> int
         return self._xm_layer
 
+    @property
+    def floorplan(self):
+        # type: () -> Dict[str, Any]
+        """Placement information in floorplan_only mode, None otherwise.
+
+        In this mode the routing and fill of this template, the datapath and the termination
+        are skipped.  The leaf masters are still generated, as their row layouts set the
+        sizes, so this is not an analytic size estimate.
+        """
+        return self._floorplan
+
     @classmethod
     def get_cache_properties(cls):
         # type: () -> List[str]
         """Returns a list of properties to cache."""
         return ['sch_params', 'buf_locs', 'retime_ncol', 'bot_scan_names', 'top_scan_names',
-                'xm_layer']
+                'xm_layer', 'floorplan']
 
     @classmethod
     def get_params_info(cls):
@@ -115,6 +128,7 @@ class RXFrontend(TemplateBase):
             bias_config='The bias configuration dictionary.',
             show_pins='True to create pin labels.',
             export_probe='True to export probe ports.',
+            floorplan_only='True to only place instances, without routing or fill.',
         )
 
     @classmethod
@@ -123,6 +137,7 @@ class RXFrontend(TemplateBase):
         return dict(
             show_pins=True,
             export_probe=False,
+            floorplan_only=False,
         )
 
     def draw_layout(self):
@@ -133,8 +148,14 @@ class RXFrontend(TemplateBase):
         bias_config = self.params['bias_config']
         show_pins = self.params['show_pins']
         export_probe = self.params['export_probe']
+        floorplan_only = self.params['floorplan_only']
 
         master_ctle, master_dp, master_hpx, master_hp1 = self._make_masters(tr_widths, tr_spaces)
+        self._sch_params = master_dp.sch_params.copy()
+        self._sch_params['ctle_params'] = master_ctle.sch_params
+        self._sch_params['hp_params'] = master_hpx.sch_params['hp_params']
+        self._sch_params['ndum_res'] = master_hpx.sch_params['ndum'] * 4
+        self._sch_params['export_probe'] = export_probe
 
         # compute instance placements
         ctle_box = master_ctle.bound_box
@@ -190,6 +211,39 @@ class RXFrontend(TemplateBase):
         self.set_size_from_bound_box(top_layer, tot_box)
         self.add_cell_boundary(tot_box)
 
+        if floorplan_only:
+            clkp_idx, clkn_idx = self._get_clk_tracks(xm_layer, y_dp, master_dp.sup_y_list)
+            xm_tr_w_clk = tr_manager.get_width(xm_layer, 'clk')
+            inp_idx, inn_idx, in_tr_w = self._get_input_tracks(
+                tr_manager, TrackID(xm_layer, clkp_idx, width=xm_tr_w_clk),
+                TrackID(xm_layer, clkn_idx, width=xm_tr_w_clk))
+            inst_list = [('ctle', ctle_inst), ('dp', dp_inst), ('hpxb', hpxb_inst),
+                         ('hp1b', hp1b_inst), ('hpxt', hpxt_inst), ('hp1t', hp1t_inst)]
+            self._floorplan = dict(
+                box=self._get_box_tuple(tot_box),
+                fill_size=(fill_w, fill_h),
+                inst_boxes={name: self._get_box_tuple(inst.bound_box) for name, inst in inst_list},
+                route=dict(
+                    route_w=route_w,
+                    clk_h=clk_h,
+                    vss_h=vss_h,
+                    vdd_h=vdd_h,
+                    num_vm_vss=num_vm_vss,
+                    num_vm_vdd=num_vm_vdd,
+                ),
+                dp=dict(
+                    num_ffe=master_dp.num_ffe,
+                    num_dfe=master_dp.num_dfe,
+                    num_hp_tapx=master_dp.num_hp_tapx,
+                    num_hp_tap1=master_dp.num_hp_tap1,
+                    retime_ncol=master_dp.retime_ncol,
+                    x_tapx=master_dp.x_tapx,
+                    x_tap1=master_dp.x_tap1,
+                ),
+                in_tracks=(xm_layer, inp_idx, inn_idx, in_tr_w),
+            )
+            return
+
         # fill between high-pass filters
         if x_hp1 > xr_hpx:
             dum_params = dict(
@@ -293,11 +347,10 @@ class RXFrontend(TemplateBase):
             for inst in (hpxb_inst, hpxt_inst, hp1b_inst, hp1t_inst):
                 self.do_max_space_fill(layer, bound_box=inst.fill_box, fill_pitch=2)
 
-        self._sch_params = master_dp.sch_params.copy()
-        self._sch_params['ctle_params'] = master_ctle.sch_params
-        self._sch_params['hp_params'] = master_hpx.sch_params['hp_params']
-        self._sch_params['ndum_res'] = master_hpx.sch_params['ndum'] * 4
-        self._sch_params['export_probe'] = export_probe
+    @staticmethod
+    def _get_box_tuple(box):
+        # type: (BBox) -> Tuple[int, int, int, int]
+        return box.left_unit, box.bottom_unit, box.right_unit, box.top_unit
 
     def _fill_active(self, box, dum_params):
         dum_params['width'] = box.width_unit
@@ -360,9 +413,22 @@ class RXFrontend(TemplateBase):
                 warr = self.connect_to_tracks(warr, tid, track_lower=0, unit_mode=True)
                 self.add_pin(name, warr, show=show_pins, edge_mode=-1)
 
-    def _connect_ctle(self, tr_manager, ctle_inst, dp_inst, p_tid, n_tid, show_pins):
+    def _get_clk_tracks(self, xm_layer, y0, sup_yc_list):
+        # type: (int, int, List[int]) -> Tuple[Union[float, int], Union[float, int]]
+        """Returns the clkp/clkn track indices on xm_layer given datapath Y coordinate."""
+        clkn_y = y0 + (sup_yc_list[3] + sup_yc_list[4]) // 2
+        clkp_y = y0 + (sup_yc_list[4] + sup_yc_list[5]) // 2
+
+        nidx = self.grid.coord_to_nearest_track(xm_layer, clkn_y, half_track=True, mode=-1,
+                                                unit_mode=True)
+        pidx = self.grid.coord_to_nearest_track(xm_layer, clkp_y, half_track=True, mode=1,
+                                                unit_mode=True)
+        return pidx, nidx
+
+    def _get_input_tracks(self, tr_manager, p_tid, n_tid):
+        # type: (TrackManager, TrackID, TrackID) -> Tuple[Union[float, int], Union[float, int], int]
+        """Returns the CTLE input/output track indices and width given clock tracks."""
         xm_layer = p_tid.layer_id
-        hm_layer = xm_layer - 2
         tr_w = tr_manager.get_width(xm_layer, 'serdes_in')
         pyb = p_tid.get_bounds(self.grid, unit_mode=True)[0]
         nyt = n_tid.get_bounds(self.grid, unit_mode=True)[1]
@@ -370,6 +436,12 @@ class RXFrontend(TemplateBase):
                                          mode=-1, unit_mode=True)
         nidx = self.grid.find_next_track(xm_layer, nyt, tr_width=tr_w, half_track=True,
                                          mode=1, unit_mode=True)
+        return pidx, nidx, tr_w
+
+    def _connect_ctle(self, tr_manager, ctle_inst, dp_inst, p_tid, n_tid, show_pins):
+        xm_layer = p_tid.layer_id
+        hm_layer = xm_layer - 2
+        pidx, nidx, tr_w = self._get_input_tracks(tr_manager, p_tid, n_tid)
 
         outp = self.connect_to_tracks(ctle_inst.get_pin('outp'),
                                       TrackID(xm_layer, pidx, width=tr_w))
@@ -414,14 +486,9 @@ class RXFrontend(TemplateBase):
         y0 = dp_box.bottom_unit
 
         enb_y = y0 + (sup_yc_list[2] + sup_yc_list[3]) // 2
-        clkn_y = y0 + (sup_yc_list[3] + sup_yc_list[4]) // 2
-        clkp_y = y0 + (sup_yc_list[4] + sup_yc_list[5]) // 2
         ent_y = y0 + (sup_yc_list[5] + sup_yc_list[6]) // 2
 
-        nidx = self.grid.coord_to_nearest_track(xm_layer, clkn_y, half_track=True, mode=-1,
-                                                unit_mode=True)
-        pidx = self.grid.coord_to_nearest_track(xm_layer, clkp_y, half_track=True, mode=1,
-                                                unit_mode=True)
+        pidx, nidx = self._get_clk_tracks(xm_layer, y0, sup_yc_list)
         clkp = dp_inst.get_all_port_pins('clkp')
         clkn = dp_inst.get_all_port_pins('clkn')
 
@@ -864,7 +931,8 @@ class RXFrontend(TemplateBase):
         dp_params['tr_widths_dig'] = tr_widths_dig
         dp_params['tr_spaces_dig'] = tr_spaces_dig
         dp_params['show_pins'] = False
-        master_dp = self.new_template(params=dp_params, temp_cls=RXDatapath)
+        dp_params['floorplan_only'] = self.params['floorplan_only']
+        master_dp = new_leaf_template(self, dp_params, RXDatapath)
         self._retime_ncol = master_dp.retime_ncol
         num_dfe = master_dp.num_dfe
 
@@ -909,6 +977,7 @@ class RXTop(TemplateBase):
         self._sch_params = None
         self._bot_scan_names = None
         self._top_scan_names = None
+        self._floorplan = None
 
     @property
     def sch_params(self):
@@ -925,6 +994,17 @@ class RXTop(TemplateBase):
         # type: () -> List[str]
         return self._top_scan_names
 
+    @property
+    def floorplan(self):
+        # type: () -> Dict[str, Any]
+        """Placement information in floorplan_only mode, None otherwise.
+
+        In this mode the routing and fill of this template, the datapath and the termination
+        are skipped.  The leaf masters are still generated, as their row layouts set the
+        sizes, so this is not an analytic size estimate.
+        """
+        return self._floorplan
+
     @classmethod
     def get_params_info(cls):
         # type: () -> Dict[str, str]
@@ -938,6 +1018,7 @@ class RXTop(TemplateBase):
             bias_config='bias configuration dictionary.',
             fill_orient_mode='fill orientation mode.',
             show_pins='True to show pins.',
+            floorplan_only='True to only place instances, without routing or fill.',
         )
 
     @classmethod
@@ -947,6 +1028,7 @@ class RXTop(TemplateBase):
             clk_tr_info=None,
             fill_orient_mode=0,
             show_pins=True,
+            floorplan_only=False,
         )
 
     def draw_layout(self):
@@ -955,8 +1037,16 @@ class RXTop(TemplateBase):
         fill_config = self.params['fill_config']
         bias_config = self.params['bias_config']
         show_pins = self.params['show_pins']
+        floorplan_only = self.params['floorplan_only']
 
         master_term, master_fe, master_dac, master_bufb, master_buft = self._make_masters()
+        self._sch_params = dict(
+            term_params=master_term.sch_params,
+            fe_params=master_fe.sch_params,
+            dac_params=master_dac.sch_params,
+            bufb_params=master_bufb.sch_params,
+            buft_params=master_buft.sch_params,
+        )
         box_term = master_term.bound_box
         box_fe = master_fe.bound_box
         box_dac = master_dac.bound_box
@@ -991,6 +1081,17 @@ class RXTop(TemplateBase):
         self.array_box = bnd_box
         self.add_cell_boundary(bnd_box)
 
+        if floorplan_only:
+            get_box = RXFrontend._get_box_tuple
+            inst_list = [('term', inst_term), ('fe', inst_fe), ('dac', inst_dac),
+                         ('bufb', inst_bufb), ('buft', inst_buft)]
+            self._floorplan = dict(
+                box=get_box(bnd_box),
+                inst_boxes={name: get_box(inst.bound_box) for name, inst in inst_list},
+                fe=master_fe.floorplan,
+            )
+            return
+
         self._connect_fe(top_layer, inst_fe, clk_tr_info, show_pins)
         self._connect_term(inst_term, inst_fe, show_pins)
 
@@ -1008,14 +1109,6 @@ class RXTop(TemplateBase):
 
         self._power_fill(fill_config, top_layer, xm_layer, inst_fe, inst_term, inst_dac, show_pins)
 
-        self._sch_params = dict(
-            term_params=master_term.sch_params,
-            fe_params=master_fe.sch_params,
-            dac_params=master_dac.sch_params,
-            bufb_params=master_bufb.sch_params,
-            buft_params=master_buft.sch_params,
-        )
-
     def _power_fill(self, fill_config, top_layer, xm_layer, inst_fe, inst_term,
                     inst_dac, show_pins):
         fill_orient_mode = self.params['fill_orient_mode']
@@ -1197,7 +1290,9 @@ class RXTop(TemplateBase):
         fconf = self.params['fill_config']
         bias_config = self.params['bias_config']
         fill_orient_mode = self.params['fill_orient_mode']
+        floorplan_only = self.params['floorplan_only']
 
+        fe_params['floorplan_only'] = term_params['floorplan_only'] = floorplan_only
         term_params['fill_config'] = fe_params['fill_config'] = dac_params['fill_config'] = fconf
         fe_params['bias_config'] = dac_params['bias_config'] = bias_config
         dac_params['fill_orient_mode'] = fill_orient_mode ^ 2
@@ -1212,10 +1307,14 @@ class RXTop(TemplateBase):
             dac_params['top_layer'] = top_layer - 1
         master_dac = self.new_template(params=dac_params, temp_cls=RDACArray)
 
-        in_tid = master_fe.get_port('inp').get_pins()[0].track_id
-        tr_off = self.grid.coord_to_track(in_tid.layer_id, master_fe.bound_box.height_unit // 2,
+        if floorplan_only:
+            in_layer, in_idx, _, in_tr_w = master_fe.floorplan['in_tracks']
+        else:
+            in_tid = master_fe.get_port('inp').get_pins()[0].track_id
+            in_layer, in_idx, in_tr_w = in_tid.layer_id, in_tid.base_index, in_tid.width
+        tr_off = self.grid.coord_to_track(in_layer, master_fe.bound_box.height_unit // 2,
                                           unit_mode=True)
-        term_params['cap_out_tid'] = (in_tid.base_index - tr_off - 0.5, in_tid.width)
+        term_params['cap_out_tid'] = (in_idx - tr_off - 0.5, in_tr_w)
         master_term = self.new_template(params=term_params, temp_cls=TermRX)
 
         buf_params = fe_params['scan_buf_params'].copy()
@@ -6,8 +6,6 @@ from typing import TYPE_CHECKING, Dict, Set, Any
 
 from itertools import chain
 
-import yaml
-
 from bag.layout.util import BBox
 from bag.layout.routing.base import TrackID, TrackManager
 from bag.layout.template import TemplateBase, BlackBoxTemplate
@@ -15,6 +13,7 @@ from bag.layout.template import TemplateBase, BlackBoxTemplate
 from abs_templates_ec.analog_mos.mos import DummyFillActive
 
 from ..analog.cml import CMLAmpPMOS
+from ..blackbox import load_black_box_params
 from .ser import Serializer32
 
 if TYPE_CHECKING:
@@ -208,8 +207,7 @@ class TXDatapath(TemplateBase):
         tr_spaces = self.params['tr_spaces']
         fill_config = self.params['fill_config']
 
-        with open(esd_fname, 'r') as f:
-            esd_params = yaml.load(f)
+        esd_params = load_black_box_params(esd_fname)
 
         amp_params['tr_widths'] = tr_widths
         amp_params['tr_spaces'] = tr_spaces
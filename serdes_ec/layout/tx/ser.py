@@ -6,14 +6,13 @@ from typing import TYPE_CHECKING, Dict, Set, Any
 
 from itertools import chain
 
-import yaml
-
 from bag.layout.util import BBox
 from bag.layout.routing.base import TrackID, TrackManager
 from bag.layout.template import TemplateBase, BlackBoxTemplate
 
 from digital_ec.layout.analog.inv import AnaInvChain
 
+from ..blackbox import load_black_box_params
 from ..qdr_hybrid.sampler import DividerColumn
 
 if TYPE_CHECKING:
@@ -331,10 +330,8 @@ class Serializer32(TemplateBase):
         tr_spaces = self.params['tr_spaces']
         out_tid = self.params['out_tid']
 
-        with open(ser16_fname, 'r') as f:
-            ser_params = yaml.load(f)
-        with open(mux_fname, 'r') as f:
-            mux_params = yaml.load(f)
+        ser_params = load_black_box_params(ser16_fname)
+        mux_params = load_black_box_params(mux_fname)
 
         ser_params['show_pins'] = False
         master_ser = self.new_template(params=ser_params, temp_cls=BlackBoxTemplate)
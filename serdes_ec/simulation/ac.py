@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+########################################################################################################################
+#
+# Copyright (c) 2014, Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+#   disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the
+#    following disclaimer in the documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+########################################################################################################################
+
+
+"""This module contains vectorized AC response metric extraction functions."""
+
+from typing import Dict, Union
+
+import numpy as np
+
+
+def get_first_crossing(f_vec, mag_arr, thres):
+    # type: (np.ndarray, np.ndarray, Union[float, np.ndarray]) -> np.ndarray
+    """Find the first frequency at which the magnitude goes below the given threshold.
+
+    The crossing is found for every sweep point at once, and linearly interpolated in
+    log-frequency.
+
+    Parameters
+    ----------
+    f_vec : np.ndarray
+        the frequency vector.  Must be sorted and positive.
+    mag_arr : np.ndarray
+        a (..., N_freq) array of magnitudes in dB.
+    thres : Union[float, np.ndarray]
+        the threshold in dB.  Either a scalar or an array with shape mag_arr.shape[:-1].
+
+    Returns
+    -------
+    f_cross : np.ndarray
+        the crossing frequency array.  If the first magnitude is already below the
+        threshold, f_vec[0] is returned.  If the magnitude never goes below the
+        threshold, f_vec[-1] is returned.
+    """
+    if f_vec.size < 2:
+        raise ValueError('At least 2 frequency points are needed to find a crossing, '
+                         'got %d.' % f_vec.size)
+    thres = np.broadcast_to(thres, mag_arr.shape[:-1])[..., np.newaxis]
+    below = mag_arr < thres
+    has_cross = np.any(below, axis=-1)
+    idx1 = np.maximum(np.argmax(below, axis=-1), 1)[..., np.newaxis]
+    idx0 = idx1 - 1
+
+    freq_log = np.log10(f_vec)
+    flog0 = freq_log[idx0]
+    flog1 = freq_log[idx1]
+    y0 = np.take_along_axis(mag_arr, idx0, axis=-1)
+    y1 = np.take_along_axis(mag_arr, idx1, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        flog = flog0 + (thres - y0) * (flog1 - flog0) / (y1 - y0)
+    flog = np.clip(flog, flog0, flog1)[..., 0]
+
+    f_cross = np.where(has_cross, 10.0**flog, f_vec[-1])
+    return np.where(below[..., 0], f_vec[0], f_cross)
+
+
+def compute_ac_metrics(f_vec, out_arr, axis=-1):
+    # type: (np.ndarray, np.ndarray, int) -> Dict[str, np.ndarray]
+    """Compute gain, bandwidth, unity-gain frequency, and peaking for all sweep points.
+
+    Parameters
+    ----------
+    f_vec : np.ndarray
+        the frequency vector.  Must be sorted and positive.
+    out_arr : np.ndarray
+        the N-D complex AC response array.
+    axis : int
+        the frequency axis of out_arr.
+
+    Returns
+    -------
+    metrics : Dict[str, np.ndarray]
+        the metrics dictionary.  All arrays have the shape of out_arr with the frequency
+        axis removed.  Has the following entries:
+
+        gain : np.ndarray
+            the low frequency gain, in V/V.
+        f3db : np.ndarray
+            the -3 dB frequency.
+        funity : np.ndarray
+            the unity-gain frequency.
+        peaking : np.ndarray
+            the gain peaking in dB.  This is 0 if the magnitude never exceeds the
+            low frequency gain.
+    """
+    mag_arr = np.abs(np.moveaxis(out_arr, axis, -1))
+    gain = mag_arr[..., 0]
+    mag_log = 20 * np.log10(mag_arr)
+    gain_log = mag_log[..., 0]
+
+    return dict(
+        gain=gain,
+        f3db=get_first_crossing(f_vec, mag_log, gain_log - 3),
+        funity=get_first_crossing(f_vec, mag_log, 0.0),
+        peaking=np.amax(mag_log, axis=-1) - gain_log,
+    )
@@ -23,17 +23,21 @@
 ########################################################################################################################
 
 
-from typing import TYPE_CHECKING, Optional, Tuple, Any, Dict, List
+from typing import TYPE_CHECKING, Optional, Tuple, Any, Dict, List, Union, Sequence
 import os
+import itertools
 from copy import deepcopy
 
+import h5py
 import numpy as np
 import scipy.linalg as linalg
 
-from bag.io import open_file
-from bag.data.digital import de_bruijn, dig_to_pwl
+from bag.data.digital import de_bruijn
 from bag.simulation.core import SimulationManager
 
+from .stimuli import setup_pwl_file
+from .sweep_db import SweepDatabase
+
 if TYPE_CHECKING:
     from bag.core import BagProject, Testbench
 
@@ -41,20 +45,14 @@ if TYPE_CHECKING:
 class ClkAmpChar(SimulationManager):
     def __init__(self, prj, spec_file):
         # type: (Optional[BagProject], str) -> None
+        self._new_only_tb = None  # type: Optional[str]
         super(ClkAmpChar, self).__init__(prj, spec_file)
+        self._sweep_db = SweepDatabase(os.path.join(self.specs['root_dir'], 'sweep_db'))
 
     @classmethod
     def _setup_pwl_input(cls, values, tper, tr, tran_fname):
-        # type: (List[float], float) -> None
-
-        tvec, yvec = dig_to_pwl(values, tper, tr, td=0.0)
-
-        tran_fname = os.path.abspath(tran_fname)
-        stimuli_dir = os.path.dirname(tran_fname)
-        os.makedirs(stimuli_dir, exist_ok=True)
-        with open_file(tran_fname, 'w') as f:
-            for t, y in zip(tvec, yvec):
-                f.write('%.8f %.8f\n' % (t,  y))
+        # type: (List[float], float, float, str) -> None
+        setup_pwl_file(values, tper, tr, tran_fname, td=0.0)
 
     def setup_linearity(self):
         tb_specs = self.specs['tb_pss_dc']
@@ -105,6 +103,80 @@ class ClkAmpChar(SimulationManager):
 
         return lay_params
 
+    def get_design_key(self, tb_type, val_list):
+        # type: (str, Tuple[Any, ...]) -> str
+        """Returns a stable hash of the design and testbench settings of the given sweep point."""
+        tb_params = self.specs[tb_type]['tb_params']
+        return SweepDatabase.get_key(tb_type, self.get_layout_params(val_list), tb_params,
+                                     self.specs['sim_envs'], self.specs['view_name'])
+
+    def get_combinations_iter(self):
+        """Iterate over all sweep points.
+
+        While create_designs() runs in incremental mode, sweep points already in the sweep
+        database are skipped, so only new points are generated, extracted, and simulated.
+        """
+        for val_list in super(ClkAmpChar, self).get_combinations_iter():
+            if self._new_only_tb is None or self.get_design_key(self._new_only_tb, val_list) not in self._sweep_db:
+                yield val_list
+
+    def create_designs(self, tb_type='', extract=True, incremental=True):
+        # type: (str, bool, bool) -> Optional[int]
+        """Create, extract, and simulate all sweep points.
+
+        If incremental is True, sweep points whose layout parameters, testbench parameters,
+        simulation environments, and view match an entry in the sweep database are skipped,
+        and the results of new sweep points are added to the database.
+
+        Returns
+        -------
+        num_new : Optional[int]
+            in incremental mode, the number of new sweep points.  Otherwise None.
+        """
+        if not tb_type or not incremental:
+            super(ClkAmpChar, self).create_designs(tb_type=tb_type, extract=extract)
+            return None
+
+        self._new_only_tb = tb_type
+        try:
+            new_list = list(self.get_combinations_iter())
+            if not new_list:
+                return 0
+            super(ClkAmpChar, self).create_designs(tb_type=tb_type, extract=extract)
+        finally:
+            self._new_only_tb = None
+
+        dsn_name_base = self.specs['dsn_name_base']
+        for val_list in new_list:
+            info = dict(tb_type=tb_type, dsn_name=self.get_instance_name(dsn_name_base, val_list),
+                        sweep_params=dict(zip(self.swp_var_list, val_list)))
+            self._sweep_db.add_results(self.get_design_key(tb_type, val_list),
+                                       self.get_sim_results(tb_type, val_list), info=info)
+        return len(new_list)
+
+    def load_sweep_results(self, tb_type):
+        # type: (str) -> Dict[Tuple[Any, ...], Dict[str, Any]]
+        """Load simulation results of all sweep points, merging cached and new results.
+
+        Parameters
+        ----------
+        tb_type : str
+            the testbench type.
+
+        Returns
+        -------
+        results : Dict[Tuple[Any, ...], Dict[str, Any]]
+            a dictionary from sweep values to simulation results.
+        """
+        results = {}
+        for val_list in self.get_combinations_iter():
+            key = self.get_design_key(tb_type, val_list)
+            if key in self._sweep_db:
+                results[tuple(val_list)] = self._sweep_db.load_results(key)
+            else:
+                results[tuple(val_list)] = self.get_sim_results(tb_type, val_list)
+        return results
+
     def configure_tb(self, tb_type, tb, val_list):
         # type: (str, Testbench, Tuple[Any, ...]) -> None
         tb_specs = self.specs[tb_type]
@@ -131,19 +203,50 @@ class ClkAmpChar(SimulationManager):
         tb.add_output('clk', """getData("/clkp_tail" ?result "pss_td")""")
 
     @classmethod
-    def compute_linearity(cls, results, time_idx):
-        # type: (Dict[str, Any], int) -> Tuple[np.array, np.array, np.array, List[str]]
+    def _fit_linear(cls, vin, b):
+        # type: (np.ndarray, np.ndarray) -> Tuple[np.ndarray, np.ndarray]
+        """Perform least-square linear fit on every column of the given matrix.
+
+        The pseudo-inverse of the [vin, 1] design matrix is computed once and shared
+        across all columns.
+
+        Parameters
+        ----------
+        vin : np.ndarray
+            the 1D input vector.
+        b : np.ndarray
+            a (num_in, M) matrix, each column is one set of output values.
+
+        Returns
+        -------
+        x : np.ndarray
+            a (2, M) matrix.  First row is the gain, second row is the offset.
+        err : np.ndarray
+            a length-M vector of least-square fit residues (squared 2-norm of b - Ax).
+        """
+        a = np.ones((vin.size, 2), dtype=float)
+        a[:, 0] = vin
+        x = linalg.pinv(a).dot(b)
+        err = np.sum(np.square(a.dot(x) - b), axis=0)
+        return x, err
+
+    @classmethod
+    def compute_linearity(cls, results, time_idx=None):
+        # type: (Dict[str, Any], Optional[Union[int, Sequence[int]]]) -> Tuple[np.array, np.array, np.array, List[str]]
         """Given a PSS simulation with DC input, compute linearity spec.
 
         This function samples the transient waveform at the given index, then
-        performs a least-square fit to a straight line.
+        performs a least-square fit to a straight line.  If time_idx is None or a
+        list of indices, all requested time points are fitted in a single vectorized
+        solve, and time becomes the last dimension of the return result.
 
         Parameters
         ----------
         results : Dict[str, Any]
             the simulation result dictionary.
-        time_idx : int
-            the index at which to sample the output waveform.
+        time_idx : Optional[Union[int, Sequence[int]]]
+            the index at which to sample the output waveform.  If a list of indices is
+            given, sample at all those indices.  If None, sample at every time point.
 
         Returns
         -------
@@ -163,38 +266,157 @@ class ClkAmpChar(SimulationManager):
         swp_var_list = list(results['sweep_params']['vod'])
         vod = results['vod']
 
-        # error checking
-        if 'gain' not in swp_var_list:
-            raise ValueError('gain must be swept to measure linearity.')
-        if 'time' not in swp_var_list:
-            raise ValueError('time is not swept, something is wrong.')
-
-        # remove time
-        num_dim = len(swp_var_list)
-        ax_idx = swp_var_list.index('time')
-        if ax_idx != num_dim - 1:
-            vod = np.swapaxes(vod, ax_idx, num_dim - 1)
-            swp_var_list[ax_idx] = swp_var_list[num_dim - 1]
-        vod = vod[..., time_idx]
-        swp_var_list = swp_var_list[:-1]
-
-        # move gain to first dimension
-        ax_idx = swp_var_list.index('gain')
-        if ax_idx != 0:
-            vod = np.swapaxes(vod, 0, ax_idx)
-            swp_var_list[ax_idx] = swp_var_list[0]
-        swp_var_list = swp_var_list[1:]
+        swp_var_list, perm = cls._get_linearity_axes(swp_var_list)
+        # move gain to first dimension and time to last dimension.
+        vod = np.transpose(vod, perm)
+        if time_idx is None:
+            swp_var_list.append('time')
+        elif isinstance(time_idx, (int, np.integer)):
+            vod = vod[..., time_idx]
+        else:
+            vod = np.take(vod, time_idx, axis=-1)
+            swp_var_list.append('time')
 
         # perform least square linear fit
         vin = results['gain']
         num_in = vin.size
         swp_shape = vod.shape[1:]
-        b = vod.reshape((num_in, -1))
-        a = np.ones((num_in, 2), dtype=float)
-        a[:, 0] = vin
-        x, err, _, _ = linalg.lstsq(a, b)
+        x, err = cls._fit_linear(vin, vod.reshape((num_in, -1)))
         # reshape answer to match sweep parameters
         x = x.reshape((2, ) + swp_shape)
         err = err.reshape(swp_shape)
 
         return x[0, ...], x[1, ...], err, swp_var_list
+
+    @classmethod
+    def _get_linearity_axes(cls, swp_var_list):
+        # type: (List[str]) -> Tuple[List[str], List[int]]
+        """Returns linearity output sweep variables and the axes permutation of the vod array.
+
+        The permutation moves gain to the first dimension and time to the last dimension.
+        The order of the remaining dimensions is returned as the output sweep variables.
+        """
+        # error checking
+        if 'gain' not in swp_var_list:
+            raise ValueError('gain must be swept to measure linearity.')
+        if 'time' not in swp_var_list:
+            raise ValueError('time is not swept, something is wrong.')
+
+        # remove time
+        num_dim = len(swp_var_list)
+        order = list(range(num_dim))
+        time_ax = swp_var_list.index('time')
+        order[time_ax] = order[num_dim - 1]
+        order = order[:-1]
+
+        # remove gain
+        gain_ax = swp_var_list.index('gain')
+        ax_idx = order.index(gain_ax)
+        order[ax_idx] = order[0]
+        order = order[1:]
+
+        return [swp_var_list[idx] for idx in order], [gain_ax] + order + [time_ax]
+
+    @classmethod
+    def compute_linearity_chunked(cls, fname, out_fname, time_idx=None, max_size=2**24,
+                                  compression='gzip'):
+        # type: (str, str, Optional[Union[int, Sequence[int]]], int, str) -> List[str]
+        """Compute linearity spec from a HDF5 simulation result file chunk by chunk.
+
+        This method is equivalent to compute_linearity(), except that the vod array is
+        read one hyperslab at a time over the non-gain dimensions, and the gain, offset,
+        and err arrays are written incrementally to the output HDF5 file.  As the result,
+        peak memory usage is bounded by max_size regardless of the sweep size.
+
+        Parameters
+        ----------
+        fname : str
+            the simulation result HDF5 file name.
+        out_fname : str
+            the output HDF5 file name.  The gain, offset, and err arrays are saved in the
+            same format as save_sim_results(), so this file can be read with load_sim_file().
+        time_idx : Optional[Union[int, Sequence[int]]]
+            the index at which to sample the output waveform.  If a list of indices is
+            given, sample at all those indices.  If None, sample at every time point.
+        max_size : int
+            maximum number of vod array elements to read at once.
+        compression : str
+            the output HDF5 dataset compression method.
+
+        Returns
+        -------
+        swp_var_list : List[str]
+            list of swept parameter names of each dimension of the output arrays.
+        """
+        out_fname = os.path.abspath(out_fname)
+        os.makedirs(os.path.dirname(out_fname), exist_ok=True)
+        with h5py.File(fname, 'r') as f_in, h5py.File(out_fname, 'w') as f_out:
+            vod = f_in['vod']
+            in_var_list = [var.decode('utf-8') if isinstance(var, bytes) else var
+                           for var in vod.attrs['sweep_params']]
+            swp_var_list, perm = cls._get_linearity_axes(in_var_list)
+            vin = f_in['gain'][()]
+            num_in = vin.size
+            gain_ax, out_axes, time_ax = perm[0], perm[1:-1], perm[-1]
+
+            # get index vector of each output dimension
+            idx_list = [np.arange(vod.shape[ax]) for ax in out_axes]
+            if time_idx is None or not isinstance(time_idx, (int, np.integer)):
+                num_time = vod.shape[time_ax]
+                if time_idx is None:
+                    idx_list.append(np.arange(num_time))
+                else:
+                    idx_list.append(np.asarray(time_idx, dtype=int) % num_time)
+                out_axes.append(time_ax)
+                swp_var_list.append('time')
+                read_axes = list(range(vod.ndim))
+            else:
+                read_axes = [ax for ax in range(vod.ndim) if ax != time_ax]
+            # permutation from read hyperslab axes to [gain] + output axes
+            read_perm = [read_axes.index(ax) for ax in [gain_ax] + out_axes]
+
+            # create output datasets
+            out_shape = tuple(idx_vec.size for idx_vec in idx_list)
+            comp = compression if out_shape else None
+            out_dsets = []
+            for name in ('gain', 'offset', 'err'):
+                dset = f_out.create_dataset(name, shape=out_shape, dtype=float, compression=comp)
+                dset.attrs['sweep_params'] = [var.encode('utf-8') for var in swp_var_list]
+                out_dsets.append(dset)
+            for var, idx_vec in zip(swp_var_list, idx_list):
+                f_out.create_dataset(var, data=f_in[var][()][idx_vec], compression=compression)
+
+            # compute chunk shape, fill up trailing dimensions first
+            budget = max(1, max_size // num_in)
+            chunk_shape = []
+            for num in reversed(out_shape):
+                chunk_shape.insert(0, max(1, min(num, budget)))
+                budget //= num
+            chunk_iter = itertools.product(*(range(0, num, step) for num, step in zip(out_shape, chunk_shape)))
+
+            for start_list in chunk_iter:
+                out_sel = []
+                read_sel = [slice(None)] * vod.ndim
+                if len(read_axes) < vod.ndim:
+                    read_sel[time_ax] = time_idx
+                time_inv = None
+                for ax, idx_vec, start, step in zip(out_axes, idx_list, start_list, chunk_shape):
+                    cur_sel = slice(start, start + step)
+                    out_sel.append(cur_sel)
+                    if ax == time_ax and time_idx is not None:
+                        # HDF5 only supports sorted unique index lists.
+                        read_sel[ax], time_inv = np.unique(idx_vec[cur_sel], return_inverse=True)
+                    else:
+                        read_sel[ax] = cur_sel
+
+                data = np.transpose(vod[tuple(read_sel)], read_perm)
+                if time_inv is not None:
+                    data = np.take(data, time_inv, axis=-1)
+                cur_shape = data.shape[1:]
+                x, err = cls._fit_linear(vin, data.reshape((num_in, -1)))
+                out_sel = tuple(out_sel)
+                out_dsets[0][out_sel] = x[0, :].reshape(cur_shape)
+                out_dsets[1][out_sel] = x[1, :].reshape(cur_shape)
+                out_dsets[2][out_sel] = err.reshape(cur_shape)
+
+        return swp_var_list
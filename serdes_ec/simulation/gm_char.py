@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+########################################################################################################################
+#
+# Copyright (c) 2014, Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+#   disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the
+#    following disclaimer in the documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+########################################################################################################################
+
+
+"""This module contains vectorized post-processing functions for Gm DC characterization."""
+
+from typing import Dict, Any, Tuple, Optional, Sequence, Union
+
+import warnings
+
+import numpy as np
+import scipy.interpolate as interp
+import scipy.integrate as integ
+
+from bag.util.search import FloatBinaryIterator
+
+
+def get_charge_weights(bias, tper, ck_amp, ck_bias, num_k=7, method='linear', integ_method='romb'):
+    # type: (np.ndarray, float, float, Union[float, Sequence[float]], int, str, str) -> np.ndarray
+    """Returns the matrix that maps DC current versus bias to integrated charge per clock period.
+
+    Both interpolation and numerical integration are linear operations on the current
+    values, so the charge integrated over one period of a sinusoidal tail clock is a
+    weighted sum of the DC current at each simulated bias point.  This method computes
+    those weights for every clock bias at once.
+
+    Parameters
+    ----------
+    bias : np.ndarray
+        the simulated tail bias voltage vector.  Must be sorted.
+    tper : float
+        the clock period.
+    ck_amp : float
+        the clock amplitude.
+    ck_bias : Union[float, Sequence[float]]
+        the clock bias voltage, or a list of clock bias voltages.
+    num_k : int
+        the clock waveform has 2 ** num_k + 1 samples.
+    method : str
+        the interpolation method.  Any kind supported by interp1d.
+    integ_method : str
+        the integration method.  Either 'romb' or 'simps'.
+
+    Returns
+    -------
+    weights : np.ndarray
+        a (N_ck_bias, N_bias) array of integration weights.
+
+    Warns
+    -----
+    UserWarning
+        if the clock waveform exceeds the simulated bias range.
+    """
+    ck_bias = np.atleast_1d(np.asarray(ck_bias, dtype=float))
+    if np.amin(ck_bias) - ck_amp < bias[0] or np.amax(ck_bias) + ck_amp > bias[-1]:
+        warnings.warn('clock waveform exceed simulation range; current is extrapolated.')
+
+    num = 2 ** num_k + 1
+    tvec, tstep = np.linspace(0, tper, num, endpoint=False, retstep=True)
+    tail_wv = np.maximum(bias[0], ck_bias[:, np.newaxis] - ck_amp * np.cos(tvec * (2 * np.pi / tper)))
+
+    if integ_method == 'romb':
+        t_weights = integ.romb(np.eye(num), dx=tstep, axis=-1)
+    elif integ_method == 'simps':
+        t_weights = np.full(num, 2.0)
+        t_weights[1::2] = 4.0
+        t_weights[0] = t_weights[-1] = 1.0
+        t_weights *= tstep / 3
+    else:
+        raise ValueError('Unknown integration method: %s' % integ_method)
+
+    # interpolate the identity matrix to get the weight of each bias point.
+    fun = interp.interp1d(bias, np.eye(bias.size), kind=method, axis=0, copy=False,
+                          fill_value='extrapolate', assume_sorted=True)
+    # fun(tail_wv) has shape (N_ck_bias, num, N_bias)
+    return np.einsum('t,ctb->cb', t_weights, fun(tail_wv))
+
+
+def get_dc_tf(result, tper, ck_amp, ck_bias, num_k=7, sim_env=None, method='linear', integ_method='romb'):
+    # type: (Dict[str, Any], float, float, Any, int, Optional[str], str, str) -> Dict[str, Any]
+    """Compute differential and common mode output charge for all clock bias and corners.
+
+    Parameters
+    ----------
+    result : Dict[str, Any]
+        the Gm DC characterization simulation result dictionary.  Must contain ioutp and
+        ioutn swept over indm and bias, and optionally over corner.
+    tper : float
+        the clock period.
+    ck_amp : float
+        the clock amplitude.
+    ck_bias : Union[float, Sequence[float]]
+        the clock bias voltage, or a list of clock bias voltages.
+    num_k : int
+        the clock waveform has 2 ** num_k + 1 samples.
+    sim_env : Optional[str]
+        If not None, only compute for this corner.
+    method : str
+        the interpolation method.  Any kind supported by interp1d.
+    integ_method : str
+        the integration method.  Either 'romb' or 'simps'.
+
+    Returns
+    -------
+    tf_info : Dict[str, Any]
+        the transfer function dictionary with the following entries:
+
+        indm : np.ndarray
+            the differential input voltage vector.
+        ck_bias : np.ndarray
+            the clock bias voltage vector.
+        corner : np.ndarray
+            the corner vector.  Only present if corner is swept.
+        qdm : np.ndarray
+            a (..., N_ck_bias, N_indm) array of differential output charge.  If corner is
+            swept, the first dimension is corner.
+        qcm : np.ndarray
+            a (..., N_ck_bias, N_indm) array of common mode output charge.
+    """
+    swp_pars = list(result['sweep_params']['ioutp'])
+    ioutp = result['ioutp']  # type: np.ndarray
+    ioutn = result['ioutn']  # type: np.ndarray
+    bias = result['bias']
+    ck_bias = np.atleast_1d(np.asarray(ck_bias, dtype=float))
+
+    # arrange dimensions as (corner, indm, bias)
+    ax_list = [swp_pars.index('indm'), swp_pars.index('bias')]
+    tf_info = dict(indm=result['indm'], ck_bias=ck_bias)
+    if 'corner' in swp_pars:
+        corner_idx = swp_pars.index('corner')
+        corners = result['corner']
+        if sim_env is not None:
+            env_idx = np.argwhere(corners == sim_env)[0][0]
+            ioutp = np.take(ioutp, env_idx, axis=corner_idx)
+            ioutn = np.take(ioutn, env_idx, axis=corner_idx)
+            ax_list = [ax - 1 if ax > corner_idx else ax for ax in ax_list]
+        else:
+            ax_list.insert(0, corner_idx)
+            tf_info['corner'] = corners
+    ioutp = np.transpose(ioutp, ax_list)
+    ioutn = np.transpose(ioutn, ax_list)
+
+    weights = get_charge_weights(bias, tper, ck_amp, ck_bias, num_k=num_k, method=method,
+                                 integ_method=integ_method)
+    # charge arrays have shape (..., N_indm, N_ck_bias), move ck_bias before indm.
+    p_charge = np.swapaxes(np.dot(ioutp, weights.T), -1, -2)
+    n_charge = np.swapaxes(np.dot(ioutn, weights.T), -1, -2)
+    tf_info['qdm'] = n_charge - p_charge
+    tf_info['qcm'] = (n_charge + p_charge) / 2
+    return tf_info
+
+
+def get_vstar(in_vec, out_vec, rel_err, tol=1e-3, num=21, method='cubic'):
+    # type: (np.ndarray, np.ndarray, float, float, int, str) -> Tuple[float, float, float, float]
+    """Find the largest input range where the transfer function is linear within the given error.
+
+    Parameters
+    ----------
+    in_vec : np.ndarray
+        the input vector, symmetric around 0.
+    out_vec : np.ndarray
+        the output vector.
+    rel_err : float
+        maximum error relative to the output swing.
+    tol : float
+        the V* tolerance.
+    num : int
+        number of points used for linear fit.
+    method : str
+        the interpolation method.
+
+    Returns
+    -------
+    vstar : float
+        the V*.
+    err : float
+        the relative error at V*.
+    gain : float
+        the linear fit gain.
+    offset : float
+        the linear fit offset.
+    """
+    fun = interp.interp1d(in_vec, out_vec, kind=method, copy=False, fill_value='extrapolate',
+                          assume_sorted=True)
+    mid_idx = in_vec.size // 2
+    vmin = in_vec[mid_idx + 1]
+    vmax = in_vec[-1]
+
+    bin_iter = FloatBinaryIterator(vmin, vmax, tol=tol)
+    while bin_iter.has_next():
+        vtest = bin_iter.get_next()
+
+        x_vec = np.linspace(-vtest, vtest, num, endpoint=True)
+        b_vec = fun(x_vec)
+        a_mat = np.column_stack((x_vec, np.ones(num)))
+        x, _, _, _ = np.linalg.lstsq(a_mat, b_vec)
+        rel_err_cur = np.amax(np.abs(np.dot(a_mat, x) - b_vec)) / abs(x[0] * vtest)
+
+        if rel_err_cur <= rel_err:
+            bin_iter.save_info((vtest, rel_err_cur, x[0], x[1]))
+            bin_iter.up()
+        else:
+            bin_iter.down()
+
+    return bin_iter.get_last_save_info()
+
+
+def get_vstar_batch(in_vec, out_arr, rel_err, tol=1e-3, num=21, method='cubic', num_cand=16,
+                    max_size=2**24):
+    # type: (np.ndarray, np.ndarray, float, float, int, str, int, int) -> Tuple[np.ndarray, ...]
+    """Batched version of get_vstar().
+
+    Instead of a sequential binary search, this function evaluates a grid of candidate V*
+    values for every transfer function at once, then repeatedly refines the grid
+    around the pass/fail crossing until the V* tolerance is met.  Since the linear fit
+    points are symmetric around 0, the least-square fit has a closed-form solution.
+
+    Parameters
+    ----------
+    in_vec : np.ndarray
+        the input vector, symmetric around 0.
+    out_arr : np.ndarray
+        a (..., N_in) array of output values.  Each 1D slice along the last dimension
+        is one transfer function.
+    rel_err : float
+        maximum error relative to the output swing.
+    tol : float
+        the V* tolerance.
+    num : int
+        number of points used for linear fit.
+    method : str
+        the interpolation method.
+    num_cand : int
+        number of candidate V* values evaluated per refinement step.
+    max_size : int
+        maximum number of interpolation weights to compute at once.  Transfer functions
+        are processed in chunks to bound memory usage.
+
+    Returns
+    -------
+    vstar : np.ndarray
+        the V* array.  NaN if no candidate meets the error requirement.
+    err : np.ndarray
+        the relative error at V*.
+    gain : np.ndarray
+        the linear fit gain.
+    offset : np.ndarray
+        the linear fit offset.
+    """
+    out_arr = np.asarray(out_arr, dtype=float)
+    swp_shape = out_arr.shape[:-1]
+    out_arr = out_arr.reshape(-1, in_vec.size)
+    num_swp = out_arr.shape[0]
+
+    mid_idx = in_vec.size // 2
+    vmin = in_vec[mid_idx + 1]
+    vmax = in_vec[-1]
+    # interpolation is linear in the output values, so interpolate the identity matrix
+    # to get interpolation weights that can be shared by all transfer functions.
+    basis_fun = interp.interp1d(in_vec, np.eye(in_vec.size), kind=method, axis=0, copy=False,
+                                fill_value='extrapolate', assume_sorted=True)
+    u_vec = np.linspace(-1, 1, num, endpoint=True)
+    u_norm = np.sum(np.square(u_vec))
+
+    results = np.empty((4, num_swp))
+    chunk_size = max(1, max_size // (num_cand * num * in_vec.size))
+    for start in range(0, num_swp, chunk_size):
+        b_arr = out_arr[start:start + chunk_size, :]
+        cur_size = b_arr.shape[0]
+        # first step: candidates span the whole range, and shared by all transfer functions
+        lo = np.full(cur_size, vmin)
+        hi = np.full(cur_size, vmax)
+        lo_info = np.full((3, cur_size), np.nan)
+        cand = np.broadcast_to(np.linspace(vmin, vmax, num_cand, endpoint=True), (cur_size, num_cand))
+        frac = np.linspace(0, 1, num_cand + 2)[1:-1]
+        while True:
+            # evaluate all candidates
+            x_arr = cand[:, :, np.newaxis] * u_vec
+            y_arr = np.einsum('scmn,sn->scm', basis_fun(x_arr), b_arr)
+            gain = np.dot(y_arr, u_vec) / (u_norm * cand)
+            offset = np.mean(y_arr, axis=-1)
+            res_arr = y_arr - gain[:, :, np.newaxis] * x_arr - offset[:, :, np.newaxis]
+            err = np.amax(np.abs(res_arr), axis=-1) / np.abs(gain * cand)
+
+            # find last passing candidate before the first failing one
+            num_pass = np.sum(np.cumprod(err <= rel_err, axis=-1), axis=-1)
+            cand_ext = np.column_stack((lo, cand, hi))
+            info_ext = np.concatenate((lo_info[:, :, np.newaxis], np.stack((err, gain, offset))), axis=-1)
+            lo = cand_ext[np.arange(cur_size), num_pass]
+            hi = cand_ext[np.arange(cur_size), num_pass + 1]
+            lo_info = info_ext[:, np.arange(cur_size), num_pass]
+            if np.amax(hi - lo) <= tol:
+                break
+            # refine candidates between lo and hi
+            cand = lo[:, np.newaxis] + (hi - lo)[:, np.newaxis] * frac
+
+        results[0, start:start + cur_size] = np.where(np.isnan(lo_info[0]), np.nan, lo)
+        results[1:, start:start + cur_size] = lo_info
+
+    results = results.reshape((4, ) + swp_shape)
+    return results[0], results[1], results[2], results[3]
+
+
+def compute_gm_metrics(result, tper, vdd, cload, ck_amp, ck_bias, rel_err, dc_params=None, vstar_params=None):
+    # type: (...) -> Dict[str, Any]
+    """Compute gain, V*, offset, and output common mode for all clock bias and corners.
+
+    Parameters
+    ----------
+    result : Dict[str, Any]
+        the Gm DC characterization simulation result dictionary.
+    tper : float
+        the clock period.
+    vdd : float
+        the supply voltage.
+    cload : float
+        the load capacitance.
+    ck_amp : float
+        the clock amplitude.
+    ck_bias : Union[float, Sequence[float]]
+        the clock bias voltage, or a list of clock bias voltages.
+    rel_err : float
+        maximum relative error used to define V*.
+    dc_params : Optional[Dict[str, Any]]
+        additional arguments to get_dc_tf().
+    vstar_params : Optional[Dict[str, Any]]
+        additional arguments to get_vstar_batch().
+
+    Returns
+    -------
+    metrics : Dict[str, Any]
+        the metrics dictionary.  vstar, gain, offset, and voutcm are arrays of shape
+        (..., N_ck_bias), where the first dimension is corner if corner is swept.  Also
+        contains the ck_bias and corner vectors.
+    """
+    dc_params = {} if dc_params is None else dc_params
+    vstar_params = {} if vstar_params is None else vstar_params
+
+    tf_info = get_dc_tf(result, tper, ck_amp, ck_bias, **dc_params)
+    indm_vec = tf_info['indm']
+    qdm = tf_info['qdm']
+    qcm = tf_info['qcm']
+
+    vstar, _, gain, offset = get_vstar_batch(indm_vec, qdm, rel_err, **vstar_params)
+
+    metrics = dict(
+        ck_bias=tf_info['ck_bias'],
+        vstar=vstar,
+        gain=gain / cload,
+        offset=offset / cload,
+        voutcm=vdd - qcm[..., indm_vec.size // 2] / cload,
+    )
+    if 'corner' in tf_info:
+        metrics['corner'] = tf_info['corner']
+    return metrics
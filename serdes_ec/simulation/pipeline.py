@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+########################################################################################################################
+#
+# Copyright (c) 2014, Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+#   disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the
+#    following disclaimer in the documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+########################################################################################################################
+
+
+"""This module contains a pipelined executor for multi-stage characterization flows."""
+
+from typing import Callable, Any, Sequence, List, Dict, Tuple, Optional
+import time
+import asyncio
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+PipelineStage = namedtuple('PipelineStage', ['name', 'fn', 'max_workers', 'lock'])
+PipelineStage.__new__.__defaults__ = (None,)
+
+
+class PipelineAbortedError(Exception):
+    """Raised for items that are aborted because another item failed."""
+    pass
+
+
+class StagePipeline(object):
+    """Runs a list of items through a sequence of stages with bounded concurrency per stage.
+
+    Each item goes through every stage in order, and the output of a stage is the input of the
+    next stage.  Different items proceed independently, so stage i of item n + 1 can run at
+    the same time as stage i + 1 of item n.  Each stage limits how many items it processes
+    concurrently.
+
+    Stage functions run in worker threads.  Each item gets its own asyncio event loop, which is
+    closed when the item finishes, so stage functions that run coroutines to completion on the
+    current event loop work.
+
+    Stages can also name a lock.  Stages with the same lock never run at the same time, for any
+    item.  Use this for stages that share a connection that is not thread safe, such as the
+    Virtuoso SKILL connection of a BagProject, which is used for testbench creation.
+
+    Parameters
+    ----------
+    stages : Sequence[Tuple[Any, ...]]
+        list of (name, function, max_workers) or (name, function, max_workers, lock) tuples.
+        lock is the name of the lock held while the stage runs, or None.
+    """
+
+    def __init__(self, stages):
+        # type: (Sequence[Tuple[Any, ...]]) -> None
+        self._stages = [PipelineStage(*info) for info in stages]
+        for stage in self._stages:
+            if stage.max_workers < 1:
+                raise ValueError('Stage %s must have at least 1 worker.' % stage.name)
+        self._sems = [threading.Semaphore(stage.max_workers) for stage in self._stages]
+        self._locks = {stage.lock: threading.Lock() for stage in self._stages
+                       if stage.lock is not None}
+        self._stop = threading.Event()
+
+    @property
+    def stage_names(self):
+        # type: () -> List[str]
+        return [stage.name for stage in self._stages]
+
+    def _run_item(self, item):
+        # type: (Any) -> Any
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return self._run_stages(item)
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def _run_stages(self, item):
+        # type: (Any) -> Any
+        val = item
+        for stage, sem in zip(self._stages, self._sems):
+            lock = self._locks.get(stage.lock, None)
+            with sem:
+                if lock is not None:
+                    lock.acquire()
+                try:
+                    if self._stop.is_set():
+                        raise PipelineAbortedError('Pipeline aborted before stage %s.'
+                                                   % stage.name)
+                    try:
+                        val = stage.fn(val)
+                    except Exception:
+                        self._stop.set()
+                        raise
+                finally:
+                    if lock is not None:
+                        lock.release()
+        return val
+
+    def run(self, items):
+        # type: (Sequence[Any]) -> List[Any]
+        """Run all items through the pipeline.
+
+        If any stage raises an exception, items that have not started a new stage are
+        aborted, and the first exception (in item order) is raised.
+
+        Parameters
+        ----------
+        items : Sequence[Any]
+            the input items of the first stage.
+
+        Returns
+        -------
+        results : List[Any]
+            the outputs of the last stage, in the same order as items.
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        self._stop.clear()
+        num_threads = min(len(items), sum((stage.max_workers for stage in self._stages)))
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            futures = [executor.submit(self._run_item, item) for item in items]
+            # wait for every item to finish before raising, so no stage is left running.
+            errors = [fut.exception() for fut in futures]
+
+        for err in errors:
+            if err is not None and not isinstance(err, PipelineAbortedError):
+                raise err
+        return [fut.result() for fut in futures]
+
+
+class LocalBackend(object):
+    """A stand-in backend that emulates each pipeline stage with a fixed delay.
+
+    This class is used to test pipeline scheduling without any CAD tools.  Every stage
+    function sleeps for the given delay, then returns its input.  The start and stop time
+    of every stage is recorded.
+
+    Parameters
+    ----------
+    delays : Dict[str, float]
+        the delay of each stage, in seconds.
+    fail_on : Optional[Tuple[str, Any]]
+        If not None, the (stage name, item) pair that raises an exception.
+    """
+
+    def __init__(self, delays, fail_on=None):
+        # type: (Dict[str, float], Optional[Tuple[str, Any]]) -> None
+        self._delays = delays
+        self._fail_on = fail_on
+        self._lock = threading.Lock()
+        self.log = []  # type: List[Tuple[str, Any, float, float]]
+
+    def get_stage_fn(self, name):
+        # type: (str) -> Callable[[Any], Any]
+        delay = self._delays[name]
+
+        def stage_fn(item):
+            t_start = time.perf_counter()
+            time.sleep(delay)
+            if self._fail_on is not None and self._fail_on == (name, item):
+                raise ValueError('%s failed on %s' % (name, item))
+            with self._lock:
+                self.log.append((name, item, t_start, time.perf_counter()))
+            return item
+
+        return stage_fn
+
+    def get_stages(self, max_workers, locks=None):
+        # type: (Dict[str, int], Optional[Dict[str, str]]) -> List[Tuple[Any, ...]]
+        """Returns pipeline stages emulating the stages of the delays dictionary, in order.
+
+        Parameters
+        ----------
+        max_workers : Dict[str, int]
+            the maximum number of workers of each stage.  Defaults to 1.
+        locks : Optional[Dict[str, str]]
+            the lock name of each stage.  Stages not in this dictionary do not use a lock.
+        """
+        locks = {} if locks is None else locks
+        return [(name, self.get_stage_fn(name), max_workers.get(name, 1), locks.get(name, None))
+                for name in self._delays]
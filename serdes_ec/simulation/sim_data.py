@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+########################################################################################################################
+#
+# Copyright (c) 2014, Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+#   disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the
+#    following disclaimer in the documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+########################################################################################################################
+
+
+"""This module contains a lazy, slice-on-demand simulation results reader."""
+
+from typing import Dict, Any, List, Tuple, Union, Sequence
+
+import h5py
+import numpy as np
+
+
+def _to_str(val):
+    # type: (Any) -> Any
+    return val.decode('utf-8') if isinstance(val, bytes) else val
+
+
+def _normalize_index(idx, dim_size, var, name):
+    # type: (np.ndarray, int, str, str) -> np.ndarray
+    """Map negative indices to the equivalent non-negative indices, and check the range."""
+    if np.any(idx < -dim_size) or np.any(idx >= dim_size):
+        raise ValueError('Index %s out of range for sweep parameter %s of output %s with '
+                         'size %d.' % (idx.tolist(), var, name, dim_size))
+    return idx % dim_size
+
+
+class LazySimData(object):
+    """A lazy view of a simulation results HDF5 file.
+
+    The HDF5 file is kept open, and output arrays are only read when requested.  Outputs
+    can be selected by sweep parameter labels, in which case only the required hyperslab is
+    read from the file.  This class reads files saved by save_sim_results().
+
+    This class also supports the dictionary interface of load_sim_file() results, so
+    indexing by name reads the full array.
+
+    Parameters
+    ----------
+    fname : str
+        the simulation results HDF5 file name.
+    """
+
+    def __init__(self, fname):
+        # type: (str) -> None
+        self._file = h5py.File(fname, 'r')
+        self._sweep_params = {}  # type: Dict[str, List[str]]
+        for name, dset in self._file.items():
+            if 'sweep_params' in dset.attrs:
+                self._sweep_params[name] = [_to_str(var) for var in dset.attrs['sweep_params']]
+        self._values = {}  # type: Dict[str, np.ndarray]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        # type: () -> None
+        """Close the HDF5 file."""
+        self._file.close()
+
+    @property
+    def sweep_params(self):
+        # type: () -> Dict[str, List[str]]
+        """Dictionary from output name to list of sweep parameter names."""
+        return self._sweep_params
+
+    @property
+    def outputs(self):
+        # type: () -> List[str]
+        """List of output names."""
+        return list(self._sweep_params.keys())
+
+    def __contains__(self, name):
+        # type: (str) -> bool
+        return name == 'sweep_params' or name in self._file
+
+    def __getitem__(self, name):
+        # type: (str) -> Any
+        if name == 'sweep_params':
+            return self._sweep_params
+        if name in self._sweep_params:
+            return self._file[name][()]
+        return self.get_values(name)
+
+    def get_dataset(self, name):
+        # type: (str) -> h5py.Dataset
+        """Returns the underlying HDF5 dataset, for manual slicing."""
+        return self._file[name]
+
+    def get_values(self, var):
+        # type: (str) -> np.ndarray
+        """Returns the values of the given sweep parameter.  The values are cached."""
+        if var not in self._values:
+            vals = self._file[var][()]
+            if vals.dtype.kind in 'SO':
+                vals = np.array([_to_str(v) for v in vals])
+            self._values[var] = vals
+        return self._values[var]
+
+    def get_index(self, var, label):
+        # type: (str, Any) -> int
+        """Returns the index of the given sweep parameter value.
+
+        Numerical values are matched within a small relative tolerance.
+        """
+        vals = self.get_values(var)
+        if vals.dtype.kind in 'UO':
+            idx_list = np.nonzero(vals == label)[0]
+            if idx_list.size == 0:
+                raise ValueError('Cannot find %s = %s' % (var, label))
+            return int(idx_list[0])
+
+        idx = int(np.argmin(np.abs(vals - label)))
+        if not np.isclose(vals[idx], label, rtol=1e-6, atol=1e-15):
+            raise ValueError('Cannot find %s = %s' % (var, label))
+        return idx
+
+    def isel(self, name, **kwargs):
+        # type: (str, **Union[int, Sequence[int]]) -> Tuple[np.ndarray, List[str]]
+        """Read the given output at the given sweep parameter indices.
+
+        Parameters
+        ----------
+        name : str
+            the output name.
+        **kwargs : Union[int, Sequence[int]]
+            map from sweep parameter name to index or list of indices.  An integer index
+            removes the dimension.  Unspecified dimensions are read fully.
+
+        Returns
+        -------
+        data : np.ndarray
+            the output data.
+        swp_var_list : List[str]
+            the sweep parameter names of each dimension of data.
+        """
+        swp_var_list = self._sweep_params[name]
+        for var in kwargs:
+            if var not in swp_var_list:
+                raise ValueError('%s is not swept in output %s' % (var, name))
+
+        # build hyperslab.  Index lists are read as a bounding slice, then indexed in memory,
+        # since HDF5 only supports one sorted index list per selection.  Negative indices are
+        # normalized first, so they count from the end of the dimension.
+        dset = self._file[name]
+        sel = []
+        post_sel = []
+        out_vars = []
+        for var, dim_size in zip(swp_var_list, dset.shape):
+            idx = kwargs.get(var, None)
+            if idx is None:
+                sel.append(slice(None))
+                post_sel.append(slice(None))
+                out_vars.append(var)
+            elif isinstance(idx, (int, np.integer)):
+                sel.append(int(_normalize_index(np.asarray(idx), dim_size, var, name)))
+            else:
+                idx = np.asarray(idx, dtype=int)
+                if idx.size == 0:
+                    raise ValueError('Empty index list for sweep parameter %s of output %s.'
+                                     % (var, name))
+                idx = _normalize_index(idx, dim_size, var, name)
+                start = int(np.amin(idx))
+                sel.append(slice(start, int(np.amax(idx)) + 1))
+                post_sel.append(idx - start)
+                out_vars.append(var)
+
+        data = dset[tuple(sel)]
+        for ax, cur_sel in enumerate(post_sel):
+            if not isinstance(cur_sel, slice):
+                data = np.take(data, cur_sel, axis=ax)
+        return data, out_vars
+
+    def sel(self, name, **kwargs):
+        # type: (str, **Any) -> Tuple[np.ndarray, List[str]]
+        """Read the given output at the given sweep parameter values.
+
+        Same as isel(), but selects by sweep parameter value (label) instead of index.  A
+        scalar label removes the dimension, a list of labels keeps it.
+        """
+        idx_dict = {}
+        for var, label in kwargs.items():
+            if isinstance(label, (list, tuple, np.ndarray)):
+                idx_dict[var] = [self.get_index(var, val) for val in label]
+            else:
+                idx_dict[var] = self.get_index(var, label)
+        return self.isel(name, **idx_dict)
+
+    def select(self, **kwargs):
+        # type: (**Any) -> Dict[str, Any]
+        """Returns a simulation results dictionary with the given sweep parameter values selected.
+
+        The return value has the same format as load_sim_file(), but only the selected
+        hyperslab of each output is read.  Sweep parameters selected with a scalar label are
+        removed.
+        """
+        results = {}
+        sweep_params = {}
+        for name, swp_var_list in self._sweep_params.items():
+            cur_kwargs = {var: val for var, val in kwargs.items() if var in swp_var_list}
+            results[name], sweep_params[name] = self.sel(name, **cur_kwargs)
+            for var in sweep_params[name]:
+                if var not in results:
+                    vals = self.get_values(var)
+                    label = kwargs.get(var, None)
+                    if label is not None:
+                        vals = vals[[self.get_index(var, val) for val in label]]
+                    results[var] = vals
+
+        results['sweep_params'] = sweep_params
+        return results
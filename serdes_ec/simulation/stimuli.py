@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+########################################################################################################################
+#
+# Copyright (c) 2014, Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+#   disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the
+#    following disclaimer in the documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+########################################################################################################################
+
+
+"""This module contains functions that generate simulation stimuli files."""
+
+from typing import Sequence
+import os
+import hashlib
+
+import numpy as np
+
+from bag.io import open_file
+from bag.data.digital import dig_to_pwl
+
+
+def write_pwl_file(tvec, yvec, fname, precision=8):
+    # type: (Sequence[float], Sequence[float], str, int) -> None
+    """Write the given piece-wise linear waveform to file.
+
+    All samples are formatted with a single string formatting operation.
+
+    Parameters
+    ----------
+    tvec : Sequence[float]
+        the time vector.
+    yvec : Sequence[float]
+        the value vector.
+    fname : str
+        the output file name.
+    precision : int
+        number of decimal places.
+    """
+    data = np.column_stack((tvec, yvec)).ravel().tolist()
+    fname = os.path.abspath(fname)
+    os.makedirs(os.path.dirname(fname), exist_ok=True)
+    line_fmt = '%%.%df %%.%df\n' % (precision, precision)
+    with open_file(fname, 'w') as f:
+        f.write((line_fmt * (len(data) // 2)) % tuple(data))
+
+
+def setup_pwl_file(values, tper, tr, fname, td=0.0, precision=8):
+    # type: (Sequence[float], float, float, str, float, int) -> bool
+    """Create a PWL stimulus file from the given digital values, reusing existing file if possible.
+
+    A hash of the stimulus definition is saved next to the stimulus file.  If the stimulus
+    file exists and the saved hash matches, the file is not rewritten.
+
+    Parameters
+    ----------
+    values : Sequence[float]
+        the digital values.
+    tper : float
+        the period of each value.
+    tr : float
+        the rise/fall time.
+    fname : str
+        the output file name.
+    td : float
+        the delay.
+    precision : int
+        number of decimal places.
+
+    Returns
+    -------
+    updated : bool
+        True if the stimulus file is written.
+    """
+    stim_def = repr(([float(v) for v in values], float(tper), float(tr), float(td), precision))
+    stim_hash = hashlib.sha1(stim_def.encode('utf-8')).hexdigest()
+
+    fname = os.path.abspath(fname)
+    hash_fname = fname + '.sha1'
+    if os.path.isfile(fname) and os.path.isfile(hash_fname):
+        with open_file(hash_fname, 'r') as f:
+            if f.read().strip() == stim_hash:
+                return False
+
+    # remove the old hash first, and only replace the stimulus file once it is complete, so an
+    # interrupted write is never mistaken for an up-to-date file.
+    if os.path.isfile(hash_fname):
+        os.remove(hash_fname)
+    tvec, yvec = dig_to_pwl(values, tper, tr, td=td)
+    tmp_fname = '%s.%d.tmp' % (fname, os.getpid())
+    write_pwl_file(tvec, yvec, tmp_fname, precision=precision)
+    os.replace(tmp_fname, fname)
+    with open_file(hash_fname, 'w') as f:
+        f.write(stim_hash)
+    return True
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+########################################################################################################################
+#
+# Copyright (c) 2014, Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+#   disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the
+#    following disclaimer in the documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+########################################################################################################################
+
+
+"""This module contains a persistent simulation results database keyed on design hash."""
+
+from typing import Dict, Any, Optional
+import os
+import json
+import hashlib
+
+import yaml
+
+from bag.io import open_file
+from bag.io.sim_data import save_sim_results, load_sim_file
+
+
+class SweepDatabase(object):
+    """A persistent database of simulation results, keyed on a stable hash of the design.
+
+    Each entry stores the simulation results of one sweep point in its own HDF5 file.  An
+    index file maps each key to the entry information.
+
+    Parameters
+    ----------
+    root_dir : str
+        the database root directory.
+    """
+
+    def __init__(self, root_dir):
+        # type: (str) -> None
+        self._root_dir = os.path.abspath(root_dir)
+        self._index_fname = os.path.join(self._root_dir, 'index.yaml')
+        if os.path.isfile(self._index_fname):
+            with open_file(self._index_fname, 'r') as f:
+                self._index = yaml.safe_load(f) or {}
+        else:
+            self._index = {}
+
+    @classmethod
+    def get_key(cls, *args):
+        # type: (*Any) -> str
+        """Returns a stable hash of the given objects.
+
+        Dictionary keys are sorted, so the hash does not depend on insertion order.
+        """
+        content = json.dumps(args, sort_keys=True, default=repr)
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def __contains__(self, key):
+        # type: (str) -> bool
+        return key in self._index and os.path.isfile(self.get_results_fname(key))
+
+    def __len__(self):
+        # type: () -> int
+        return len(self._index)
+
+    def get_info(self, key):
+        # type: (str) -> Dict[str, Any]
+        """Returns the information dictionary of the given entry."""
+        return self._index[key]
+
+    def get_results_fname(self, key):
+        # type: (str) -> str
+        """Returns the simulation results file name of the given entry."""
+        return os.path.join(self._root_dir, '%s.hdf5' % key)
+
+    def add_results(self, key, results, info=None):
+        # type: (str, Dict[str, Any], Optional[Dict[str, Any]]) -> None
+        """Save simulation results to the database.
+
+        Parameters
+        ----------
+        key : str
+            the entry key.
+        results : Dict[str, Any]
+            the simulation results dictionary.
+        info : Optional[Dict[str, Any]]
+            additional information to store in the index, such as the design name.
+        """
+        os.makedirs(self._root_dir, exist_ok=True)
+        save_sim_results(results, self.get_results_fname(key))
+        self._index[key] = {} if info is None else info
+        # write to a temporary file first, so the index is never left half-written.
+        tmp_fname = self._index_fname + '.tmp'
+        with open_file(tmp_fname, 'w') as f:
+            yaml.safe_dump(self._index, f, default_flow_style=False)
+        os.replace(tmp_fname, self._index_fname)
+
+    def load_results(self, key):
+        # type: (str) -> Dict[str, Any]
+        """Load simulation results of the given entry."""
+        return load_sim_file(self.get_results_fname(key))
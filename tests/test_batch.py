@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the batch generator specification checks."""
+
+import os
+
+import pytest
+
+pytest.importorskip('bag')
+
+from serdes_ec.layout.batch import get_batch_groups
+
+_sample_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'specs_test_sample', 'qdr')
+
+
+class _Gen(object):
+    """A stand-in layout class."""
+    pass
+
+
+_cls_table = dict(integ_amp=_Gen, tap1_main=_Gen, tap1_summer=_Gen, tap1_fb=_Gen,
+                  sin_clk_divider=_Gen, analog_laygo=_Gen)
+
+
+def _write_spec(tmpdir, name, impl_lib, impl_cell, layers):
+    fname = str(tmpdir.join('%s.yaml' % name))
+    with open(fname, 'w') as f:
+        f.write('impl_lib: %s\nimpl_cell: %s\nrouting_grid:\n  layers: %s\n'
+                'params: {}\n' % (impl_lib, impl_cell, layers))
+    return fname
+
+
+def test_sample_groups():
+    spec_list = [os.path.join(_sample_dir, name + '.yaml')
+                 for name in ('integ_amp', 'tap1_main', 'tap1_summer')]
+    groups = get_batch_groups(spec_list, cls_table=_cls_table)
+    assert list(groups.keys()) == ['AAAFOO_TEST_INTEG_AMP', 'AAAFOO_TEST_QDR']
+    assert [specs['impl_cell'] for _, specs, _ in groups['AAAFOO_TEST_QDR']] == \
+        ['TAP1_MAIN', 'TAP1_SUMMER']
+
+
+def test_duplicate_cell():
+    # analog_laygo.yaml and integ_amp.yaml both write INTEG_AMP
+    with pytest.raises(ValueError, match='both generate cell INTEG_AMP'):
+        get_batch_groups([_sample_dir], cls_table=_cls_table)
+
+
+def test_mixed_grid(tmpdir):
+    spec_list = [_write_spec(tmpdir, 'a', 'LIB', 'A', '[4, 5]'),
+                 _write_spec(tmpdir, 'b', 'LIB', 'B', '[4, 5, 6]')]
+    with pytest.raises(ValueError, match='different routing grids'):
+        get_batch_groups(spec_list, cls_table=dict(a=_Gen, b=_Gen))
+
+
+def test_missing_class(tmpdir):
+    spec_list = [_write_spec(tmpdir, 'a', 'LIB', 'A', '[4, 5]')]
+    with pytest.raises(ValueError, match='Cannot determine layout class'):
+        get_batch_groups(spec_list)
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the layout master cache helpers."""
+
+import os
+import copy
+
+import numpy as np
+import pytest
+
+pytest.importorskip('bag')
+
+from bag.layout.template import CachedTemplate
+
+import serdes_ec.layout.cache as cache_mod
+from serdes_ec.layout.cache import (
+    get_grid_key, get_leaf_cache, leaf_master_cache, new_leaf_template, prefetch_leaf_templates,
+    LeafMasterCache, IncrementalMasterCache
+)
+
+
+class _Grid(object):
+    """A minimal stand-in for RoutingGrid with the attributes get_grid_key() reads."""
+
+    resolution = 0.001
+    layout_unit = 1e-6
+
+    def __init__(self):
+        self.layers = [4, 5]
+        self.sp_tracks = {4: 50, 5: 50}
+        self.w_tracks = {4: 50, 5: 50}
+        self.offset_tracks = {4: 50, 5: 50}
+        self.dir_tracks = {4: 'x', 5: 'y'}
+        self.block_pitch = {4: (200, 0), 5: (200, 0)}
+        self.w_override = {}
+        self.max_num_tr_tracks = {4: 1000, 5: 1000}
+        self.flip_parity = {4: (False, 0), 5: (False, 0)}
+
+    def get_flip_parity(self):
+        return self.flip_parity.copy()
+
+
+class _Leaf(object):
+    """A stand-in leaf generator class."""
+
+    @classmethod
+    def get_default_param_values(cls):
+        return {}
+
+
+class _Parent(object):
+    """A stand-in parent template that records new_template() calls."""
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.template_db = object()
+        self.calls = []
+
+    def new_template(self, params=None, temp_cls=None):
+        self.calls.append((temp_cls, params))
+        return temp_cls, params
+
+
+class _DB(object):
+    """A stand-in TemplateDB that generates masters."""
+
+    def __init__(self, grid):
+        self.grid = grid
+
+    def new_template(self, params=None, temp_cls=None):
+        if temp_cls is CachedTemplate:
+            return temp_cls
+        master = temp_cls(self, params)
+        master.draw_layout()
+        return master
+
+
+class _Template(object):
+    """A stand-in template."""
+
+    def __init__(self, temp_db, params):
+        self.template_db = temp_db
+        self.grid = temp_db.grid
+        self.params = params
+
+    @classmethod
+    def get_default_param_values(cls):
+        return {}
+
+    def new_template(self, params=None, temp_cls=None):
+        return self.template_db.new_template(params=params, temp_cls=temp_cls)
+
+    def draw_layout(self):
+        pass
+
+
+class _Gen(_Template):
+    """A stand-in generator whose draw_layout() only reads parameter a."""
+
+    @classmethod
+    def get_default_param_values(cls):
+        return dict(b=0)
+
+    def draw_layout(self):
+        self.value = self.params['a']
+
+
+class _GenChild(_Gen):
+    """A stand-in generator that inherits draw_layout()."""
+    pass
+
+
+class _Top(_Template):
+    """A stand-in hierarchical generator with a child that is not cached."""
+
+    def draw_layout(self):
+        self.child = self.new_template(params=dict(a=self.params['a']), temp_cls=_Gen)
+
+
+def _new_parent():
+    return _Template(_DB(_Grid()), {})
+
+
+class _EvictParent(_Parent):
+    """A stand-in parent whose cache files are evicted right before CachedTemplate reads them."""
+
+    def new_template(self, params=None, temp_cls=None):
+        if temp_cls is CachedTemplate:
+            os.remove(params['cache_fname'])
+            with open(params['cache_fname'], 'r'):
+                pass
+        return _Parent.new_template(self, params=params, temp_cls=temp_cls)
+
+
+def _save(master, fname):
+    with open(fname, 'w') as f:
+        f.write(repr(master))
+
+
+def test_grid_key_equal_config():
+    grid = _Grid()
+    assert get_grid_key(grid) == get_grid_key(copy.deepcopy(grid))
+
+
+@pytest.mark.parametrize('attr,val', [('w_tracks', {4: 50, 5: 100}),
+                                      ('sp_tracks', {4: 60, 5: 50}),
+                                      ('dir_tracks', {4: 'y', 5: 'x'}),
+                                      ('flip_parity', {4: (True, 0), 5: (False, 0)})])
+def test_grid_key_differs(attr, val):
+    grid = _Grid()
+    grid2 = copy.deepcopy(grid)
+    setattr(grid2, attr, val)
+    assert get_grid_key(grid) != get_grid_key(grid2)
+
+
+def test_grid_key_tech():
+    grid = _Grid()
+    grid2 = copy.deepcopy(grid)
+    grid2.tech_info = _Leaf()
+    assert get_grid_key(grid) != get_grid_key(grid2)
+
+
+def test_grid_key_per_object():
+    grid = _Grid()
+    key = get_grid_key(grid)
+    # the key is computed once per grid object
+    grid.w_tracks = {4: 50, 5: 100}
+    assert get_grid_key(grid) is key
+
+
+def test_leaf_cache_hit(tmpdir):
+    cache = LeafMasterCache(str(tmpdir), [_Leaf], save_fn=_save)
+    parent = _Parent(_Grid())
+    params = dict(a=1, b=[1, 2])
+    master = cache.new_template(parent, params, _Leaf)
+    assert master == (_Leaf, params)
+    # a repeated request in the same run returns the same master
+    assert cache.new_template(parent, dict(b=[1, 2], a=1), _Leaf) is master
+    assert cache.stats == dict(hits=0, misses=1)
+    assert len(parent.calls) == 1
+
+    # a later run reads the cache file
+    cache = LeafMasterCache(str(tmpdir), [_Leaf], save_fn=_save)
+    temp_cls, cache_params = cache.new_template(_Parent(_Grid()), params, _Leaf)
+    assert temp_cls is CachedTemplate
+    assert cache_params['cache_fname'] == cache.get_cache_fname(
+        cache.get_key(_Leaf, params, parent.grid))
+    assert cache.stats == dict(hits=1, misses=0)
+
+
+def test_leaf_cache_evicted(tmpdir):
+    LeafMasterCache(str(tmpdir), [_Leaf], save_fn=_save).new_template(
+        _Parent(_Grid()), dict(a=1), _Leaf)
+    cache = LeafMasterCache(str(tmpdir), [_Leaf], save_fn=_save)
+    assert cache.new_template(_EvictParent(_Grid()), dict(a=1), _Leaf) == (_Leaf, dict(a=1))
+    assert cache.stats == dict(hits=0, misses=1)
+
+
+def test_leaf_cache_lru(tmpdir):
+    parent = _Parent(_Grid())
+    size = len(repr((_Leaf, dict(a=1))))
+    cache = LeafMasterCache(str(tmpdir), [_Leaf], max_size=2 * size, save_fn=_save)
+    fname_list = [cache.get_cache_fname(cache.get_key(_Leaf, dict(a=idx), parent.grid))
+                  for idx in range(3)]
+    cache.new_template(parent, dict(a=0), _Leaf)
+    cache.new_template(parent, dict(a=1), _Leaf)
+    os.utime(fname_list[0], (0, 0))
+    os.utime(fname_list[1], (1, 1))
+    # a hit marks entry 0 as recently used, so entry 1 is evicted
+    LeafMasterCache(str(tmpdir), [_Leaf], save_fn=_save).new_template(parent, dict(a=0), _Leaf)
+    cache.new_template(parent, dict(a=2), _Leaf)
+    assert [os.path.isfile(fname) for fname in fname_list] == [True, False, True]
+
+
+def test_key_types(tmpdir):
+    cache = LeafMasterCache(str(tmpdir), [_Leaf], save_fn=_save)
+    grid = _Grid()
+    assert (cache.get_key(_Leaf, dict(a=np.int64(3), b=np.float64(0.5)), grid) ==
+            cache.get_key(_Leaf, dict(a=3, b=0.5), grid))
+    with pytest.raises(ValueError):
+        cache.get_key(_Leaf, dict(a=object()), grid)
+
+
+def test_leaf_cache_grid(tmpdir):
+    cache = LeafMasterCache(str(tmpdir), [_Leaf], save_fn=_save)
+    grid = _Grid()
+    grid2 = _Grid()
+    grid2.w_tracks = {4: 50, 5: 100}
+    cache.new_template(_Parent(grid), dict(a=1), _Leaf)
+    temp_cls, _ = cache.new_template(_Parent(grid2), dict(a=1), _Leaf)
+    assert temp_cls is _Leaf
+    assert cache.stats == dict(hits=0, misses=2)
+
+
+def test_leaf_master_cache_context(tmpdir):
+    assert get_leaf_cache() is None
+    with leaf_master_cache('', [_Leaf]) as cache:
+        assert cache is None
+        assert get_leaf_cache() is None
+    with leaf_master_cache(str(tmpdir), [_Leaf]) as cache:
+        assert get_leaf_cache() is cache
+        parent = _Parent(_Grid())
+        new_leaf_template(parent, dict(a=1), dict)
+        assert parent.calls == [(dict, dict(a=1))]
+    assert get_leaf_cache() is None
+
+
+def test_incremental_cache_reads(tmpdir, monkeypatch):
+    monkeypatch.setattr(cache_mod, 'save_master_cache', _save)
+    with leaf_master_cache(str(tmpdir), [_Gen], incremental=True) as cache:
+        parent = _new_parent()
+        master = new_leaf_template(parent, dict(a=1, b=1), _Gen)
+        assert master.value == 1
+        # b is not read by draw_layout(), so changing it reuses the master of this run
+        assert new_leaf_template(parent, dict(a=1, b=2), _Gen) is master
+        assert new_leaf_template(parent, dict(a=2, b=2), _Gen).value == 2
+        assert cache.stats == dict(hits=0, misses=2)
+
+    with leaf_master_cache(str(tmpdir), [_Gen], incremental=True) as cache:
+        # a later run reads the cache files
+        parent = _new_parent()
+        assert new_leaf_template(parent, dict(a=1, b=3), _Gen) is CachedTemplate
+        assert new_leaf_template(parent, dict(a=2), _Gen) is CachedTemplate
+        assert cache.stats == dict(hits=2, misses=0)
+
+
+def test_incremental_cache_restore(tmpdir, monkeypatch):
+    monkeypatch.setattr(cache_mod, 'save_master_cache', _save)
+    draw_layout = _Gen.__dict__['draw_layout']
+    with leaf_master_cache(str(tmpdir), [_Gen], incremental=True):
+        parent = _new_parent()
+        new_leaf_template(parent, dict(a=1), _Gen)
+        new_leaf_template(parent, dict(a=1), _GenChild)
+        assert _Gen.__dict__['draw_layout'] is not draw_layout
+        assert 'draw_layout' in _GenChild.__dict__
+    assert _Gen.__dict__['draw_layout'] is draw_layout
+    assert 'draw_layout' not in _GenChild.__dict__
+
+
+def test_incremental_cache_child_source(tmpdir, monkeypatch):
+    monkeypatch.setattr(cache_mod, 'save_master_cache', _save)
+    for hits, misses in ((0, 1), (1, 0)):
+        with leaf_master_cache(str(tmpdir), [_Top], incremental=True) as cache:
+            new_leaf_template(_new_parent(), dict(a=1), _Top)
+        assert cache.stats == dict(hits=hits, misses=misses)
+
+    # editing the source of a child that is not cached invalidates the parent
+    monkeypatch.setitem(IncrementalMasterCache._src_hash_table, _Gen, 'edited')
+    with leaf_master_cache(str(tmpdir), [_Top], incremental=True) as cache:
+        assert new_leaf_template(_new_parent(), dict(a=1), _Top).child.value == 1
+    assert cache.stats == dict(hits=0, misses=1)
+
+
+def test_incremental_cache_watch_restore(tmpdir, monkeypatch):
+    monkeypatch.setattr(cache_mod, 'save_master_cache', _save)
+    parent = _new_parent()
+    with leaf_master_cache(str(tmpdir), [_Top], incremental=True):
+        new_leaf_template(parent, dict(a=1), _Top)
+        assert 'new_template' in parent.template_db.__dict__
+    assert 'new_template' not in parent.template_db.__dict__
+
+
+def test_leaf_cache_prefetch(tmpdir):
+    cache = LeafMasterCache(str(tmpdir), [_Gen], save_fn=_save)
+    parent = _new_parent()
+    cache.new_template(parent, dict(a=0), _Gen)
+    job_list = [(dict(a=idx), _Gen) for idx in (0, 1, 2, 1)] + [(dict(a=3), _Top)]
+    # only the missing cached masters are generated, once each
+    assert cache.prefetch(parent, job_list, max_workers=2) == 2
+    for idx in range(3):
+        assert cache.has_entry(parent, dict(a=idx), _Gen)
+    assert not cache.has_entry(parent, dict(a=3), _Gen)
+    assert cache.new_template(parent, dict(a=1), _Gen) is CachedTemplate
+    assert cache.new_template(parent, dict(a=2), _Gen) is CachedTemplate
+    assert cache.stats == dict(hits=2, misses=1)
+
+
+def test_leaf_cache_prefetch_serial(tmpdir):
+    cache = LeafMasterCache(str(tmpdir), [_Gen], save_fn=_save)
+    parent = _new_parent()
+    job_list = [(dict(a=idx), _Gen) for idx in range(2)]
+    assert prefetch_leaf_templates(parent, job_list) == 0
+    assert cache.prefetch(parent, job_list, max_workers=1) == 0
+    assert cache.prefetch(parent, job_list[:1], max_workers=2) == 0
+    assert not os.listdir(str(tmpdir))
+
+
+def test_incremental_cache_prefetch(tmpdir, monkeypatch):
+    monkeypatch.setattr(cache_mod, 'save_master_cache', _save)
+    with leaf_master_cache(str(tmpdir), [_Gen], incremental=True) as cache:
+        parent = _new_parent()
+        job_list = [(dict(a=1, b=1), _Gen), (dict(a=2), _Gen)]
+        assert prefetch_leaf_templates(parent, job_list, max_workers=2) == 2
+        # b is not read by draw_layout(), so the entry of a = 1 is found
+        assert cache.has_entry(parent, dict(a=1, b=2), _Gen)
+        assert new_leaf_template(parent, dict(a=1, b=2), _Gen) is CachedTemplate
+        assert new_leaf_template(parent, dict(a=2), _Gen) is CachedTemplate
+        assert cache.stats == dict(hits=2, misses=0)
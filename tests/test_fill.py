@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the tile based fill partitioning."""
+
+import pytest
+
+pytest.importorskip('bag')
+
+from bag.layout.util import BBox
+
+from serdes_ec.layout.fill import (
+    get_fill_tiles, get_wire_blockages, get_track_fill, get_track_fill_job, run_track_fill
+)
+
+_RES = 0.001
+
+
+def _box(xl, yb, xr, yt):
+    return BBox(xl, yb, xr, yt, _RES, unit_mode=True)
+
+
+def _area(xl, yb, xr, yt):
+    return (xr - xl) * (yt - yb)
+
+
+def _check_cover(bnd, blk_w, blk_h, arr_list, box_list):
+    """Check that the tile arrays and in place boxes cover the region exactly once."""
+    tot = sum(nx * ny * blk_w * blk_h for _, _, nx, ny in arr_list)
+    tot += sum(_area(b.left_unit, b.bottom_unit, b.right_unit, b.top_unit) for b in box_list)
+    assert tot == _area(*bnd)
+
+
+def test_aligned_region():
+    arr_list, box_list = get_fill_tiles(_box(0, 0, 1000, 800), 100, 200)
+    assert arr_list == [(0, 0, 10, 4)]
+    assert box_list == []
+
+
+def test_boundary_strips():
+    bnd = (50, 30, 1050, 830)
+    arr_list, box_list = get_fill_tiles(_box(*bnd), 100, 200)
+    assert arr_list == [(1, 1, 9, 3)]
+    assert len(box_list) == 4
+    _check_cover(bnd, 100, 200, arr_list, box_list)
+
+
+def test_blockage():
+    bnd = (0, 0, 1000, 1000)
+    arr_list, box_list = get_fill_tiles(_box(*bnd), 100, 100,
+                                        blockages=[_box(420, 420, 580, 580)])
+    # tiles touching the blockage are filled in place
+    for ix, iy, nx, ny in arr_list:
+        assert ix + nx <= 4 or ix >= 6 or iy + ny <= 4 or iy >= 6
+    assert len(box_list) == 1
+    blk = box_list[0]
+    assert (blk.left_unit, blk.bottom_unit, blk.right_unit, blk.top_unit) == (400, 400, 600, 600)
+    _check_cover(bnd, 100, 100, arr_list, box_list)
+
+
+def test_too_small():
+    arr_list, box_list = get_fill_tiles(_box(10, 10, 90, 90), 100, 100)
+    assert arr_list == []
+    assert len(box_list) == 1
+
+
+class _Grid(object):
+    """Tracks of layer i have pitch 10 * i and width 4 * i, centered at (tr + 0.5) * pitch."""
+
+    def get_direction(self, layer_id):
+        return 'x' if layer_id % 2 == 0 else 'y'
+
+    def get_track_pitch(self, layer_id, unit_mode=False):
+        return 10 * layer_id
+
+    def get_line_end_space(self, layer_id, width, unit_mode=False):
+        return 2 * layer_id
+
+    def find_next_track(self, layer_id, coord, mode=1, unit_mode=False):
+        pitch = 10 * layer_id
+        if mode > 0:
+            # first track with lower bound >= coord
+            return -(-(coord - 3 * layer_id) // pitch)
+        # last track with upper bound <= coord
+        return (coord - 7 * layer_id) // pitch
+
+
+class _Wire(object):
+    def __init__(self, layer_id, box_list):
+        self.layer_id = layer_id
+        self._box_list = box_list
+
+    def get_bbox_array(self, grid):
+        return iter(self._box_list)
+
+
+def test_wire_blockages():
+    wires = [_Wire(1, [_box(0, 0, 10, 100)]),
+             _Wire(2, [_box(0, 0, 10, 100), _box(50, 0, 60, 100)]),
+             None,
+             _Wire(4, [_box(0, 0, 500, 10)])]
+    box_list = get_wire_blockages(_Grid(), wires, 2, 3)
+    # layers outside the fill layers are skipped, and boxes are expanded by the track pitch.
+    assert [(b.left_unit, b.bottom_unit, b.right_unit, b.top_unit) for b in box_list] == [
+        (-20, -20, 30, 120), (30, -20, 80, 120)]
+
+
+def test_wire_blocks_tiles():
+    bnd = (0, 0, 1000, 1000)
+    # the wire lies inside one tile, but its expanded box reaches into the neighbouring tiles.
+    blockages = get_wire_blockages(_Grid(), [_Wire(2, [_box(205, 100, 295, 190)])], 2, 2)
+    arr_list, box_list = get_fill_tiles(_box(*bnd), 100, 100, blockages=blockages)
+    blk = [(b.left_unit, b.bottom_unit, b.right_unit, b.top_unit) for b in box_list]
+    assert blk == [(100, 0, 400, 300)]
+    _check_cover(bnd, 100, 100, arr_list, box_list)
+
+
+def test_track_fill():
+    # tracks 0 to 4 in steps of 2, track 2 is blocked in the middle
+    job = (3, 0, 4, 2, 0, 100, ((1, 2, 40, 60),), 10)
+    assert sorted(get_track_fill(job)) == [(3, 0, 40, 2, 2, 1), (3, 0, 100, 2, 0, 1),
+                                           (3, 0, 100, 2, 4, 1), (3, 60, 100, 2, 2, 1)]
+    # identical wires on consecutive fill tracks are merged
+    assert get_track_fill((3, 0, 4, 2, 0, 100, (), 10)) == [(3, 0, 100, 2, 0, 3)]
+    # free intervals shorter than the minimum length are skipped
+    job = (3, 0, 0, 1, 0, 100, ((0, 0, 5, 50), (0, 0, 45, 95)), 10)
+    assert get_track_fill(job) == []
+
+
+def test_track_fill_job():
+    # horizontal layer 2: pitch 20, wires span [20 * tr + 6, 20 * tr + 14].  Track 0 is within
+    # half a pitch of the region boundary, so the first fill track is 2.
+    job = get_track_fill_job(_Grid(), 2, _box(0, 0, 200, 200), fill_pitch=2,
+                             blockages=[_box(50, 45, 80, 70), _box(500, 0, 600, 200)])
+    layer_id, tr0, tr1, step, lower, upper, blk_list, min_len = job
+    assert (layer_id, tr0, tr1, step, lower, upper, min_len) == (2, 2, 8, 2, 2, 198, 8)
+    # tracks 2 and 3 overlap the first box, the second box is outside the region
+    assert blk_list == ((2, 3, 46, 84),)
+    # no track fits in a region narrower than a pitch
+    assert get_track_fill_job(_Grid(), 2, _box(0, 0, 200, 15)) is None
+
+
+def test_track_fill_parallel():
+    grid = _Grid()
+    bnd = _box(0, 0, 4000, 4000)
+    blockages = [_box(x, y, x + 35, y + 55) for x in range(0, 4000, 370)
+                 for y in range(0, 4000, 410)]
+    job_list = [get_track_fill_job(grid, lay, bnd, blockages=blockages) for lay in (2, 3, 4)]
+    serial = run_track_fill(job_list, chunk_size=16)
+    assert serial == sorted(serial)
+    assert run_track_fill(job_list, max_workers=3, chunk_size=16) == serial
+    assert run_track_fill(job_list[::-1], max_workers=2, chunk_size=16) == serial
+    # chunking only splits wire arrays at chunk boundaries
+    arr_set = set(run_track_fill(job_list))
+    for layer_id, lower, upper, step, tr_idx, num in serial:
+        assert any(arr[:4] == (layer_id, lower, upper, step) and
+                   arr[4] <= tr_idx and tr_idx + num * step <= arr[4] + arr[5] * step
+                   for arr in arr_set)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""Equivalence tests of HybridQDRBaseInfo.get_integ_amp_info_array()."""
+
+import itertools
+
+import numpy as np
+import pytest
+
+pytest.importorskip('abs_templates_ec')
+
+from serdes_ec.layout.qdr_hybrid.base import HybridQDRBaseInfo
+
+
+def _make_info(min_fg_sep, abut_mos):
+    # only min_fg_sep and abut_analog_mos are used by the IntegAmp size computations.
+    cls = type('_IntegAmpInfo', (HybridQDRBaseInfo,), dict(min_fg_sep=min_fg_sep,
+                                                          abut_analog_mos=abut_mos))
+    return cls.__new__(cls)
+
+
+def _random_seg_dicts(rng, num):
+    for _ in range(num):
+        # required entries
+        seg_dict = {'in': int(rng.integers(1, 12)),
+                    'nen': int(rng.integers(1, 12)),
+                    'tail': int(rng.integers(1, 12)),
+                    }
+        for name, hi in (('load', 8), ('pen', 8), ('casc', 8), ('but', 8), ('tsw', 6),
+                         ('cap', 10), ('stack_in', 3), ('psep', 4), ('nsep', 4)):
+            if rng.random() < 0.5:
+                seg_dict[name] = int(rng.integers(1 if name == 'stack_in' else 0, hi))
+        yield seg_dict
+
+
+@pytest.mark.parametrize('min_fg_sep,abut_mos,fg_min,fg_dum,fg_sep_hm',
+                         list(itertools.product([0, 2], [False, True], [0, 40], [0, 3], [0, 4])))
+def test_array_matches_scalar(min_fg_sep, abut_mos, fg_min, fg_dum, fg_sep_hm):
+    info = _make_info(min_fg_sep, abut_mos)
+    rng = np.random.default_rng(min_fg_sep * 1000 + fg_min + fg_dum * 10 + fg_sep_hm)
+    for seg_dict in _random_seg_dicts(rng, 200):
+        arr_info = info.get_integ_amp_info_array(seg_dict, fg_min=fg_min, fg_dum=fg_dum,
+                                                 fg_sep_hm=fg_sep_hm)
+        try:
+            ref = info.get_integ_amp_info(seg_dict, fg_min=fg_min, fg_dum=fg_dum,
+                                          fg_sep_hm=fg_sep_hm)
+        except ValueError:
+            assert not arr_info['valid']
+            continue
+
+        assert arr_info['valid']
+        for key in ('fg_tot', 'fg_dum', 'fg_sep'):
+            assert arr_info[key] == ref[key], key
+        assert arr_info['seg_tot'] == ref['fg_tot'] - 2 * ref['fg_dum']
+        for name, col_arr in arr_info['col_dict'].items():
+            assert col_arr == ref['col_dict'].get(name, -1), name
+
+
+def test_array_broadcast():
+    info = _make_info(2, False)
+    seg_in = np.arange(1, 6)
+    seg_tail = np.arange(1, 4)[:, np.newaxis]
+    arr_info = info.get_integ_amp_info_array({'in': seg_in, 'nen': 4, 'tail': seg_tail,
+                                              'pen': 2, 'load': 2})
+    assert arr_info['fg_tot'].shape == (3, 5)
+    for idx in np.ndindex(3, 5):
+        seg_dict = {'in': int(seg_in[idx[1]]), 'nen': 4, 'tail': int(seg_tail[idx[0], 0]),
+                    'pen': 2, 'load': 2}
+        ref = info.get_integ_amp_info(seg_dict)
+        assert arr_info['fg_tot'][idx] == ref['fg_tot']
+        assert arr_info['col_dict']['in'][idx] == ref['col_dict']['in']
+
+
+@pytest.mark.parametrize('name', ['in', 'nen', 'tail'])
+def test_array_missing_required(name):
+    info = _make_info(2, False)
+    seg_dict = {'in': 2, 'nen': 2, 'tail': 2}
+    del seg_dict[name]
+    with pytest.raises(KeyError):
+        info.get_integ_amp_info(seg_dict)
+    with pytest.raises(KeyError):
+        info.get_integ_amp_info_array(seg_dict)
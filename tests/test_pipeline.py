@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the pipelined stage executor, run through the LocalBackend stand-in."""
+
+import asyncio
+
+import pytest
+
+from serdes_ec.simulation.pipeline import StagePipeline, LocalBackend
+
+_delays = dict(lvs=0.02, rcx=0.02, tb=0.02, sim=0.05)
+_max_workers = dict(lvs=2, rcx=2, tb=1, sim=4)
+_locks = dict(lvs='virtuoso', rcx='virtuoso', tb='virtuoso')
+
+
+def _intervals(log, names):
+    return sorted((t0, t1) for name, _, t0, t1 in log if name in names)
+
+
+def test_results_order():
+    backend = LocalBackend(_delays)
+    items = list(range(6))
+    assert StagePipeline(backend.get_stages(_max_workers)).run(items) == items
+    assert len(backend.log) == len(items) * len(_delays)
+
+
+def test_lock_serializes_stages():
+    backend = LocalBackend(_delays)
+    items = list(range(6))
+    results = StagePipeline(backend.get_stages(_max_workers, locks=_locks)).run(items)
+    assert results == items
+
+    # no two stages that share the Virtuoso lock overlap, for any item
+    intvs = _intervals(backend.log, _locks)
+    assert len(intvs) == len(items) * len(_locks)
+    for (_, t1), (t0, _) in zip(intvs, intvs[1:]):
+        assert t1 <= t0
+
+    # simulations still overlap with each other
+    sim_intvs = _intervals(backend.log, ['sim'])
+    assert any(t0 < t1 for (_, t1), (t0, _) in zip(sim_intvs, sim_intvs[1:]))
+
+
+def test_lvs_overlaps_rcx():
+    backend = LocalBackend(_delays)
+    items = list(range(6))
+    stages = backend.get_stages(_max_workers, locks=dict(tb='virtuoso'))
+    assert StagePipeline(stages).run(items) == items
+
+    # without a shared lock, LVS of one item runs during RCX of another
+    lvs_intvs = _intervals(backend.log, ['lvs'])
+    rcx_intvs = _intervals(backend.log, ['rcx'])
+    assert any(l0 < r1 and r0 < l1 for l0, l1 in lvs_intvs for r0, r1 in rcx_intvs)
+
+
+def test_event_loops_closed():
+    loops = []
+
+    def stage_fn(item):
+        loops.append(asyncio.get_event_loop())
+        return item
+
+    assert StagePipeline([('a', stage_fn, 2), ('b', stage_fn, 2)]).run(range(4)) == list(range(4))
+    # one event loop per item, shared by its stages and closed when the item finishes
+    assert len(set(id(loop) for loop in loops)) == 4
+    assert all(loop.is_closed() for loop in loops)
+
+
+def test_failure_aborts():
+    backend = LocalBackend(_delays, fail_on=('rcx', 1))
+    stages = backend.get_stages(_max_workers, locks=_locks)
+    with pytest.raises(ValueError, match='rcx failed on 1'):
+        StagePipeline(stages).run(list(range(6)))
+    assert not any(name == 'sim' and item == 1 for name, item, _, _ in backend.log)
+
+
+def test_bad_workers():
+    with pytest.raises(ValueError):
+        StagePipeline([('lvs', lambda x: x, 0)])
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the lazy HDF5 simulation results reader."""
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip('h5py')
+
+from serdes_ec.simulation.sim_data import LazySimData
+
+
+@pytest.fixture
+def sim_file(tmpdir):
+    fname = str(tmpdir.join('sim.hdf5'))
+    with h5py.File(fname, 'w') as f:
+        f['vin'] = np.linspace(0.0, 0.4, 5)
+        f['corner'] = np.array([b'tt', b'ff', b'ss'])
+        dset = f.create_dataset('out', data=np.arange(15.0).reshape(3, 5))
+        dset.attrs['sweep_params'] = [b'corner', b'vin']
+    return fname
+
+
+@pytest.mark.parametrize('idx', [[-1], [0, -1], [-2, 1], [4, -5]])
+def test_isel_negative_list(sim_file, idx):
+    expect = np.arange(15.0).reshape(3, 5)[:, idx]
+    with LazySimData(sim_file) as data:
+        val, swp_vars = data.isel('out', vin=idx)
+    assert swp_vars == ['corner', 'vin']
+    np.testing.assert_array_equal(val, expect)
+
+
+def test_isel_negative_scalar(sim_file):
+    with LazySimData(sim_file) as data:
+        val, swp_vars = data.isel('out', corner=-1, vin=[-1, 0])
+    assert swp_vars == ['vin']
+    np.testing.assert_array_equal(val, [14.0, 10.0])
+
+
+@pytest.mark.parametrize('kwargs', [dict(vin=[5]), dict(vin=[0, -6]), dict(corner=3)])
+def test_isel_out_of_range(sim_file, kwargs):
+    with LazySimData(sim_file) as data:
+        with pytest.raises(ValueError):
+            data.isel('out', **kwargs)